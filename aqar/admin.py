@@ -1,8 +1,17 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django import forms
+from django.shortcuts import render, redirect
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.db.models import Count
 from .models import *
 from aqar_core.models import Notification
+from .images import variant_url
+from .importers import import_listings, count_rows, detect_format, DEFAULT_CHUNK_SIZE
+from .moderation import moderate_listings
+from aqar_core.jobs import start_job
+from aqar_core.admin_tools import LargeTableAdminMixin, PhoneSearchMixin, CachedRelatedOnlyFieldListFilter
 try:
     from aqar_core.fcm_manager import send_push_notification
 except ImportError:
@@ -10,13 +19,14 @@ except ImportError:
 
 # ✅ 1. عرض التحليلات (Analytics Log)
 @admin.register(AnalyticsLog)
-class AnalyticsLogAdmin(admin.ModelAdmin):
+class AnalyticsLogAdmin(PhoneSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     # 🚀 تحسين الأداء: جلب البيانات المرتبطة في استعلام واحد
     list_select_related = ('user', 'listing', 'promotion')
     
     list_display = ('event_type_colored', 'get_target_name', 'get_visitor_info', 'get_total_ad_views', 'created_at')
-    list_filter = ('event_type', 'created_at', ('user', admin.RelatedOnlyFieldListFilter))
-    search_fields = ('user__username', 'user__first_name', 'user__phone_number', 'listing__title', 'promotion__title', 'ip_address')
+    list_filter = ('event_type', 'created_at', ('user', CachedRelatedOnlyFieldListFilter))
+    search_fields = ('user__username', 'user__first_name', 'listing__title', 'promotion__title', 'ip_address')
+    phone_search_fields = ('user__phone_normalized',)  # 📞 البحث بالرقم مطابقة تامة على الرقم الموحد
     readonly_fields = ('event_type', 'listing', 'promotion', 'user', 'ip_address', 'created_at')
 
     def get_visitor_info(self, obj):
@@ -63,16 +73,34 @@ class ListingImageInline(admin.TabularInline):
     extra = 0
     readonly_fields = ['image_preview']
     def image_preview(self, obj):
-        return format_html('<img src="{}" style="width: 100px; height: auto;" />', obj.image.url) if obj.image else ""
+        return format_html('<img src="{}" style="width: 100px; height: auto;" loading="lazy" />', variant_url(obj.image, 'admin')) if obj.image else ""
+
+class ListingImportForm(forms.Form):
+    file = forms.FileField(label="الملف (CSV أو NDJSON)")
+    chunk_size = forms.IntegerField(label="حجم الدفعة", initial=DEFAULT_CHUNK_SIZE, min_value=1, max_value=5000)
+    dry_run = forms.BooleanField(label="تحقق بس من غير حفظ", required=False)
+
+    # الاستيراد هنا بيتنفذ جوه الطلب، فالملفات الكبيرة (أكتر من ADMIN_IMPORT_MAX_ROWS) بتتعمل بأمر import_listings
+    # عشان متقعش في الـ Timeout بتاع السيرفرليس في النص
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        limit = getattr(settings, 'ADMIN_IMPORT_MAX_ROWS', 2000)
+        if count_rows(upload, detect_format(upload.name)) > limit:
+            raise forms.ValidationError(
+                f"الملف فيه أكتر من {limit} سطر، استورده بالأمر: python manage.py import_listings <الملف>"
+            )
+        return upload
 
 # ✅ 3. لوحة تحكم العقارات (Listing Admin)
-class ListingAdmin(admin.ModelAdmin):
+class ListingAdmin(PhoneSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    change_list_template = 'admin/aqar/listing/change_list.html'
     # 🚀 تحسين الأداء هام جداً هنا
     list_select_related = ('agent', 'category', 'governorate', 'city')
     
     list_display = ('title', 'status_badge', 'price', 'views_count', 'whatsapp_clicks', 'get_publisher_summary', 'created_at')
     list_filter = ('status', 'offer_type', 'category', 'governorate', 'is_finance_eligible')
-    search_fields = ('title', 'reference_code', 'owner_phone', 'owner_name', 'agent__username', 'agent__phone_number')
+    search_fields = ('title', 'reference_code', 'owner_name', 'agent__username')
+    phone_search_fields = ('owner_phone_normalized', 'agent__phone_normalized')
     
     inlines = [ListingFeatureInline, ListingImageInline]
     actions = ['approve_listings', 'reject_listings']
@@ -138,22 +166,65 @@ class ListingAdmin(admin.ModelAdmin):
         return format_html(f'<span style="color:white; background:{colors.get(obj.status, "gray")}; padding:3px 8px; border-radius:5px;">{obj.get_status_display()}</span>')
     status_badge.short_description = "الحالة"
 
+    # ⏳ القبول والتعليق بالجملة بيشتغلوا كمهمة خلفية (aqar/moderation.py) والتقدم في "المهام الخلفية"
+    # الاختيارات الصغيرة (أقل من MODERATION_INLINE_LIMIT) بتتنفذ في نفس الطلب عشان متعلقش لو الـ Thread مات
+    # الأرقام بتتحفظ في مدخلات المهمة (عشان تتعاد)، فاللي محتاج يتغير بس وبحد أقصى MODERATION_MAX_SELECTION
+    def _start_moderation(self, request, queryset, status, label):
+        limit = getattr(settings, 'MODERATION_MAX_SELECTION', 5000)
+        ids = list(queryset.exclude(status=status).values_list('id', flat=True)[:limit + 1])
+        if not ids:
+            self.message_user(request, f"كل الإعلانات المختارة حالتها بالفعل {dict(Listing.STATUS_CHOICES).get(status, status)}", level=messages.WARNING)
+            return
+        if len(ids) > limit:
+            self.message_user(request, f"⛔ الحد الأقصى {limit} إعلان في المرة، ضيق الاختيار بالفلاتر ونفذ على دفعات", level=messages.ERROR)
+            return
+        inline = len(ids) <= getattr(settings, 'MODERATION_INLINE_LIMIT', 200)
+        job = start_job(f"{label} {len(ids)} إعلان", moderate_listings, ids, status, total=len(ids), user=request.user, inline=inline)
+        url = reverse('admin:aqar_core_backgroundjob_change', args=[job.pk])
+        if inline:
+            job.refresh_from_db()
+            level = messages.ERROR if job.status == 'Failed' else messages.SUCCESS
+            self.message_user(request, format_html('{} {} إعلان: {} - <a href="{}">التفاصيل</a>', label, len(ids), job.get_status_display(), url), level=level)
+        else:
+            self.message_user(request, format_html('⏳ جاري {} {} إعلان في الخلفية - <a href="{}">متابعة التقدم</a>', label, len(ids), url))
+
     def approve_listings(self, request, queryset):
-        queryset.update(status='Available')
-        count = 0
-        for listing in queryset:
-            if listing.agent:
-                # يمكنك تفعيل التنبيهات هنا إذا كان نظام التنبيهات جاهزاً
-                pass
-                count += 1
-        self.message_user(request, f"تم نشر {count} إعلان بنجاح.")
+        self._start_moderation(request, queryset, 'Available', 'نشر')
     approve_listings.short_description = "✅ قبول ونشر"
 
     def reject_listings(self, request, queryset):
-        queryset.update(status='Pending')
-        self.message_user(request, "تم تعليق الإعلانات.")
+        self._start_moderation(request, queryset, 'Pending', 'تعليق')
     reject_listings.short_description = "⛔ تعليق / رفض"
 
+    # 📥 استيراد عقارات من ملف (aqar/importers.py) - للملفات الكبيرة جداً استخدم أمر import_listings
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='aqar_listing_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:aqar_listing_changelist')
+        result = None
+        form = ListingImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            result = import_listings(
+                upload, fmt=detect_format(upload.name),
+                chunk_size=form.cleaned_data['chunk_size'], dry_run=form.cleaned_data['dry_run'],
+                defaults={'created_by_id': request.user.pk},
+            )
+            level = messages.SUCCESS if not result.failed else messages.WARNING
+            self.message_user(request, f"{result.created} عقار من {result.total} سطر ({result.rows_per_second} سطر/ث)، {result.failed} خطأ", level=level)
+        return render(request, 'admin/aqar/listing/import_listings.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'استيراد عقارات من ملف',
+            'form': form,
+            'result': result,
+            'max_rows': getattr(settings, 'ADMIN_IMPORT_MAX_ROWS', 2000),
+        })
+
 admin.site.register(Listing, ListingAdmin)
 
 # ✅ 4. Inlines للإعلانات (Promotions)
@@ -162,7 +233,7 @@ class PromotionImageInline(admin.TabularInline):
     extra = 1
     readonly_fields = ['image_preview']
     def image_preview(self, obj):
-        return format_html('<img src="{}" style="width: 100px; height: auto;" />', obj.image.url) if obj.image else ""
+        return format_html('<img src="{}" style="width: 100px; height: auto;" loading="lazy" />', variant_url(obj.image, 'admin')) if obj.image else ""
 
 class TransformationInline(admin.StackedInline):
     model = Transformation
@@ -179,11 +250,12 @@ class PromotionUnitInline(admin.TabularInline):
 
 # ✅ 5. لوحة تحكم الإعلانات (Promotion Admin)
 @admin.register(Promotion)
-class PromotionAdmin(admin.ModelAdmin):
-    list_display = ('title', 'promo_type', 'is_active', 'views_count', 'clicks_count', 'display_order', 'created_at')
+class PromotionAdmin(PhoneSearchMixin, admin.ModelAdmin):
+    list_display = ('title', 'promo_type', 'is_active', 'starts_at', 'ends_at', 'weight', 'views_count', 'clicks_count', 'display_order', 'created_at')
     list_filter = ('promo_type', 'is_active')
-    list_editable = ('is_active', 'display_order')
+    list_editable = ('is_active', 'display_order', 'weight')
     search_fields = ('title', 'description', 'developer_name')
+    phone_search_fields = ('phone_normalized', 'whatsapp_normalized')
     readonly_fields = ('views_count', 'clicks_count', 'whatsapp_clicks', 'call_clicks')
     
     inlines = [PromotionImageInline, TransformationInline, PromotionUnitInline] 
@@ -195,6 +267,10 @@ class PromotionAdmin(admin.ModelAdmin):
         ('الإعدادات الأساسية', {
             'fields': ('title', 'subtitle', 'promo_type', 'cover_image', 'developer_logo', 'master_plan', 'is_active', 'display_order')
         }),
+        ('⏰ الجدولة والتدوير', {
+            'fields': ('starts_at', 'ends_at', 'weight', 'daily_impression_cap'),
+            'description': 'الإعلان يظهر تلقائياً في الفترة المحددة فقط. الوزن بيتحكم في نسبة ظهوره في السلايدر.'
+        }),
         ('ربط بعقار (اختياري)', {
             'fields': ('target_listing',),
         }),
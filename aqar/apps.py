@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AqarConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'aqar'
+    def ready(self):
+        # تفعيل إشارات إلغاء الكاش
+        import aqar.signals
@@ -0,0 +1,88 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from aqar_core.caching import get_version, get_or_build
+from aqar_core.models import ContactInfo
+from aqar_core.site_settings import get_public_settings
+from .models import Category, Governorate, City, MajorZone, Subdivision
+from .serializers import (
+    CategorySerializer, GovernorateSerializer, CitySerializer,
+    MajorZoneSerializer, SubdivisionSerializer,
+)
+from .promotions import get_active_promotions
+
+# ✅ بيانات بداية التطبيق (Bootstrap): كل الإعدادات الثابتة في رد واحد
+# بتتبني مرة واحدة وتتخزن في الكاش، ورقم الإصدار 'bootstrap' بيزيد مع أي تعديل (aqar/signals.py)
+# العروض بتبدأ وتخلص بالجدولة من غير تعديل، فالعروض النشطة حالياً جزء من مفتاح الكاش (زي بصمة PromotionViewSet)
+
+BOOTSTRAP_NAMESPACE = 'bootstrap'
+BOOTSTRAP_TIMEOUT = 60 * 60 * 24
+# بنحتفظ ببصمات الأقسام للنسخ القديمة عشان نقدر نرجع للعميل الفرق بس
+MANIFEST_TIMEOUT = 60 * 60 * 24 * 7
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+def _hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def build_sections(promotions):
+    return {
+        'categories': CategorySerializer(Category.objects.prefetch_related('allowed_features'), many=True).data,
+        'governorates': GovernorateSerializer(Governorate.objects.all(), many=True).data,
+        'cities': CitySerializer(City.objects.all(), many=True).data,
+        'major_zones': MajorZoneSerializer(MajorZone.objects.all(), many=True).data,
+        'subdivisions': SubdivisionSerializer(Subdivision.objects.all(), many=True).data,
+        'contact_info': ContactInfo.get_payload(),
+        # الإعدادات العامة المسجلة بس (aqar_core/site_settings.py)، مش كل الجدول
+        'settings': get_public_settings(),
+        'promotions': promotions,
+    }
+
+def build_bootstrap_blob(promotions):
+    sections = {}
+    section_hashes = {}
+    for name, data in build_sections(promotions).items():
+        encoded = _dumps(data)
+        section_hashes[name] = _hash(encoded)
+        sections[name] = json.loads(encoded)
+
+    content_hash = _hash(_dumps(section_hashes))
+    cache.set(f'bootstrap_manifest_{content_hash}', section_hashes, timeout=MANIFEST_TIMEOUT)
+    full = {'hash': content_hash, 'full': True, 'section_hashes': section_hashes, 'data': sections}
+    return {
+        'hash': content_hash,
+        'section_hashes': section_hashes,
+        'sections': sections,
+        'body': _dumps(full).encode('utf-8'),  # الرد الكامل جاهز كـ bytes
+    }
+
+def get_bootstrap_blob():
+    promotions = get_active_promotions()
+    active = _hash(','.join(str(p['id']) for p in promotions))
+    key = f'bootstrap_blob_{get_version(BOOTSTRAP_NAMESPACE)}_{active}'
+    return get_or_build(key, lambda: build_bootstrap_blob(promotions), timeout=BOOTSTRAP_TIMEOUT)
+
+def build_bootstrap_diff(blob, client_hash):
+    """
+    الفرق بين نسخة العميل والنسخة الحالية (الأقسام اللي اتغيرت بس).
+    بترجع None لو منعرفش نسخة العميل (يبقى لازم نرجعله كل حاجة).
+    """
+    old_hashes = cache.get(f'bootstrap_manifest_{client_hash}')
+    if old_hashes is None:
+        return None
+    changed = {
+        name: blob['sections'][name]
+        for name, section_hash in blob['section_hashes'].items()
+        if old_hashes.get(name) != section_hash
+    }
+    return {
+        'hash': blob['hash'],
+        'full': False,
+        'base': client_hash,
+        'section_hashes': blob['section_hashes'],
+        'data': changed,
+        'removed': [name for name in old_hashes if name not in blob['section_hashes']],
+    }
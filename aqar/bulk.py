@@ -0,0 +1,72 @@
+from django.db.models import Max
+from aqar_core.caching import bump_version_on_commit
+from aqar_core.cdn import enqueue_purge
+from .models import ListingImage, ListingFeature
+from .placeholders import queue_image_metadata
+
+# ✅ إضافة صور العقار دفعة واحدة (Bulk Attach)
+# بدل create لكل صورة (وكل create بيحفظ العقار من جديد عشان الـ Thumbnail):
+# 1) بنجهز الصور في الذاكرة ونختار الـ Thumbnail
+# 2) العقار بيتحفظ مرة واحدة بس (من الـ Serializer)
+# 3) كل الصور بتتضاف في bulk_create واحد
+
+def build_listing_images(listing, entries, start_order=0):
+    """
+    entries: قائمة {'url', 'caption', 'order'} (الـ order اختياري)
+    بترجع صور غير محفوظة مترتبة بالـ order
+    """
+    images = [
+        ListingImage(
+            listing=listing,
+            image=entry['url'],
+            caption=entry.get('caption') or '',
+            order=entry['order'] if entry.get('order') is not None else start_order + index,
+        )
+        for index, entry in enumerate(entries)
+    ]
+    return sorted(images, key=lambda img: img.order)
+
+def next_image_order(listing):
+    """الترتيب اللي بعد آخر صورة موجودة (استعلام واحد)"""
+    current = listing.images.aggregate(last=Max('order'))['last']
+    return 0 if current is None else current + 1
+
+def assign_thumbnail(listing, images):
+    # في الذاكرة بس، الحفظ على المستدعي
+    if images and not listing.thumbnail:
+        listing.thumbnail = images[0].image.name
+        return True
+    return False
+
+def attach_listing_images(listing, images):
+    """الحفظ الفعلي (بعد ما العقار اتحفظ وبقى ليه pk)"""
+    if not images:
+        return []
+    for img in images:
+        img.listing = listing  # عشان الـ listing_id يتملي لو العقار كان جديد وقت تجهيز الصور
+    created = ListingImage.objects.bulk_create(images)
+    # bulk_create مبيبعتش signals: الكاش وحساب الـ Placeholder بنعملهم بنفسنا
+    bump_version_on_commit('listings')
+    enqueue_purge('listings', f'listing:{listing.pk}')
+    queue_image_metadata(ListingImage, [img.pk for img in created])
+    return created
+
+# ✅ حفظ المميزات الديناميكية (Upsert واحد بدل get + update_or_create لكل ميزة)
+def upsert_listing_features(listing, values):
+    """
+    values: {feature_id: value} بعد التحقق في الـ Serializer، والقيمة None معناها الميزة اتمسحت
+    """
+    rows = [
+        ListingFeature(listing=listing, feature_id=feature_id, value=value)
+        for feature_id, value in values.items() if value is not None
+    ]
+    if rows:
+        ListingFeature.objects.bulk_create(
+            rows, update_conflicts=True,
+            unique_fields=['listing', 'feature'], update_fields=['value'],
+        )
+    cleared = [feature_id for feature_id, value in values.items() if value is None]
+    if cleared:
+        ListingFeature.objects.filter(listing=listing, feature_id__in=cleared).delete()
+    bump_version_on_commit('listings')
+    enqueue_purge('listings', f'listing:{listing.pk}')
@@ -0,0 +1,176 @@
+import csv
+import json
+import zlib
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .filters import ListingFilter, AnalyticsLogExportFilter, UserExportFilter
+from .models import Listing, ListingFeature, AnalyticsLog, User
+
+# ==========================================
+# تصدير البيانات (CSV / NDJSON) كـ Stream
+# ==========================================
+# - مفيش list في الذاكرة: values_list().iterator(chunk_size) وكل دفعة بتتكتب وتتبعت على طول
+# - مفيش Model instances (أسماء الجغرافيا وغيرها بتيجي من الـ JOIN في نفس الاستعلام)
+# - gzip اختياري بيتعمل وإحنا بنكتب (zlib streaming)
+
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024  # بنجمع الأسطر لحد 64KB قبل ما نبعتها
+
+class Echo:
+    """ملف وهمي للـ csv.writer: بيرجع السطر بدل ما يكتبه"""
+    def write(self, value):
+        return value
+
+class BaseExporter:
+    name = ''
+    columns = ()  # (اسم العمود في الملف، مسار الحقل في values_list)
+    filterset_class = None
+    ordering = ('pk',)
+
+    def __init__(self, params=None):
+        self.params = params or {}
+        self.filterset = self.filterset_class(self.params, queryset=self.model.objects.all()) if self.filterset_class else None
+
+    @property
+    def errors(self):
+        # django-filter بيشيل الفلتر الغلط من الاستعلام، فمن غير التحقق ده ?joined_from=2024-13-45 بيصدر الجدول كله
+        if self.filterset is None or self.filterset.is_valid():
+            return {}
+        return self.filterset.errors
+
+    def get_queryset(self):
+        if self.errors:
+            raise ValueError(f"فلاتر غير صالحة: {dict(self.errors)}")
+        qs = self.filterset.qs if self.filterset is not None else self.model.objects.all()
+        return qs.order_by(*self.ordering)
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def iter_rows(self):
+        paths = [path for _, path in self.columns]
+        yield from self.get_queryset().values_list(*paths).iterator(chunk_size=CHUNK_SIZE)
+
+class ListingExporter(BaseExporter):
+    name = 'listings'
+    model = Listing
+    filterset_class = ListingFilter
+    columns = (
+        ('id', 'id'), ('reference_code', 'reference_code'), ('title', 'title'),
+        ('status', 'status'), ('offer_type', 'offer_type'), ('price', 'price'), ('area_sqm', 'area_sqm'),
+        ('category', 'category__name'),
+        ('governorate', 'governorate__name'), ('city', 'city__name'),
+        ('major_zone', 'major_zone__name'), ('subdivision', 'subdivision__name'),
+        ('bedrooms', 'bedrooms'), ('bathrooms', 'bathrooms'), ('floor_number', 'floor_number'),
+        ('project_name', 'project_name'), ('owner_name', 'owner_name'), ('owner_phone', 'owner_phone'),
+        ('agent', 'agent__username'), ('latitude', 'latitude'), ('longitude', 'longitude'),
+        ('is_finance_eligible', 'is_finance_eligible'),
+        ('views_count', 'views_count'), ('whatsapp_clicks', 'whatsapp_clicks'), ('call_clicks', 'call_clicks'),
+        ('created_at', 'created_at'),
+    )
+
+    @property
+    def headers(self):
+        return super().headers + ['features']
+
+    def iter_rows(self):
+        # المميزات بتتجاب لكل دفعة في استعلام واحد وتتحط في عمود واحد (اسم=قيمة; ...)
+        batch = []
+        for row in super().iter_rows():
+            batch.append(row)
+            if len(batch) >= CHUNK_SIZE:
+                yield from self._with_features(batch)
+                batch = []
+        if batch:
+            yield from self._with_features(batch)
+
+    def _with_features(self, batch):
+        features = defaultdict(list)
+        values = ListingFeature.objects.filter(listing_id__in=[row[0] for row in batch]).values_list('listing_id', 'feature__name', 'value')
+        for listing_id, name, value in values:
+            features[listing_id].append(f"{name}={value}")
+        for row in batch:
+            yield row + ('; '.join(features.get(row[0], ())),)
+
+class AnalyticsExporter(BaseExporter):
+    name = 'analytics'
+    model = AnalyticsLog
+    filterset_class = AnalyticsLogExportFilter
+    columns = (
+        ('id', 'id'), ('created_at', 'created_at'), ('event_type', 'event_type'),
+        ('listing_id', 'listing_id'), ('listing_ref', 'listing__reference_code'), ('listing_title', 'listing__title'),
+        ('promotion_id', 'promotion_id'), ('promotion_title', 'promotion__title'),
+        ('user_id', 'user_id'), ('username', 'user__username'), ('user_phone', 'user__phone_number'),
+        ('ip_address', 'ip_address'),
+    )
+
+class UserExporter(BaseExporter):
+    name = 'users'
+    model = User
+    filterset_class = UserExportFilter
+    # ⛔ مفيش password ولا fcm_token
+    columns = (
+        ('id', 'id'), ('username', 'username'), ('first_name', 'first_name'), ('last_name', 'last_name'),
+        ('phone_number', 'phone_number'), ('email', 'email'), ('client_type', 'client_type'),
+        ('is_agent', 'is_agent'), ('is_staff', 'is_staff'), ('is_active', 'is_active'),
+        ('interested_in_rent', 'interested_in_rent'), ('interested_in_buy', 'interested_in_buy'),
+        ('date_joined', 'date_joined'), ('last_login', 'last_login'),
+    )
+
+EXPORTERS = {cls.name: cls for cls in (ListingExporter, AnalyticsExporter, UserExporter)}
+FORMATS = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson; charset=utf-8'}
+
+# --- الكتابة ---
+def _format_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+def iter_lines(exporter, fmt='csv'):
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield '﻿' + writer.writerow(exporter.headers)  # BOM عشان Excel يقرا العربي صح
+        for row in exporter.iter_rows():
+            yield writer.writerow([_format_value(v) for v in row])
+        return
+    headers = exporter.headers
+    for row in exporter.iter_rows():
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+def iter_chunks(exporter, fmt='csv', compress=False):
+    """بايتات جاهزة للإرسال، مجمعة في دفعات ~64KB ومضغوطة gzip لو مطلوب"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    buffer, size = [], 0
+    for line in iter_lines(exporter, fmt):
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+def export_filename(name, fmt, compress):
+    return f"{name}-{timezone.localdate():%Y%m%d}.{fmt}" + ('.gz' if compress else '')
+
+def streaming_export_response(exporter, fmt='csv', compress=False):
+    """exporter لازم يكون اتعمله تحقق (exporter.errors فاضية) قبل ما الـ Stream يبدأ"""
+    name = exporter.name
+    response = StreamingHttpResponse(
+        iter_chunks(exporter, fmt, compress),
+        content_type='application/gzip' if compress else FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(name, fmt, compress)}"'
+    response['Cache-Control'] = 'no-store'
+    return response
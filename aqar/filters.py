@@ -1,5 +1,9 @@
+from datetime import datetime, time, timedelta
+
 import django_filters
-from .models import Listing
+from django.utils import timezone
+from django_filters.constants import EMPTY_VALUES
+from .models import Listing, AnalyticsLog, User
 
 class ListingFilter(django_filters.FilterSet):
     # ✅ ترجمة أسماء الفرونت إند لاستعلامات دجانجو
@@ -25,4 +29,42 @@ class ListingFilter(django_filters.FilterSet):
 
     class Meta:
         model = Listing
-        fields = ['offer_type', 'category', 'status', 'is_finance_eligible']
\ No newline at end of file
+        fields = ['offer_type', 'category', 'status', 'is_finance_eligible']
+
+# ✅ فلاتر التصدير (نفس فلاتر لوحة التحكم) - aqar/exporters.py
+class DayFilter(django_filters.DateFilter):
+    """
+    فلتر بيوم كامل بيتحول لمدى وقت (بدل __date) عشان الـ Index على العمود يشتغل
+    lookup_expr='gte' من أول اليوم / 'lt' لحد آخر اليوم
+    """
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        start = timezone.make_aware(datetime.combine(value, time.min))
+        if self.lookup_expr == 'lt':
+            start += timedelta(days=1)
+        return qs.filter(**{f'{self.field_name}__{self.lookup_expr}': start})
+
+class AnalyticsLogExportFilter(django_filters.FilterSet):
+    event_type = django_filters.CharFilter(field_name='event_type')
+    user = django_filters.NumberFilter(field_name='user')
+    listing = django_filters.NumberFilter(field_name='listing')
+    promotion = django_filters.NumberFilter(field_name='promotion')
+    date_from = DayFilter(field_name='created_at', lookup_expr='gte')
+    date_to = DayFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = AnalyticsLog
+        fields = ['event_type', 'user', 'listing', 'promotion']
+
+class UserExportFilter(django_filters.FilterSet):
+    client_type = django_filters.CharFilter(field_name='client_type')
+    is_staff = django_filters.BooleanFilter(field_name='is_staff')
+    is_active = django_filters.BooleanFilter(field_name='is_active')
+    is_agent = django_filters.BooleanFilter(field_name='is_agent')
+    joined_from = DayFilter(field_name='date_joined', lookup_expr='gte')
+    joined_to = DayFilter(field_name='date_joined', lookup_expr='lt')
+
+    class Meta:
+        model = User
+        fields = ['client_type', 'is_staff', 'is_active', 'is_agent']
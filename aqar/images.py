@@ -0,0 +1,74 @@
+from rest_framework import serializers
+
+# ✅ أحجام الصور (Responsive Variants) عن طريق تحويلات Cloudinary في الرابط نفسه
+# الرابط بيتبني محلياً (من غير أي اتصال بالشبكة)، وCloudinary بيعمل الصورة بالمقاس المطلوب
+# أول مرة ويخزنها على الـ CDN بتاعه.
+
+UPLOAD_SEGMENT = '/image/upload/'
+
+VARIANTS = {
+    'card': 'c_fill,g_auto,w_480,h_360,q_auto,f_auto',   # كروت القوائم (صغيرة وسريعة)
+    'detail': 'c_limit,w_1280,q_auto,f_auto',            # صفحة التفاصيل
+    'full': 'c_limit,w_2048,q_auto:good,f_auto',         # العرض بملء الشاشة
+    'admin': 'c_fill,w_120,h_90,q_auto:low,f_auto',      # معاينة لوحة التحكم
+}
+
+SRCSET_WIDTHS = (320, 480, 640, 960, 1280, 1920)
+
+def image_url(field_file):
+    """
+    رابط الصورة الأصلي. الصور المرفوعة من الفرونت بتتحفظ كرابط كامل في name،
+    غير كده بنسيب الـ storage يبني الرابط (Cloudinary بيبنيه محلياً).
+    """
+    if not field_file:
+        return None
+    name = getattr(field_file, 'name', None) or str(field_file)
+    if name.startswith(('http://', 'https://')):
+        return name
+    try:
+        return field_file.url
+    except (ValueError, AttributeError):
+        return None
+
+def transform_url(url, transformation):
+    # الروابط اللي مش من Cloudinary بترجع زي ما هي
+    if not url or UPLOAD_SEGMENT not in url:
+        return url
+    head, tail = url.split(UPLOAD_SEGMENT, 1)
+    return f'{head}{UPLOAD_SEGMENT}{transformation}/{tail}'
+
+def variant_url(field_file, variant):
+    return transform_url(image_url(field_file), VARIANTS[variant])
+
+def build_srcset(field_file):
+    url = image_url(field_file)
+    if not url or UPLOAD_SEGMENT not in url:
+        return None
+    return ', '.join(f'{transform_url(url, f"c_limit,w_{width},q_auto,f_auto")} {width}w' for width in SRCSET_WIDTHS)
+
+def build_variants(field_file):
+    url = image_url(field_file)
+    if not url:
+        return None
+    variants = {name: transform_url(url, transformation) for name, transformation in VARIANTS.items()}
+    variants['srcset'] = build_srcset(field_file)
+    return variants
+
+class ImageVariantField(serializers.Field):
+    """رابط مقاس واحد (مثلاً card) للقراءة فقط"""
+    def __init__(self, variant, **kwargs):
+        self.variant = variant
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return variant_url(value, self.variant)
+
+class ImageVariantsField(serializers.Field):
+    """كل المقاسات + srcset للقراءة فقط"""
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return build_variants(value)
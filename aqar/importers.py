@@ -0,0 +1,282 @@
+import csv
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+from aqar_core.caching import bump_version_on_commit
+from aqar_core.cdn import enqueue_purge
+from aqar_core.phones import normalize_phone
+from .models import (
+    Governorate, City, MajorZone, Subdivision, Category, Feature, User,
+    Listing, ListingImage, ListingFeature,
+)
+from .placeholders import queue_image_metadata
+
+# ==========================================
+# استيراد العقارات بالجملة (CSV / NDJSON)
+# ==========================================
+# - الملف بيتقري سطر بسطر (Streaming)، والذاكرة فيها دفعة واحدة بس في أي وقت
+# - الأسماء (المحافظة، المدينة، ...) بتتحول لـ IDs من كاش في الذاكرة بيتحمل مرة واحدة
+# - كل دفعة بتتحفظ بـ bulk_create للعقارات والمميزات والصور في transaction واحدة
+#
+# الأعمدة: title, price, area_sqm, description, governorate, city, major_zone, subdivision, category
+# اختياري: offer_type, status, bedrooms, bathrooms, floor_number, building_number, apartment_number,
+#          project_name, owner_name, owner_phone, latitude, longitude, google_maps_url, youtube_url,
+#          is_finance_eligible, agent (username أو رقم تليفون)
+# الصور: images (روابط مفصولة بـ | في CSV أو list في NDJSON)
+# المميزات: features ({"اسم الميزة": قيمة}) أو أعمدة بالشكل feature:اسم الميزة
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_STORED_ERRORS = 1000
+
+INT_FIELDS = ('area_sqm', 'bedrooms', 'bathrooms', 'floor_number')
+TEXT_FIELDS = (
+    'building_number', 'apartment_number', 'project_name', 'owner_name', 'owner_phone',
+    'google_maps_url', 'youtube_url',
+)
+TRUE_VALUES = ('1', 'true', 'yes', 'نعم')
+
+class RowError(Exception):
+    pass
+
+def _key(value):
+    return ' '.join(str(value).split()).casefold()
+
+def _choice_map(choices):
+    # بيقبل القيمة نفسها (Sale) أو اسمها بالعربي (بيع)
+    mapping = {}
+    for value, label in choices:
+        mapping[_key(value)] = mapping[_key(label)] = value
+    return mapping
+
+CHOICES = {
+    'offer_type': _choice_map(Listing._meta.get_field('offer_type').choices),
+    'status': _choice_map(Listing.STATUS_CHOICES),
+}
+
+# --- 1. قراءة الملف (Streaming) ---
+def iter_rows(fileobj, fmt='csv'):
+    """بترجع (رقم السطر، dict) لكل سطر. fileobj ممكن يكون binary أو text"""
+    fileobj = getattr(fileobj, 'file', fileobj)  # UploadedFile بتاع Django
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(fileobj)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(fileobj, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, RowError(f"JSON غير صالح: {e}")
+            continue
+        yield line_no, row if isinstance(row, dict) else RowError("السطر لازم يكون object")
+
+def count_rows(fileobj, fmt='csv'):
+    """عدد تقريبي للسطور من غير parse (الخلايا اللي فيها سطر جديد في CSV بتتعد زيادة) والملف بيرجع لأوله"""
+    fileobj = getattr(fileobj, 'file', fileobj)
+    fileobj.seek(0)
+    count = sum(1 for line in fileobj if line.strip())
+    fileobj.seek(0)
+    return max(count - 1, 0) if fmt == 'csv' else count
+
+def detect_format(filename):
+    return 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+# --- 2. كاش الأسماء (بيتحمل مرة واحدة) ---
+class LookupCache:
+    def __init__(self):
+        self.governorates = {_key(name): pk for pk, name in Governorate.objects.values_list('id', 'name')}
+        self.cities = {(gov, _key(name)): pk for pk, gov, name in City.objects.values_list('id', 'governorate_id', 'name')}
+        self.zones = {(city, _key(name)): pk for pk, city, name in MajorZone.objects.values_list('id', 'city_id', 'name')}
+        self.subdivisions = {(zone, _key(name)): pk for pk, zone, name in Subdivision.objects.values_list('id', 'major_zone_id', 'name')}
+        self.categories = {}
+        for pk, name, slug in Category.objects.values_list('id', 'name', 'slug'):
+            self.categories[_key(name)] = self.categories[_key(slug)] = pk
+        self.features = {(cat, _key(name)): pk for pk, cat, name in Feature.objects.values_list('id', 'category_id', 'name')}
+        self.agents = {}
+        for pk, username, phone in User.objects.filter(is_agent=True).values_list('id', 'username', 'phone_normalized'):
+            self.agents[_key(username)] = pk
+            if phone: self.agents[phone] = pk
+
+    @staticmethod
+    def _get(mapping, key, label, value):
+        try:
+            return mapping[key]
+        except KeyError:
+            raise RowError(f"{label} غير موجود: {value}")
+
+    def resolve(self, row):
+        gov = self._get(self.governorates, _key(row.get('governorate', '')), 'المحافظة', row.get('governorate'))
+        city = self._get(self.cities, (gov, _key(row.get('city', ''))), 'المدينة', row.get('city'))
+        zone = self._get(self.zones, (city, _key(row.get('major_zone', ''))), 'المنطقة', row.get('major_zone'))
+        sub = None
+        if row.get('subdivision'):
+            sub = self._get(self.subdivisions, (zone, _key(row['subdivision'])), 'التقسيم', row['subdivision'])
+        category = self._get(self.categories, _key(row.get('category', '')), 'نوع العقار', row.get('category'))
+        resolved = {
+            'governorate_id': gov, 'city_id': city, 'major_zone_id': zone,
+            'subdivision_id': sub, 'category_id': category,
+        }
+        if row.get('agent'):
+            key = _key(row['agent'])
+            if key not in self.agents:
+                key = normalize_phone(row['agent']) or key  # رقم الموظف بأي صيغة
+            resolved['agent_id'] = self._get(self.agents, key, 'الموظف', row['agent'])
+        return resolved
+
+# --- 3. تحويل السطر لعقار ---
+def _decimal(value, label):
+    try:
+        return Decimal(str(value).replace(',', '').strip())
+    except InvalidOperation:
+        raise RowError(f"{label} لازم يكون رقم: {value}")
+
+def _int(value, label):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise RowError(f"{label} لازم يكون رقم صحيح: {value}")
+
+def _images(row):
+    images = row.get('images') or []
+    if isinstance(images, str):
+        images = [url.strip() for url in images.split('|')]
+    return [url for url in images if url]
+
+def _features(row):
+    features = row.get('features') or {}
+    if isinstance(features, str):
+        try: features = json.loads(features)
+        except ValueError: raise RowError("عمود features لازم يكون JSON")
+    if not isinstance(features, dict):
+        raise RowError("المميزات لازم تكون {اسم الميزة: قيمة}")
+    features = dict(features)
+    for column, value in row.items():
+        if column and column.startswith('feature:'):
+            features[column.split(':', 1)[1]] = value
+    return {name: value for name, value in features.items() if value not in (None, '', False)}
+
+def build_listing(row, lookups, defaults=None):
+    """بترجع (عقار غير محفوظ، روابط الصور، {feature_id: value}) أو RowError"""
+    fields = dict(defaults or {})
+    fields.update(lookups.resolve(row))
+    for name in ('title', 'description'):
+        if not str(row.get(name) or '').strip():
+            raise RowError(f"الحقل {name} مطلوب")
+        fields[name] = str(row[name]).strip()
+    fields['price'] = _decimal(row.get('price', ''), 'السعر')
+    for name in INT_FIELDS:
+        if row.get(name) not in (None, ''):
+            fields[name] = _int(row[name], name)
+    if 'area_sqm' not in fields:
+        raise RowError("الحقل area_sqm مطلوب")
+    for name in ('latitude', 'longitude'):
+        if row.get(name) not in (None, ''):
+            fields[name] = _decimal(row[name], name)
+    for name in TEXT_FIELDS:
+        if row.get(name) not in (None, ''):
+            fields[name] = str(row[name]).strip()
+    for name, mapping in CHOICES.items():
+        if row.get(name):
+            if _key(row[name]) not in mapping:
+                raise RowError(f"قيمة غير معروفة لـ {name}: {row[name]}")
+            fields[name] = mapping[_key(row[name])]
+    if row.get('is_finance_eligible') not in (None, ''):
+        fields['is_finance_eligible'] = str(row['is_finance_eligible']).strip().lower() in TRUE_VALUES
+
+    features = {}
+    for name, value in _features(row).items():
+        feature_id = lookups.features.get((fields['category_id'], _key(name)))
+        if feature_id is None:
+            raise RowError(f"الميزة '{name}' مش تابعة لنوع العقار")
+        features[feature_id] = str(value).strip()[:255]
+
+    listing = Listing(**fields)
+    images = _images(row)
+    if images:
+        listing.thumbnail = images[0]
+    try:
+        # الـ FKs اتأكدنا منها من الكاش، فمش محتاجين استعلام لكل سطر
+        listing.clean_fields(exclude=['slug', 'reference_code', 'governorate', 'city', 'major_zone', 'subdivision', 'category', 'agent', 'created_by', 'thumbnail'])
+    except ValidationError as e:
+        raise RowError('; '.join(f"{field}: {' '.join(msgs)}" for field, msgs in e.message_dict.items()))
+    listing.slug = slugify(listing.title, allow_unicode=True) + f"-{listing.reference_code}"
+    listing.normalize_phone_fields()  # bulk_create مش بتنادي save
+    return listing, images, features
+
+# --- 4. الحفظ على دفعات ---
+class ImportResult:
+    def __init__(self):
+        self.total = self.created = self.failed = 0
+        self.errors = []  # (رقم السطر، الرسالة) - بحد أقصى MAX_STORED_ERRORS
+        self.started = time.monotonic()
+
+    def add_error(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < MAX_STORED_ERRORS:
+            self.errors.append((line_no, message))
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        return round(self.total / self.elapsed, 1) if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'total': self.total, 'created': self.created, 'failed': self.failed,
+            'elapsed_seconds': round(self.elapsed, 2), 'rows_per_second': self.rows_per_second,
+            'errors': [{'line': line, 'error': msg} for line, msg in self.errors],
+        }
+
+def _flush(batch, queue_metadata=True):
+    with transaction.atomic():
+        listings = Listing.objects.bulk_create([listing for listing, _, _ in batch])
+        images, features = [], []
+        for listing, urls, values in batch:
+            images.extend(ListingImage(listing=listing, image=url, order=order) for order, url in enumerate(urls))
+            features.extend(ListingFeature(listing=listing, feature_id=fid, value=value) for fid, value in values.items())
+        created_images = ListingImage.objects.bulk_create(images)
+        ListingFeature.objects.bulk_create(features)
+        if queue_metadata:
+            queue_image_metadata(ListingImage, [img.pk for img in created_images])
+    return len(listings)
+
+def import_listings(fileobj, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, defaults=None, on_chunk=None, queue_metadata=True):
+    """
+    defaults: قيم ثابتة لكل العقارات (مثلاً {'agent_id': 5, 'status': 'Pending'})
+    on_chunk: callback بعد كل دفعة (للتقدم في الأمر)
+    queue_metadata: حساب الـ Placeholder للصور في الخلفية (الأمر بيسيبها لـ backfill_image_metadata)
+    """
+    lookups = LookupCache()
+    result = ImportResult()
+    batch = []
+    for line_no, row in iter_rows(fileobj, fmt):
+        result.total += 1
+        try:
+            if isinstance(row, RowError): raise row
+            batch.append(build_listing(row, lookups, defaults))
+        except RowError as e:
+            result.add_error(line_no, str(e))
+        if len(batch) >= chunk_size:
+            result.created += len(batch) if dry_run else _flush(batch, queue_metadata)
+            batch = []
+            if on_chunk: on_chunk(result)
+    if batch:
+        result.created += len(batch) if dry_run else _flush(batch, queue_metadata)
+        if on_chunk: on_chunk(result)
+
+    if result.created and not dry_run:
+        bump_version_on_commit('listings')
+        enqueue_purge('listings')
+    return result
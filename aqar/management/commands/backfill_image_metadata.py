@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from aqar.models import ListingImage, PromotionImage
+from aqar.placeholders import process_image_metadata, Image
+
+MODELS = {'listing': ListingImage, 'promotion': PromotionImage}
+
+class Command(BaseCommand):
+    help = "حساب الأبعاد والـ Placeholder (BlurHash) للصور القديمة اللي ملهاش بيانات"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['all', *MODELS], default='all')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=None, help="أقصى عدد صور في التشغيلة دي")
+        parser.add_argument('--force', action='store_true', help="إعادة الحساب حتى للصور اللي ليها بيانات")
+
+    def handle(self, *args, **options):
+        if Image is None:
+            self.stderr.write("❌ مكتبة Pillow مش متسطبة")
+            return
+        models = MODELS.values() if options['model'] == 'all' else [MODELS[options['model']]]
+        for model in models:
+            qs = model.objects.exclude(image='')
+            if not options['force']:
+                qs = qs.filter(placeholder='')
+            ids = list(qs.order_by('pk').values_list('pk', flat=True)[:options['limit']])
+            started = time.monotonic()
+            done = 0
+            for start in range(0, len(ids), options['batch_size']):
+                chunk = ids[start:start + options['batch_size']]
+                done += process_image_metadata(model._meta.label, chunk, batch_size=options['batch_size'])
+                self.stdout.write(f"  {model.__name__}: {min(start + len(chunk), len(ids))}/{len(ids)}")
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {model.__name__}: {done} من {len(ids)} صورة في {time.monotonic() - started:.1f} ثانية"
+            ))
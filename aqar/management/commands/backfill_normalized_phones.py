@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from aqar.models import Listing, Promotion
+from aqar_core.models import User
+from aqar_core.phones import normalize_phone
+
+MODELS = {'user': User, 'listing': Listing, 'promotion': Promotion}
+
+class Command(BaseCommand):
+    help = "حساب الأرقام الموحدة (E.164) للمستخدمين والعقارات والإعلانات القديمة"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['all', *MODELS], default='all')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        models = MODELS.values() if options['model'] == 'all' else [MODELS[options['model']]]
+        for model in models:
+            started = time.monotonic()
+            fields = model.PHONE_FIELDS
+            rows = model.objects.order_by('pk').values_list('pk', *fields.keys(), *fields.values())
+            changed, batch, total = 0, [], 0
+            for row in rows.iterator(chunk_size=options['batch_size']):
+                total += 1
+                pk, values = row[0], row[1:]
+                sources, targets = values[:len(fields)], values[len(fields):]
+                normalized = [normalize_phone(value) for value in sources]
+                if list(targets) != normalized:
+                    obj = model(pk=pk)
+                    for target, value in zip(fields.values(), normalized):
+                        setattr(obj, target, value)
+                    batch.append(obj)
+                if len(batch) >= options['batch_size']:
+                    changed += self._flush(model, batch)
+                    batch = []
+            changed += self._flush(model, batch)
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {model.__name__}: {changed} من {total} اتحدث في {time.monotonic() - started:.1f} ثانية"
+            ))
+
+        # 🔍 مستخدمين بنفس الرقم بصيغ مختلفة (محتاجين دمج يدوي)
+        duplicates = (
+            User.objects.exclude(phone_normalized='').values('phone_normalized')
+            .annotate(total=Count('id')).filter(total__gt=1).order_by('-total')
+        )
+        for row in duplicates[:50]:
+            usernames = list(User.objects.filter(phone_normalized=row['phone_normalized']).values_list('username', flat=True))
+            self.stderr.write(f"  ⚠️ {row['phone_normalized']}: {', '.join(usernames)}")
+
+    def _flush(self, model, batch):
+        if batch:
+            model.objects.bulk_update(batch, list(model.PHONE_FIELDS.values()))
+        return len(batch)
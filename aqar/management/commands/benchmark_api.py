@@ -0,0 +1,216 @@
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+from aqar.models import Listing, City
+from aqar_core.models import User
+
+# ==========================================
+# قياس أداء الـ API (زمن الاستجابة + عدد الطلبات في الثانية)
+# ==========================================
+# البيانات: python manage.py seed_benchmark_data
+# الوضع الافتراضي: Django test client جوه نفس البروسيس (من غير شبكة)
+# --base-url http://127.0.0.1:8000: سيرفر شغال فعلاً (gunicorn مثلاً) مع --concurrency
+# النتيجة JSON (--output) وممكن تتقارن بنتيجة commit تاني بـ --compare
+
+# مسارات الـ Client (نفس البادئات الافتراضية للـ HTTP)
+urlpatterns = [
+    path('api/core/', include('aqar_core.urls')),
+    path('api/', include('aqar.urls')),
+]
+
+SEARCH_WORDS = ['شقة', 'فيلا', 'لقطة', 'للبيع', 'استلام فوري', 'بالتقسيط']
+SCENARIOS = ('list', 'search', 'detail', 'track', 'notifications')
+
+class Command(BaseCommand):
+    help = "قياس p50/p95/p99 وعدد الطلبات في الثانية لأهم مسارات الـ API (قائمة / بحث / تفاصيل / تتبع / إشعارات)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="عدد الطلبات لكل سيناريو")
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, help="الافتراضي: كلهم")
+        parser.add_argument('--base-url', default=None, help="سيرفر شغال بدل الـ test client")
+        parser.add_argument('--api-prefix', default='/api/')
+        parser.add_argument('--core-prefix', default='/api/core/')
+        parser.add_argument('--concurrency', type=int, default=1, help="مع --base-url بس")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None, help="حفظ النتيجة JSON في ملف")
+        parser.add_argument('--compare', default=None, metavar='BASELINE.json', help="مقارنة بنتيجة قديمة")
+        parser.add_argument('--json', action='store_true', help="طباعة النتيجة كـ JSON")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.listing_ids = list(Listing.objects.filter(slug__startswith='bench-', status='Available').values_list('id', flat=True)[:5000])
+        self.city_ids = list(City.objects.values_list('id', flat=True))
+        users = list(User.objects.filter(username__startswith='bench_').values_list('id', flat=True)[:200])
+        if not self.listing_ids or not users:
+            raise CommandError("مفيش بيانات تجريبية، شغل seed_benchmark_data الأول")
+        self.tokens = [Token.objects.get_or_create(user_id=user_id)[0].key for user_id in users]
+
+        if options['base_url'] and options['concurrency'] > 1:
+            self.stderr.write(f"⏳ {options['concurrency']} طلبات متوازية على {options['base_url']}")
+
+        results = {}
+        for name in options['scenario'] or SCENARIOS:
+            results[name] = self._run(name)
+        report = {'meta': self._meta(), 'scenarios': results}
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            self._print(results)
+        if options['compare']:
+            self._compare(results, options['compare'])
+
+    # --- السيناريوهات: كل واحد بيرجع (method, path, data, token) ---
+    def _list(self):
+        return 'get', f"{self.options['api_prefix']}listings/", None, None
+
+    def _search(self):
+        params = f"search={self.rng.choice(SEARCH_WORDS)}&city={self.rng.choice(self.city_ids)}&ordering=-price"
+        return 'get', f"{self.options['api_prefix']}listings/?{params}", None, None
+
+    def _detail(self):
+        return 'get', f"{self.options['api_prefix']}listings/{self.rng.choice(self.listing_ids)}/", None, None
+
+    def _track(self):
+        data = {'event_type': 'VIEW', 'target_type': 'listing', 'target_id': self.rng.choice(self.listing_ids)}
+        return 'post', f"{self.options['api_prefix']}analytics/track/", data, None
+
+    def _notifications(self):
+        return 'get', f"{self.options['core_prefix']}notifications/", None, self.rng.choice(self.tokens)
+
+    def _run(self, name):
+        build = getattr(self, f'_{name}')
+        # الطلبات بتتولد مقدماً عشان الـ rng ميتأثرش بترتيب الـ Threads
+        warmup = [build() for _ in range(self.options['warmup'])]
+        calls = [build() for _ in range(self.options['requests'])]
+        if self.options['base_url']:
+            return self._run_http(warmup, calls)
+        with override_settings(ROOT_URLCONF=__name__):
+            return self._run_client(warmup, calls)
+
+    def _run_client(self, warmup, calls):
+        client = Client()
+        def send(call):
+            method, url, data, token = call
+            extra = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+            response = getattr(client, method)(url, data, content_type='application/json', **extra) if data \
+                else getattr(client, method)(url, **extra)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            return response.status_code
+        for call in warmup:
+            send(call)
+        started = time.perf_counter()
+        samples, errors = self._timed(send, calls)
+        return self._summary(samples, errors, time.perf_counter() - started)
+
+    def _run_http(self, warmup, calls):
+        import requests
+
+        base_url = self.options['base_url'].rstrip('/')
+        local = threading.local()
+        def send(call):
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+            method, url, data, token = call
+            headers = {'Authorization': f'Token {token}'} if token else {}
+            return session.request(method.upper(), base_url + url, json=data, headers=headers, timeout=30).status_code
+        for call in warmup:
+            send(call)
+
+        concurrency = max(self.options['concurrency'], 1)
+        chunks = [calls[i::concurrency] for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            parts = list(pool.map(lambda chunk: self._timed(send, chunk), chunks))
+        elapsed = time.perf_counter() - started
+        samples = [s for part, _ in parts for s in part]
+        return self._summary(samples, sum(errors for _, errors in parts), elapsed)
+
+    def _timed(self, send, calls):
+        samples, errors = [], 0
+        for call in calls:
+            start = time.perf_counter()
+            try:
+                status = send(call)
+            except Exception:
+                status = None
+            samples.append((time.perf_counter() - start) * 1000)
+            if status is None or status >= 400:
+                errors += 1
+        return samples, errors
+
+    def _summary(self, samples, errors, elapsed):
+        samples.sort()
+        percentile = lambda p: round(samples[max(int(len(samples) * p) - 1, 0)], 2)
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'p50_ms': round(statistics.median(samples), 2),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'mean_ms': round(statistics.fmean(samples), 2),
+            'throughput_rps': round(len(samples) / elapsed, 1),
+        }
+
+    def _meta(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, timeout=5,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            'commit': commit,
+            'mode': 'http' if self.options['base_url'] else 'client',
+            'base_url': self.options['base_url'],
+            'concurrency': self.options['concurrency'] if self.options['base_url'] else 1,
+            'requests_per_scenario': self.options['requests'],
+            'seed': self.options['seed'],
+            'listings': Listing.objects.count(),
+            'users': User.objects.count(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+
+    def _print(self, results):
+        self.stdout.write(f"{'scenario':<16}{'p50':>9}{'p95':>9}{'p99':>9}{'mean':>9}{'rps':>9}{'errors':>8}  (ms)")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<16}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['mean_ms']:>9}"
+                f"{r['throughput_rps']:>9}{r['errors']:>8}"
+            )
+
+    def _compare(self, results, baseline_path):
+        try:
+            with open(baseline_path, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"مش قادر أقرا {baseline_path}: {e}")
+        base = baseline.get('scenarios', {})
+        self.stdout.write(f"\nمقارنة بـ {baseline.get('meta', {}).get('commit') or baseline_path} (السالب = أسرع)")
+        for name, r in results.items():
+            if name not in base:
+                continue
+            deltas = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+                old = base[name].get(key)
+                if old:
+                    deltas.append(f"{key.split('_')[0]} {(r[key] - old) / old * 100:+.1f}%")
+            self.stdout.write(f"{name:<16}" + '  '.join(deltas))
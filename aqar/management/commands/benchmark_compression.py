@@ -0,0 +1,103 @@
+import json
+import statistics
+import time
+import zlib
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from aqar.models import Listing, Promotion
+from aqar.serializers import ListingSerializer, PromotionSerializer, prefetch_listings
+from aqar_core.compression import brotli
+from aqar_core.renderers import FastJSONRenderer, MessagePackRenderer
+
+class Command(BaseCommand):
+    help = "مقارنة الضغط (gzip / brotli بمستويات مختلفة): وقت المعالج قدام البايتات اللي بتتوفر على الشبكة"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--gzip-levels', default='1,5,6,9')
+        parser.add_argument('--brotli-levels', default='1,4,5,8')
+        parser.add_argument('--bandwidth', default='1.5,10,50', help="سرعات الشبكة بالـ Mbps لحساب الوقت الكلي")
+        parser.add_argument('--json', action='store_true', help="طباعة النتيجة كـ JSON")
+
+    def handle(self, *args, **options):
+        bandwidths = [float(value) for value in options['bandwidth'].split(',')]
+        codecs = {'identity': (lambda body: body, lambda body: body)}
+        for level in map(int, options['gzip_levels'].split(',')):
+            codecs[f'gzip-{level}'] = (
+                lambda body, level=level: self._gzip(body, level), lambda body: zlib.decompress(body, 16 + zlib.MAX_WBITS),
+            )
+        if brotli is not None:
+            for quality in map(int, options['brotli_levels'].split(',')):
+                codecs[f'br-{quality}'] = (
+                    lambda body, quality=quality: brotli.compress(body, mode=brotli.MODE_TEXT, quality=quality),
+                    brotli.decompress,
+                )
+        else:
+            self.stderr.write("⚠️ brotli مش متسطب، هنقيس gzip بس")
+
+        results = {}
+        for payload, body in self._payloads().items():
+            results[payload] = {}
+            for name, (compress, decompress) in codecs.items():
+                compressed = compress(body)
+                compress_ms = self._measure(lambda: compress(body), options['iterations'])
+                results[payload][name] = {
+                    'bytes': len(compressed),
+                    'ratio': round(len(compressed) / len(body), 4),
+                    'compress_ms': compress_ms,
+                    'decompress_ms': self._measure(lambda: decompress(compressed), options['iterations']),
+                    # وقت المعالج + وقت النقل (من غير latency) لكل سرعة شبكة
+                    'total_ms': {
+                        f'{mbps}mbps': round(compress_ms + len(compressed) * 8 / (mbps * 1000), 2) for mbps in bandwidths
+                    },
+                }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        speeds = [f'{mbps}mbps' for mbps in bandwidths]
+        for payload, rows in results.items():
+            self.stdout.write(f"\n{payload} ({rows['identity']['bytes']} bytes)")
+            self.stdout.write(
+                f"{'codec':<12}{'bytes':>10}{'ratio':>8}{'comp ms':>10}{'decomp ms':>11}"
+                + ''.join(f'{speed:>12}' for speed in speeds)
+            )
+            for name, r in rows.items():
+                self.stdout.write(
+                    f"{name:<12}{r['bytes']:>10}{r['ratio']:>8}{r['compress_ms']:>10}{r['decompress_ms']:>11}"
+                    + ''.join(f"{r['total_ms'][speed]:>12}" for speed in speeds)
+                )
+
+    def _payloads(self):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = AnonymousUser()
+        context = {'request': request}
+        listings = list(prefetch_listings(Listing.objects.filter(status='Available'))[:100])
+        if not listings:
+            raise CommandError("مفيش عقارات، شغل seed_benchmark_data الأول")
+        page = ListingSerializer(listings, many=True, context=context).data
+        payloads = {
+            'listings_page_json': FastJSONRenderer().render(page),
+            'listings_page_msgpack': MessagePackRenderer().render(page),
+            'listing_detail_json': FastJSONRenderer().render(page[0]),
+        }
+        promotions = Promotion.objects.prefetch_related('gallery', 'units')[:30]
+        if promotions:
+            payloads['promotions_json'] = FastJSONRenderer().render(PromotionSerializer(promotions, many=True, context=context).data)
+        return payloads
+
+    @staticmethod
+    def _gzip(body, level):
+        zobj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return zobj.compress(body) + zobj.flush()
+
+    def _measure(self, fn, iterations):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(samples), 3)
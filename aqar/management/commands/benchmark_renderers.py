@@ -0,0 +1,79 @@
+import gzip
+import json
+import statistics
+import time
+from itertools import cycle, islice
+
+import msgpack
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from aqar.models import Listing
+from aqar.serializers import ListingSerializer, prefetch_listings
+from aqar_core.renderers import FastJSONRenderer, MessagePackRenderer, orjson
+
+class Command(BaseCommand):
+    help = "مقارنة زمن الـ Render وحجم الرد لصفحة عقارات (JSON بتاع DRF / orjson / MessagePack)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=100, help="عدد العقارات في الصفحة")
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--json', action='store_true', help="طباعة النتيجة كـ JSON")
+
+    def handle(self, *args, **options):
+        data = self._page(options['listings'])
+        decode_json = orjson.loads if orjson is not None else json.loads
+        renderers = {
+            'drf_json': (JSONRenderer(), json.loads),
+            'orjson': (FastJSONRenderer(), decode_json),
+            'msgpack': (MessagePackRenderer(), lambda body: msgpack.unpackb(body, raw=False)),
+        }
+        if orjson is None:
+            self.stderr.write("⚠️ orjson مش متسطب، FastJSONRenderer هيرجع لـ JSONRenderer العادي")
+
+        results = {}
+        for name, (renderer, decode) in renderers.items():
+            body = renderer.render(data)
+            results[name] = {
+                'bytes': len(body),
+                'gzip_bytes': len(gzip.compress(body, 6)),
+                'render_us': self._measure(lambda: renderer.render(data), options['iterations']),
+                'parse_us': self._measure(lambda: decode(body), options['iterations']),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{len(data)} عقار")
+        self.stdout.write(f"{'renderer':<12}{'bytes':>10}{'gzip':>10}{'render p50':>12}{'p99':>10}{'parse p50':>12}  (µs)")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<12}{r['bytes']:>10}{r['gzip_bytes']:>10}{r['render_us']['p50']:>12}"
+                f"{r['render_us']['p99']:>10}{r['parse_us']['p50']:>12}"
+            )
+
+    def _page(self, size):
+        # نفس اللي بيرجعه ListingViewSet.list لزائر (من غير استعلامات جوه القياس)
+        request = Request(APIRequestFactory().get('/listings/'))
+        request.user = AnonymousUser()
+        listings = list(prefetch_listings(Listing.objects.filter(status='Available'))[:size])
+        if not listings:
+            raise CommandError("مفيش عقارات، شغل seed_benchmark_data الأول")
+        # لو العقارات أقل من المطلوب بنكرر نفس البيانات لحد ما الصفحة تكمل
+        data = ListingSerializer(listings, many=True, context={'request': request}).data
+        return list(islice(cycle(data), size))
+
+    def _measure(self, fn, iterations):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1_000_000)
+        samples.sort()
+        return {
+            'p50': round(statistics.median(samples), 1),
+            'p99': round(samples[int(len(samples) * 0.99) - 1], 1),
+            'mean': round(statistics.fmean(samples), 1),
+        }
@@ -0,0 +1,44 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from aqar.exporters import EXPORTERS, FORMATS, iter_chunks, export_filename
+
+class Command(BaseCommand):
+    help = "تصدير العقارات / التحليلات / المستخدمين لملف CSV أو NDJSON (Stream من غير تحميل كل البيانات في الذاكرة)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(EXPORTERS))
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--output', default=None, help="مسار الملف (الافتراضي: اسم تلقائي / - للـ stdout)")
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--filter', action='append', default=[], metavar='KEY=VALUE', help="نفس فلاتر الـ API، مثلاً --filter status=Available")
+
+    def handle(self, *args, **options):
+        params = {}
+        for item in options['filter']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"الفلتر لازم يكون KEY=VALUE: {item}")
+            params[key] = value
+
+        exporter = EXPORTERS[options['dataset']](params)
+        if exporter.errors:
+            errors = '; '.join(f"{field}: {' '.join(messages)}" for field, messages in exporter.errors.items())
+            raise CommandError(f"فلاتر غير صالحة - {errors}")
+        chunks = iter_chunks(exporter, options['format'], options['gzip'])
+        output = options['output'] or export_filename(options['dataset'], options['format'], options['gzip'])
+
+        started, written = time.monotonic(), 0
+        if output == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(output, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {output} ({written / 1024:.1f} KB) في {time.monotonic() - started:.1f} ثانية"
+        ))
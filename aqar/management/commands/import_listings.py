@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from aqar.importers import import_listings, detect_format, DEFAULT_CHUNK_SIZE
+from aqar.models import User
+
+class Command(BaseCommand):
+    help = "استيراد عقارات بالجملة من ملف CSV أو NDJSON (سطر بسطر من غير ما الملف كله يتحمل في الذاكرة)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None, help="الافتراضي: حسب امتداد الملف")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--agent', default=None, help="username الموظف الافتراضي للعقارات")
+        parser.add_argument('--status', default=None, choices=['Pending', 'Available', 'Sold'])
+        parser.add_argument('--dry-run', action='store_true', help="التحقق من الملف بس من غير حفظ")
+
+    def handle(self, *args, **options):
+        defaults = {}
+        if options['agent']:
+            agent = User.objects.filter(username=options['agent']).values_list('id', flat=True).first()
+            if agent is None:
+                raise CommandError(f"الموظف غير موجود: {options['agent']}")
+            defaults['agent_id'] = agent
+        if options['status']:
+            defaults['status'] = options['status']
+
+        def progress(result):
+            self.stdout.write(f"  ⏳ {result.total} سطر ({result.created} تمام / {result.failed} خطأ) - {result.rows_per_second} سطر/ث")
+
+        fmt = options['format'] or detect_format(options['path'])
+        with open(options['path'], 'rb') as f:
+            result = import_listings(
+                f, fmt=fmt, chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+                defaults=defaults, on_chunk=progress, queue_metadata=False,
+            )
+
+        for line_no, message in result.errors:
+            self.stderr.write(f"  ❌ سطر {line_no}: {message}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"  ... و {result.failed - len(result.errors)} خطأ كمان")
+        verb = "صالح للاستيراد" if options['dry_run'] else "اتضاف"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result.created} عقار {verb} من {result.total} سطر "
+            f"في {result.elapsed:.1f} ثانية ({result.rows_per_second} سطر/ث)"
+        ))
+        if result.created and not options['dry_run']:
+            self.stdout.write("💡 شغل backfill_image_metadata عشان تتحسب أبعاد الصور والـ Placeholder")
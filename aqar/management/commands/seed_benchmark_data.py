@@ -0,0 +1,289 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from aqar.models import (
+    Governorate, City, MajorZone, Subdivision, Category, Feature,
+    Listing, ListingImage, ListingFeature, Favorite, Promotion, PromotionUnit, AnalyticsLog,
+)
+from aqar_core.caching import bump_version
+from aqar_core.models import User, Notification
+from aqar_core.phones import normalize_phone
+
+# ==========================================
+# بيانات تجريبية بحجم الإنتاج (للـ benchmark_api)
+# ==========================================
+# كل حاجة بـ bulk_create على دفعات، والبيانات المولدة معلمة بـ bench_ (المستخدمين) و bench- (العقارات)
+# عشان --clear يمسحها من غير ما يلمس البيانات الحقيقية. الجغرافيا والتصنيفات بتتعمل get_or_create.
+
+GEOGRAPHY = {
+    'القاهرة': {
+        'القاهرة الجديدة': ['التجمع الخامس', 'التجمع الأول', 'الرحاب', 'مدينتي', 'بيت الوطن'],
+        'مدينة نصر': ['الحي السابع', 'الحي الثامن', 'الحي العاشر', 'مكرم عبيد'],
+        'المعادي': ['دجلة', 'زهراء المعادي', 'المعادي الجديدة'],
+        'مصر الجديدة': ['الكوربة', 'روكسي', 'شيراتون'],
+    },
+    'الجيزة': {
+        'الشيخ زايد': ['الحي الأول', 'الحي الثامن', 'بيفرلي هيلز'],
+        'السادس من أكتوبر': ['الحي المتميز', 'الحصري', 'حدائق أكتوبر', 'الحي الحادي عشر'],
+        'الدقي': ['ميدان المساحة', 'شارع التحرير'],
+        'الهرم': ['المريوطية', 'فيصل'],
+    },
+    'الإسكندرية': {
+        'سموحة': ['فيكتور عمانويل', 'النادي'],
+        'سيدي بشر': ['بحري', 'قبلي'],
+        'العجمي': ['البيطاش', 'الهانوفيل'],
+    },
+    'القليوبية': {
+        'العبور': ['الحي الأول', 'الحي الخامس'],
+        'بنها': ['الفلل', 'كفر الجزار'],
+    },
+    'البحر الأحمر': {
+        'الغردقة': ['الأحياء', 'الممشى السياحي', 'الجونة'],
+    },
+    'مطروح': {
+        'الساحل الشمالي': ['سيدي عبد الرحمن', 'العلمين الجديدة', 'رأس الحكمة'],
+    },
+}
+SUBDIVISIONS_PER_ZONE = 4
+
+CATEGORIES = {
+    'شقة': [('التشطيب', 'text'), ('عدد الغرف', 'number'), ('أسانسير', 'bool'), ('جراج', 'bool'), ('الدور', 'number')],
+    'فيلا': [('حمام سباحة', 'bool'), ('حديقة (م²)', 'number'), ('عدد الأدوار', 'number'), ('التشطيب', 'text')],
+    'دوبلكس': [('روف', 'bool'), ('عدد الغرف', 'number'), ('التشطيب', 'text')],
+    'أرض': [('رخصة حفر', 'bool'), ('نوع الأرض', 'text'), ('الواجهة (م)', 'number')],
+    'محل تجاري': [('الواجهة (م)', 'number'), ('نشاط مسموح', 'text'), ('ميزانين', 'bool')],
+    'مكتب إداري': [('عدد الغرف', 'number'), ('أسانسير', 'bool'), ('تكييف مركزي', 'bool')],
+}
+TEXT_VALUES = ['سوبر لوكس', 'نص تشطيب', 'على الطوب', 'ألترا سوبر لوكس', 'مباني', 'زراعي', 'إداري']
+TITLE_WORDS = ['للبيع', 'لقطة', 'بمقدم بسيط', 'استلام فوري', 'بالتقسيط', 'فيو مفتوح', 'على الرئيسي', 'قريب من الخدمات']
+EVENT_TYPES = [event for event, _ in AnalyticsLog.EVENT_TYPES]
+
+@contextmanager
+def manual_timestamps(*models):
+    """bulk_create بيكتب الوقت الحالي في auto_now_add، فبنوقفه مؤقتاً عشان التواريخ تبقى موزعة زي الواقع"""
+    fields = [f for model in models for f in model._meta.concrete_fields if getattr(f, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+class Command(BaseCommand):
+    help = "توليد بيانات تجريبية بحجم الإنتاج (جغرافيا، تصنيفات، عقارات، صور، مفضلة، تحليلات، مستخدمين بتوكن)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=10_000)
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--analytics', type=int, default=1_000_000, help="عدد صفوف AnalyticsLog")
+        parser.add_argument('--images-per-listing', type=int, default=4)
+        parser.add_argument('--favorites-per-user', type=int, default=10)
+        parser.add_argument('--notifications-per-user', type=int, default=20)
+        parser.add_argument('--promotions', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42, help="نفس الرقم = نفس البيانات (للمقارنة بين الـ commits)")
+        parser.add_argument('--clear', action='store_true', help="مسح البيانات التجريبية القديمة الأول")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+
+        if options['clear']:
+            self._clear()
+        zones = self._step('الجغرافيا', self._seed_geography)
+        categories = self._step('التصنيفات والمميزات', self._seed_categories)
+        users = self._step('المستخدمين والتوكنات', lambda: self._seed_users(options['users'], options['notifications_per_user']))
+        with manual_timestamps(Listing, AnalyticsLog):
+            listings = self._step('العقارات', lambda: self._seed_listings(options['listings'], zones, categories, users, options['images_per_listing']))
+            self._step('المفضلة', lambda: self._seed_favorites(users, listings, options['favorites_per_user']))
+            self._step('العروض', lambda: self._seed_promotions(options['promotions'], listings))
+            self._step('التحليلات', lambda: self._seed_analytics(options['analytics'], listings, users))
+
+        # الكاش القديم (الفيد، الـ Bootstrap، ردود الزوار) مبقاش صح
+        bump_version('listings', 'geo', 'categories', 'promotions')
+        self.stdout.write(self.style.SUCCESS(f"✅ خلصنا في {time.monotonic() - started:.1f} ثانية"))
+
+    def _step(self, label, func):
+        started = time.monotonic()
+        result = func()
+        count = len(result) if hasattr(result, '__len__') else result
+        self.stdout.write(f"  {label}: {count} في {time.monotonic() - started:.1f} ثانية")
+        return result
+
+    def _bulk(self, model, objects):
+        """bulk_create على دفعات من generator (من غير ما نحمل الملايين في الذاكرة مرة واحدة)"""
+        created, batch = [], []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                created.extend(model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created.extend(model.objects.bulk_create(batch))
+        return created
+
+    def _clear(self):
+        with transaction.atomic():
+            # العقارات بتمسح صورها ومميزاتها ومفضلتها وتحليلاتها ووحدات العروض (CASCADE)
+            Promotion.objects.filter(slug__startswith='bench-').delete()
+            Listing.objects.filter(slug__startswith='bench-').delete()
+            User.objects.filter(username__startswith='bench_').delete()
+        self.stdout.write("  🧹 اتمسحت البيانات التجريبية القديمة")
+
+    # --- 1. الجغرافيا والتصنيفات ---
+    def _seed_geography(self):
+        zones = []
+        for gov_name, cities in GEOGRAPHY.items():
+            governorate, _ = Governorate.objects.get_or_create(name=gov_name)
+            for city_name, zone_names in cities.items():
+                city, _ = City.objects.get_or_create(name=city_name, defaults={'governorate': governorate})
+                for zone_name in zone_names:
+                    zone, created = MajorZone.objects.get_or_create(name=zone_name, city=city)
+                    if created:
+                        Subdivision.objects.bulk_create([
+                            Subdivision(name=f'مجاورة {n}', major_zone=zone) for n in range(1, SUBDIVISIONS_PER_ZONE + 1)
+                        ])
+                    zones.append((zone, list(zone.subdivisions.all())))
+        return zones
+
+    def _seed_categories(self):
+        categories = []
+        for index, (name, features) in enumerate(CATEGORIES.items()):
+            category, _ = Category.objects.get_or_create(name=name, defaults={'slug': f'bench-category-{index}'})
+            for feature_name, input_type in features:
+                Feature.objects.get_or_create(
+                    category=category, name=feature_name,
+                    defaults={'input_type': input_type, 'is_quick_filter': input_type == 'bool'},
+                )
+            categories.append((category, list(category.allowed_features.all())))
+        return categories
+
+    # --- 2. المستخدمين (كلمة سر واحدة متشفرة مرة واحدة بس) ---
+    def _seed_users(self, count, notifications_per_user):
+        password = make_password('benchmark')
+        start = User.objects.filter(username__startswith='bench_').count()
+        users = self._bulk(User, (
+            User(
+                username=f'bench_{i}', password=password, first_name='مستخدم', last_name=str(i),
+                phone_number=f'010{i:08d}', phone_normalized=normalize_phone(f'010{i:08d}'),
+                is_agent=i % 10 == 0, client_type=self.rng.choice(User.CLIENT_TYPES)[0],
+            )
+            for i in range(start, start + count)
+        ))
+        self._bulk(Token, (Token(user=user, key=Token.generate_key()) for user in users))
+        self._bulk(Notification, (
+            Notification(user=user, title=f'إشعار {n}', message='عقار جديد في منطقتك', is_read=self.rng.random() < 0.6)
+            for user in users for n in range(notifications_per_user)
+        ))
+        return list(User.objects.filter(username__startswith='bench_').only('id', 'phone_number', 'first_name', 'last_name', 'is_agent'))
+
+    # --- 3. العقارات (بالصور والمميزات) ---
+    def _seed_listings(self, count, zones, categories, users, images_per_listing):
+        agents = [user for user in users if user.is_agent] or users
+        start = Listing.objects.filter(slug__startswith='bench-').count()
+        now = timezone.now()
+
+        def build():
+            for i in range(start, start + count):
+                zone, subdivisions = self.rng.choice(zones)
+                category, _ = self.rng.choice(categories)
+                agent = self.rng.choice(agents)
+                area = self.rng.choice([90, 120, 150, 180, 250, 400, 600])
+                listing = Listing(
+                    title=f'{category.name} {area} م² {self.rng.choice(TITLE_WORDS)} في {zone.name}',
+                    slug=f'bench-{i}', description='عقار تجريبي ' * 20,
+                    price=Decimal(area * self.rng.randint(8_000, 60_000)), area_sqm=area,
+                    bedrooms=self.rng.randint(1, 5), bathrooms=self.rng.randint(1, 4),
+                    governorate_id=zone.city.governorate_id, city_id=zone.city_id, major_zone=zone,
+                    subdivision=self.rng.choice(subdivisions) if subdivisions else None,
+                    category=category, agent=agent, status=self.rng.choices(['Available', 'Pending', 'Sold'], [85, 10, 5])[0],
+                    offer_type=self.rng.choice(['Sale', 'Rent']),
+                    owner_name=f'{agent.first_name} {agent.last_name}', owner_phone=agent.phone_number,
+                    owner_phone_normalized=normalize_phone(agent.phone_number),
+                    thumbnail=f'listings/bench/{i}/0.jpg',
+                    views_count=self.rng.randint(0, 5_000),
+                )
+                listing.created_at = now - timedelta(minutes=i)
+                yield listing
+
+        listings = self._bulk(Listing, build())
+        self._bulk(ListingImage, (
+            ListingImage(listing=listing, image=f'listings/bench/{i}/{n}.jpg', order=n, width=1280, height=960)
+            for i, listing in enumerate(listings, start) for n in range(images_per_listing)
+        ))
+        features_by_category = {category.pk: features for category, features in categories}
+        self._bulk(ListingFeature, (
+            ListingFeature(listing=listing, feature=feature, value=self._feature_value(feature))
+            for listing in listings for feature in features_by_category[listing.category_id]
+            if self.rng.random() < 0.8
+        ))
+        return listings
+
+    def _feature_value(self, feature):
+        if feature.input_type == 'bool':
+            return 'true'
+        if feature.input_type == 'number':
+            return str(self.rng.randint(1, 10))
+        return self.rng.choice(TEXT_VALUES)
+
+    def _seed_favorites(self, users, listings, per_user):
+        per_user = min(per_user, len(listings))
+        return self._bulk(Favorite, (
+            Favorite(user=user, listing=listing) for user in users for listing in self.rng.sample(listings, per_user)
+        ))
+
+    def _seed_promotions(self, count, listings):
+        start = Promotion.objects.filter(slug__startswith='bench-').count()
+        promotions = self._bulk(Promotion, (
+            Promotion(
+                title=f'عرض {i}', slug=f'bench-{i}', cover_image=f'promotions/bench/{i}.jpg',
+                promo_type=self.rng.choice(Promotion.PromoType.values), weight=self.rng.randint(1, 5),
+                target_listing=self.rng.choice(listings) if listings else None, display_order=i,
+            )
+            for i in range(start, start + count)
+        ))
+        self._bulk(PromotionUnit, (
+            PromotionUnit(promotion=promotion, linked_listing=listing)
+            for promotion in promotions for listing in self.rng.sample(listings, min(4, len(listings)))
+        ))
+        return promotions
+
+    # --- 4. التحليلات (الملايين) ---
+    def _seed_analytics(self, count, listings, users):
+        if not listings:
+            return 0
+        listing_ids = [listing.pk for listing in listings]
+        user_ids = [user.pk for user in users] or [None]
+        now = timezone.now()
+
+        window = 90 * 24 * 3600  # آخر 90 يوم
+
+        created, batch = 0, []
+        for i in range(count):
+            batch.append(AnalyticsLog(
+                event_type=self.rng.choice(EVENT_TYPES), listing_id=self.rng.choice(listing_ids),
+                user_id=self.rng.choice(user_ids) if self.rng.random() < 0.3 else None,
+                ip_address=f'41.{self.rng.randint(0, 255)}.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}',
+                created_at=now - timedelta(seconds=self.rng.randint(0, window)),
+            ))
+            if len(batch) >= self.batch_size:
+                # مش بنجمع الصفوف (ملايين) في الذاكرة زي _bulk
+                AnalyticsLog.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+                if created % 100_000 < self.batch_size:
+                    self.stdout.write(f"    ... {created}")
+        if batch:
+            AnalyticsLog.objects.bulk_create(batch)
+            created += len(batch)
+        return created
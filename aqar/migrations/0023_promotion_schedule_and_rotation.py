@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aqar', '0022_listing_youtube_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotion',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, help_text='فارغ = يبدأ فوراً', null=True, verbose_name='يبدأ في'),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, help_text='فارغ = مستمر', null=True, verbose_name='ينتهي في'),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='weight',
+            field=models.PositiveSmallIntegerField(default=1, help_text='كل ما الرقم أكبر، الإعلان يظهر أكتر في السلايدر', verbose_name='وزن الظهور'),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='daily_impression_cap',
+            field=models.PositiveIntegerField(blank=True, help_text='فارغ = بدون حد', null=True, verbose_name='أقصى ظهور يومي'),
+        ),
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(fields=['is_active', 'starts_at', 'ends_at'], name='aqar_promot_is_acti_c97a90_idx'),
+        ),
+    ]
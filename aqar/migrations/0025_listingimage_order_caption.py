@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aqar', '0024_image_dimensions_and_placeholder'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='listingimage',
+            options={'ordering': ['order', 'id']},
+        ),
+        migrations.AddField(
+            model_name='listingimage',
+            name='order',
+            field=models.PositiveIntegerField(default=0, verbose_name='الترتيب'),
+        ),
+        migrations.AddField(
+            model_name='listingimage',
+            name='caption',
+            field=models.CharField(blank=True, default='', max_length=200, verbose_name='وصف الصورة'),
+        ),
+    ]
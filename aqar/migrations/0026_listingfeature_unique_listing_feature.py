@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_features(apps, schema_editor):
+    # قبل القيد: لو في أكتر من قيمة لنفس الميزة في نفس العقار بنسيب الأحدث بس
+    ListingFeature = apps.get_model('aqar', 'ListingFeature')
+    keep_ids = (
+        ListingFeature.objects.values('listing_id', 'feature_id')
+        .annotate(keep=Max('id')).values_list('keep', flat=True)
+    )
+    ListingFeature.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aqar', '0025_listingimage_order_caption'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_features, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='listingfeature',
+            constraint=models.UniqueConstraint(fields=('listing', 'feature'), name='unique_listing_feature'),
+        ),
+    ]
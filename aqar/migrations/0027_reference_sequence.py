@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+def create_reference_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE SEQUENCE IF NOT EXISTS aqar_reference_seq START WITH 1 MINVALUE 0')
+    else:
+        apps.get_model('aqar', 'ReferenceCounter').objects.get_or_create(name='reference')
+
+
+def drop_reference_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP SEQUENCE IF EXISTS aqar_reference_seq')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aqar', '0026_listingfeature_unique_listing_feature'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_reference_sequence, drop_reference_sequence),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations
+
+# Trigram (pg_trgm) لحقول البحث في لوحة التحكم (search_fields)
+# الـ Expression لازم تطابق اللي دجانجو بيولده لـ icontains على Postgres: UPPER("col"::text) LIKE UPPER(%s)
+TRIGRAM_INDEXES = [
+    ('aqar_listing_title_trgm', 'aqar_listing', 'UPPER("title"::text)'),
+    ('aqar_listing_reference_code_trgm', 'aqar_listing', 'UPPER("reference_code"::text)'),
+    ('aqar_listing_owner_phone_trgm', 'aqar_listing', 'UPPER("owner_phone"::text)'),
+    ('aqar_listing_owner_name_trgm', 'aqar_listing', 'UPPER("owner_name"::text)'),
+    ('aqar_promotion_title_trgm', 'aqar_promotion', 'UPPER("title"::text)'),
+    ('aqar_analyticslog_ip_trgm', 'aqar_analyticslog', 'UPPER(HOST("ip_address"))'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, expression in TRIGRAM_INDEXES:
+        # CONCURRENTLY عشان الجداول الكبيرة متتقفلش على الكتابة وقت البناء
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" USING gin ({expression} gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('aqar', '0027_reference_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
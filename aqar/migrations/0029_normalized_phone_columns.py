@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aqar', '0028_admin_search_trigram_indexes'),
+        ('aqar_core', '0015_user_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='owner_phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='whatsapp_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16),
+        ),
+    ]
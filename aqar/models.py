@@ -2,8 +2,11 @@ from django.db import models
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 from smart_selects.db_fields import ChainedForeignKey
-from aqar_core.models import BaseModel
-import random, string
+from aqar_core.models import BaseModel, DirtyFieldsMixin
+from aqar_core.caching import bump_version_on_commit
+from aqar_core.cdn import enqueue_purge
+from aqar_core.phones import NormalizedPhoneMixin, normalize_phone, whatsapp_url
+from .references import allocate_reference
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from cloudinary_storage.storage import VideoMediaCloudinaryStorage
@@ -12,7 +15,13 @@ from cloudinary_storage.storage import VideoMediaCloudinaryStorage
 User = get_user_model()
 
 def generate_ref(): 
-    return 'REF-' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    # ✅ من Sequence في الداتابيز بدل random (مفيش تصادم ولا IntegrityError) - aqar/references.py
+    return allocate_reference()
+
+class ReferenceCounter(models.Model):
+    """عداد أكواد المرجع على الداتابيز اللي مفيهاش Sequence (SQLite للتطوير)"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
 
 # دالة لتنظيم مسارات الصور بالفولدرات حسب التاريخ (أفضل للأداء)
 def get_listing_image_path(instance, filename):
@@ -94,7 +103,7 @@ class Feature(models.Model):
     def __str__(self): return f"{self.name} ({self.category.name})"
 
 # --- 3. العقار ---
-class Listing(BaseModel):
+class Listing(NormalizedPhoneMixin, BaseModel):
     reference_code = models.CharField(max_length=20, default=generate_ref, unique=True, db_index=True)
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, blank=True, allow_unicode=True)
@@ -144,6 +153,7 @@ class Listing(BaseModel):
     contract_image = models.ImageField(upload_to='secure_docs/%Y/%m/', null=True, blank=True)
     owner_name = models.CharField(max_length=100, null=True, blank=True)
     owner_phone = models.CharField(max_length=20, null=True, blank=True)
+    owner_phone_normalized = models.CharField(max_length=16, blank=True, default='', db_index=True, editable=False)
 
     # التحليلات
     views_count = models.PositiveIntegerField(default=0, verbose_name="عدد المشاهدات")
@@ -158,6 +168,8 @@ class Listing(BaseModel):
             models.Index(fields=['city', 'offer_type', 'status']),
         ]
 
+    PHONE_FIELDS = {'owner_phone': 'owner_phone_normalized'}
+
     def save(self, *args, **kwargs):
         if not self.slug: 
             self.slug = slugify(self.title, allow_unicode=True) + f"-{self.reference_code}"
@@ -169,7 +181,7 @@ class Listing(BaseModel):
             return {
                 'phone': self.agent.phone_number, 
                 # تأكد أن موديل المستخدم لديه حقل whatsapp_link أو قم ببنائه هنا
-                'whatsapp': getattr(self.agent, 'whatsapp_link', f"https://wa.me/{self.agent.phone_number.replace('+', '')}")
+                'whatsapp': getattr(self.agent, 'whatsapp_link', None) or whatsapp_url(self.agent.phone_number)
             }
         return {'phone': '01000000000', 'whatsapp': 'https://wa.me/201000000000'}
 
@@ -179,16 +191,49 @@ class ListingFeature(models.Model):
     feature = models.ForeignKey(Feature, on_delete=models.CASCADE)
     value = models.CharField(max_length=255)
 
-class ListingImage(models.Model):
+    class Meta:
+        # قيمة واحدة لكل ميزة في العقار (وعليها بيتعمل الـ upsert في aqar/bulk.py)
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'feature'], name='unique_listing_feature'),
+        ]
+
+class ImageMetadata(DirtyFieldsMixin, models.Model):
+    """
+    أبعاد الصورة + Placeholder صغير (BlurHash) بيتحسبوا في الخلفية (aqar/placeholders.py)
+    """
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    placeholder = models.CharField(max_length=64, blank=True, default='', editable=False)
+
+    class Meta: abstract = True
+
+    def save(self, *args, **kwargs):
+        # لو الصورة اتغيرت البيانات القديمة مبقتش صح، فبنفضيها لحد ما تتحسب تاني
+        if self.is_dirty('image'):
+            self.width = self.height = None
+            self.placeholder = ''
+        super().save(*args, **kwargs)
+
+class ListingImage(ImageMetadata):
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to=get_listing_image_path) # استخدام دالة المسار الديناميكي
-    
+    order = models.PositiveIntegerField(default=0, verbose_name="الترتيب")
+    caption = models.CharField(max_length=200, blank=True, default='', verbose_name="وصف الصورة")
+
+    class Meta:
+        ordering = ['order', 'id']
+
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         super().save(*args, **kwargs)
         # تعيين الصورة الأولى كصورة مصغرة تلقائياً إذا لم تكن موجودة
-        if not self.listing.thumbnail:
-            self.listing.thumbnail = self.image
-            self.listing.save()
+        # (UPDATE واحد مشروط بدل ما نحمل العقار ونحفظه كله من جديد)
+        if adding:
+            updated = Listing.objects.filter(pk=self.listing_id).filter(
+                models.Q(thumbnail='') | models.Q(thumbnail__isnull=True)
+            ).update(thumbnail=self.image.name)
+            if updated and 'listing' in self._state.fields_cache:
+                self.listing.thumbnail = self.image.name
 
 class ListingDocument(BaseModel):
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='documents')
@@ -219,7 +264,7 @@ class Favorite(models.Model):
         return f"{self.user} liked {self.listing.title}"
 
 # --- 5. الإعلانات المميزة والترويجية (Slider & Promotions) ---
-class Promotion(models.Model):
+class Promotion(NormalizedPhoneMixin, models.Model):
     class PromoType(models.TextChoices):
         PROJECT = 'PROJECT', 'مشروع عقاري'
         SERVICE = 'SERVICE', 'خدمة'
@@ -258,21 +303,37 @@ class Promotion(models.Model):
     longitude = models.DecimalField(max_digits=10, decimal_places=8, null=True, blank=True)
     phone_number = models.CharField(max_length=20, blank=True)
     whatsapp_number = models.CharField(max_length=20, blank=True)
+    phone_normalized = models.CharField(max_length=16, blank=True, default='', db_index=True, editable=False)
+    whatsapp_normalized = models.CharField(max_length=16, blank=True, default='', db_index=True, editable=False)
     is_active = models.BooleanField(default=True)
     display_order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # ⏰ الجدولة والتدوير
+    starts_at = models.DateTimeField(null=True, blank=True, verbose_name="يبدأ في", help_text="فارغ = يبدأ فوراً")
+    ends_at = models.DateTimeField(null=True, blank=True, verbose_name="ينتهي في", help_text="فارغ = مستمر")
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name="وزن الظهور", help_text="كل ما الرقم أكبر، الإعلان يظهر أكتر في السلايدر")
+    daily_impression_cap = models.PositiveIntegerField(null=True, blank=True, verbose_name="أقصى ظهور يومي", help_text="فارغ = بدون حد")
+
     views_count = models.PositiveIntegerField(default=0, verbose_name="عدد المشاهدات")
     clicks_count = models.PositiveIntegerField(default=0, verbose_name="عدد النقرات")
     whatsapp_clicks = models.PositiveIntegerField(default=0, verbose_name="نقرات الواتساب")
     call_clicks = models.PositiveIntegerField(default=0, verbose_name="نقرات الاتصال")
 
+    class Meta:
+        indexes = [
+            # 🚀 لحساب مجموعة العروض النشطة حسب نافذة الجدولة
+            models.Index(fields=['is_active', 'starts_at', 'ends_at']),
+        ]
+
+    PHONE_FIELDS = {'phone_number': 'phone_normalized', 'whatsapp_number': 'whatsapp_normalized'}
+
     def save(self, *args, **kwargs):
         if not self.slug: self.slug = slugify(self.title, allow_unicode=True) + f"-{generate_ref()}"
         super().save(*args, **kwargs)
     def __str__(self): return self.title
 
-class PromotionImage(models.Model):
+class PromotionImage(ImageMetadata):
     promotion = models.ForeignKey(Promotion, on_delete=models.CASCADE, related_name='gallery')
     image = models.ImageField(upload_to='promotions/gallery/')
 
@@ -327,10 +388,20 @@ class AnalyticsLog(models.Model):
     def __str__(self):
         return f"{self.event_type} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
 
+# الحقول اللي بتتنسخ في العقارات (رقم واسم المالك)
+LISTING_SYNC_FIELDS = {'phone_number', 'first_name', 'last_name', 'username'}
+
 @receiver(post_save, sender=User)
-def sync_user_data_to_listings(sender, instance, created, **kwargs):
+def sync_user_data_to_listings(sender, instance, created, update_fields=None, **kwargs):
+    # ✅ تحديث التوكن أو last_login مالوش علاقة بالعقارات
+    if update_fields is not None and not LISTING_SYNC_FIELDS & set(update_fields):
+        return
     if not created:
-        Listing.objects.filter(agent=instance).update(
+        updated = Listing.objects.filter(agent=instance).update(
             owner_phone=instance.phone_number,
+            owner_phone_normalized=normalize_phone(instance.phone_number),
             owner_name=f"{instance.first_name} {instance.last_name}".strip() or instance.username
-        )
\ No newline at end of file
+        )
+        if updated:
+            bump_version_on_commit('listings')
+            enqueue_purge('listings', *[f'listing:{pk}' for pk in Listing.objects.filter(agent=instance).values_list('id', flat=True)])
\ No newline at end of file
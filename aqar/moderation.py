@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from aqar_core.caching import bump_version
+from aqar_core.cdn import enqueue_purge
+from aqar_core.fcm_manager import send_push_batch
+from aqar_core.jobs import job_progress
+from aqar_core.models import BackgroundJob, Notification, User
+from .models import Listing
+
+# ==========================================
+# قبول / تعليق العقارات بالجملة (مهمة خلفية من لوحة التحكم)
+# ==========================================
+# - التحديث على دفعات (كل دفعة transaction لوحدها)، والتقدم بيتسجل في BackgroundJob
+# - الموظفين المتأثرين بيتجمعوا في استعلام واحد (GROUP BY)، وكل موظف بياخد إشعار واحد
+# - الإشعارات بـ bulk_create والـ Push بـ send_each (دفعات 500)
+# - 🔁 المهمة ممكن تتعاد (resume_jobs) بعد ما تموت في النص: العدد والموظفين بيتحسبوا مرة واحدة
+#   من القائمة الأصلية وبيتحفظوا في job.result (checkpoint) قبل أول دفعة، والإشعارات والـ Push ليهم
+#   علامة (notified / pushed) عشان الإعادة متنساش حد ومتبعتش مرتين
+
+CHUNK_SIZE = 500
+
+MESSAGES = {
+    'Available': ("✅ تم نشر إعلاناتك", "تمت مراجعة ونشر {count} إعلان من إعلاناتك."),
+    'Pending': ("⛔ تم تعليق إعلاناتك", "تم تعليق {count} إعلان من إعلاناتك لحين المراجعة."),
+}
+
+def _save_checkpoint(job, checkpoint):
+    BackgroundJob.objects.filter(pk=job.pk).update(result=checkpoint, updated_at=timezone.now())
+
+def moderate_listings(job, ids, status):
+    pending = Listing.objects.filter(pk__in=ids).exclude(status=status)
+    checkpoint = dict(job.result or {})
+    if 'agents' not in checkpoint:
+        # الموظفين المتأثرين (قبل التحديث عشان نعد اللي اتغير بس)
+        agents = pending.filter(agent__isnull=False).values('agent_id').annotate(count=Count('id')).order_by()
+        checkpoint = {
+            'updated': pending.count(), 'agents': [[row['agent_id'], row['count']] for row in agents],
+            'notified': False, 'pushed': False,
+        }
+        _save_checkpoint(job, checkpoint)
+    remaining = list(pending.values_list('id', flat=True))
+    BackgroundJob.objects.filter(pk=job.pk).update(total=checkpoint['updated'], processed=checkpoint['updated'] - len(remaining))
+
+    for start in range(0, len(remaining), CHUNK_SIZE):
+        chunk = remaining[start:start + CHUNK_SIZE]
+        with transaction.atomic():
+            Listing.objects.filter(pk__in=chunk).update(status=status, updated_at=timezone.now())
+            # update() مش بتبعت signals، فلازم نلغي الكاش ونمسح الـ CDN بنفسنا
+            enqueue_purge('listings', *[f'listing:{pk}' for pk in chunk])
+        bump_version('listings')
+        job_progress(job, len(chunk))
+
+    title, body = MESSAGES[status]
+    notifications = [
+        Notification(user_id=agent_id, title=title, message=body.format(count=count), notification_type='Listing')
+        for agent_id, count in checkpoint['agents']
+    ]
+    if not checkpoint['notified']:
+        with transaction.atomic():
+            Notification.objects.bulk_create(notifications, batch_size=CHUNK_SIZE)
+            checkpoint['notified'] = True
+            _save_checkpoint(job, checkpoint)
+    if not checkpoint['pushed']:
+        # bulk_create مش بتبعت post_save، فالـ Push بيتبعت هنا دفعة واحدة (التوكن بيتقري وقت الإرسال)
+        tokens = dict(User.objects.filter(pk__in=[n.user_id for n in notifications]).values_list('pk', 'fcm_token'))
+        sent, failed = send_push_batch([(tokens.get(n.user_id), n.title, n.message, n.action_url) for n in notifications])
+        checkpoint.update(pushed=True, push_sent=sent, push_failed=failed)
+        _save_checkpoint(job, checkpoint)
+    return {
+        'updated': checkpoint['updated'], 'agents_notified': len(notifications),
+        'push_sent': checkpoint['push_sent'], 'push_failed': checkpoint['push_failed'],
+    }
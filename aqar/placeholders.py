@@ -0,0 +1,198 @@
+import json
+import logging
+import math
+import threading
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import requests
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from aqar_core.caching import bump_version
+from aqar_core.cdn import enqueue_purge
+from aqar_core.tasks import run_in_background
+from .images import UPLOAD_SEGMENT, image_url, transform_url
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow اختياري: من غيره الصور بتفضل من غير Placeholder
+    Image = ImageOps = None
+
+logger = logging.getLogger('django')
+
+# ==========================================
+# Placeholder صغير (BlurHash) + أبعاد كل صورة
+# ==========================================
+# الفرونت بيرسم الـ BlurHash (حوالي 30 حرف) مكان الصورة لحد ما توصل،
+# والأبعاد بتخليه يحجز مكان الصورة في الصفحة من غير ما الـ Layout يتهز.
+# الحساب بيتم في الخلفية بعد الـ commit، وفي أمر backfill_image_metadata للصور القديمة.
+# 🔒 بنحمل من Cloudinary بتاعنا بس (IMAGE_FETCH_HOSTS): الروابط الخارجية اللي المستخدم بعتها
+#    (external_images) ممكن تشاور على سيرفرات داخلية (SSRF)، فبتفضل من غير Placeholder.
+
+SAMPLE_SIZE = 32          # بنحسب الـ Hash من نسخة صغيرة جداً من الصورة
+X_COMPONENTS, Y_COMPONENTS = 4, 3
+MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+BATCH_SIZE = 20
+
+# --- 1. BlurHash Encoder (Python خالص) ---
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+def _base83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+def _srgb_to_linear(value):
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+def _linear_to_srgb(value):
+    v = max(0.0, min(1.0, value))
+    return int(v * 12.92 * 255 + 0.5) if v <= 0.0031308 else int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+def _sign_pow(value, exp):
+    return math.copysign(abs(value) ** exp, value)
+
+def blurhash_encode(pixels, width, height, x_components=X_COMPONENTS, y_components=Y_COMPONENTS):
+    """pixels: قائمة (r, g, b) بالترتيب صف بصف"""
+    linear = [(_srgb_to_linear(r), _srgb_to_linear(g), _srgb_to_linear(b)) for r, g, b in pixels]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            norm = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                cy = cos_y[j][y]
+                for x in range(width):
+                    basis = cos_x[i][x] * cy
+                    pr, pg, pb = linear[row + x]
+                    r += basis * pr; g += basis * pg; b += basis * pb
+            scale = norm / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        quantised = max(0, min(82, int(max(abs(c) for f in ac for c in f) * 166 - 0.5)))
+        max_value = (quantised + 1) / 166
+    else:
+        quantised, max_value = 0, 1
+    result += _base83(quantised, 1)
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for f in ac:
+        q = [max(0, min(18, math.floor(_sign_pow(c / max_value, 0.5) * 9 + 9.5))) for c in f]
+        result += _base83(q[0] * 19 * 19 + q[1] * 19 + q[2], 2)
+    return result
+
+# --- 2. قراءة الصورة (من غير تحميل الصورة الأصلية لو هي على Cloudinary) ---
+def is_fetchable_url(url):
+    """رابط على Cloudinary بتاعنا (نفس الـ Cloud) ومن غير بورت أو بيانات دخول"""
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return False
+    if parts.scheme not in ('http', 'https') or port is not None or parts.username or parts.password:
+        return False
+    if parts.hostname not in getattr(settings, 'IMAGE_FETCH_HOSTS', ('res.cloudinary.com',)):
+        return False
+    cloud_name = (getattr(settings, 'CLOUDINARY_STORAGE', None) or {}).get('CLOUD_NAME')
+    return UPLOAD_SEGMENT in parts.path and (not cloud_name or parts.path.startswith(f'/{cloud_name}/'))
+
+def _download(url):
+    if not is_fetchable_url(url):
+        raise ValueError("رابط مش مسموح بتحميله")
+    # من غير Redirects (ممكن تودي لعنوان داخلي) وبحد أقصى للحجم بعد فك الضغط
+    with requests.get(url, timeout=10, stream=True, allow_redirects=False) as response:
+        if response.status_code != 200:
+            raise ValueError(f"رد غير متوقع ({response.status_code})")
+        if int(response.headers.get('Content-Length') or 0) > MAX_DOWNLOAD_BYTES:
+            raise ValueError("الصورة أكبر من الحد المسموح")
+        data = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            data += chunk
+            if len(data) > MAX_DOWNLOAD_BYTES:
+                raise ValueError("الصورة أكبر من الحد المسموح")
+    return bytes(data)
+
+def _open_source(field_file):
+    """بترجع (العرض، الطول، صورة صغيرة) أو None لو الصورة رابط خارجي"""
+    url = image_url(field_file)
+    if url and url.startswith(('http://', 'https://')):
+        if not is_fetchable_url(url):
+            return None
+        # Cloudinary: الأبعاد من fl_getinfo (JSON) والعينة نسخة 32px بدل الصورة الكاملة
+        info = json.loads(_download(transform_url(url, 'fl_getinfo')))['input']
+        sample = Image.open(BytesIO(_download(transform_url(url, f'c_limit,w_{SAMPLE_SIZE},h_{SAMPLE_SIZE},f_jpg'))))
+        return int(info['width']), int(info['height']), sample
+    with field_file.open('rb') as f:
+        data = f.read()
+    img = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    return img.width, img.height, img
+
+def compute_image_metadata(field_file):
+    if Image is None or not field_file:
+        return None
+    source = _open_source(field_file)
+    if source is None:
+        return None
+    width, height, sample = source
+    sample = sample.convert('RGB')
+    sample.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE))
+    return {
+        'width': width,
+        'height': height,
+        'placeholder': blurhash_encode(list(sample.getdata()), sample.width, sample.height),
+    }
+
+# --- 3. المعالجة على دفعات ---
+def process_image_metadata(model_label, ids, batch_size=BATCH_SIZE):
+    """حساب الأبعاد والـ Placeholder لمجموعة صور وحفظهم بـ bulk_update"""
+    from .signals import CACHE_NAMESPACES, surrogate_keys_for
+    model = apps.get_model(model_label)
+    ids = sorted(ids)
+    done = 0
+    for start in range(0, len(ids), batch_size):
+        updated = []
+        for obj in model.objects.filter(pk__in=ids[start:start + batch_size]):
+            try:
+                meta = compute_image_metadata(obj.image)
+            except Exception as e:
+                logger.error(f"⚠️ فشل حساب بيانات الصورة {model_label}#{obj.pk}: {e}")
+                continue
+            if meta is None:
+                continue
+            for field, value in meta.items():
+                setattr(obj, field, value)
+            updated.append(obj)
+        if updated:
+            model.objects.bulk_update(updated, ['width', 'height', 'placeholder'])
+            # bulk_update مبيبعتش signals، فبنلغي الكاش بنفسنا
+            bump_version(*CACHE_NAMESPACES[model])
+            enqueue_purge(*{key for obj in updated for key in surrogate_keys_for(obj)})
+            done += len(updated)
+    return done
+
+_pending = threading.local()
+
+def queue_image_metadata(model, ids):
+    """
+    تجميع الصور طول الـ transaction وتشغيلها دفعة واحدة في الخلفية بعد الـ commit
+    """
+    ids = {pk for pk in ids if pk}
+    if not ids: return
+    pending = getattr(_pending, 'items', None)
+    if pending is None:
+        pending = _pending.items = {}
+    pending.setdefault(model._meta.label, set()).update(ids)
+    transaction.on_commit(flush_image_metadata)
+
+def flush_image_metadata():
+    pending = getattr(_pending, 'items', None)
+    if not pending: return
+    _pending.items = {}
+    for model_label, ids in pending.items():
+        run_in_background(process_image_metadata, model_label, ids)
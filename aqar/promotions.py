@@ -0,0 +1,132 @@
+import heapq
+import json
+import random
+import threading
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from aqar_core.caching import get_version, get_or_build
+from .models import Promotion, PromotionUnit
+from .serializers import PromotionSerializer
+
+# ✅ فيد العروض الجاهز (Homepage Slider)
+# بيتبني بعدد ثابت من الاستعلامات (4) ويتحفظ جاهز للإرسال،
+# ورقم الإصدار 'promotions' بيزيد مع أي تعديل في العرض أو صوره أو وحداته أو العقار المرتبط (aqar/signals.py)
+
+PROMOTIONS_NAMESPACE = 'promotions'
+FEED_TIMEOUT = 60 * 60
+
+def prefetch_promotions(queryset):
+    return queryset.select_related('target_listing').prefetch_related(
+        'gallery',
+        'transformations',
+        Prefetch('units', queryset=PromotionUnit.objects.select_related('linked_listing__category')),
+    )
+
+def active_promotions_queryset():
+    return prefetch_promotions(Promotion.objects.filter(is_active=True)).order_by('display_order', '-created_at')
+
+def build_promotions_feed():
+    # الفيد فيه كل العروض المفعلة اللي لسه منتهتش (الحالية والمجدولة للمستقبل)
+    queryset = active_promotions_queryset().filter(Q(ends_at__isnull=True) | Q(ends_at__gt=timezone.now()))
+    data = PromotionSerializer(queryset, many=True).data
+    # تحويلها لأنواع بسيطة (dict/list/str) عشان تتخزن وتترجع بسرعة
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+def get_promotions_feed():
+    key = f'promotions_feed_{get_version(PROMOTIONS_NAMESPACE)}'
+    return get_or_build(key, build_promotions_feed, timeout=FEED_TIMEOUT)
+
+# ==========================================
+# مجموعة العروض النشطة (Active Set) + التدوير
+# ==========================================
+# بتتحسب مرة واحدة في الذاكرة، ومبتتحسبش تاني غير لو:
+# - رقم الإصدار اتغير (تعديل في العروض)
+# - أو وصلنا لأقرب "حد زمني" (عرض هيبدأ أو هينتهي)
+# فاختيار العروض لكل طلب بيبقى O(عدد العروض النشطة) من غير أي استعلام.
+
+class ActivePromotionSet:
+    def __init__(self, feed, now, version):
+        self.version = version
+        self.items = []
+        boundaries = []
+        for promo in feed:
+            starts_at = parse_datetime(promo['starts_at']) if promo.get('starts_at') else None
+            ends_at = parse_datetime(promo['ends_at']) if promo.get('ends_at') else None
+            if starts_at and starts_at > now:
+                boundaries.append(starts_at)
+                continue
+            if ends_at and ends_at <= now:
+                continue
+            if ends_at: boundaries.append(ends_at)
+            self.items.append(promo)
+        self.next_boundary = min(boundaries) if boundaries else None
+
+    def is_expired(self, now):
+        return self.next_boundary is not None and now >= self.next_boundary
+
+_active = {'set': None}
+_active_lock = threading.Lock()
+
+def get_active_promotions():
+    now = timezone.now()
+    version = get_version(PROMOTIONS_NAMESPACE)
+    current = _active['set']
+    if current is None or current.version != version or current.is_expired(now):
+        with _active_lock:
+            current = _active['set']
+            if current is None or current.version != version or current.is_expired(now):
+                current = ActivePromotionSet(get_promotions_feed(), now, version)
+                _active['set'] = current
+    return current.items
+
+class ImpressionPacer:
+    """
+    توزيع ظهور الإعلان على اليوم بالتساوي (Pacing):
+    الإعلان اللي ليه حد يومي ميظهرش أكتر من نسبة الوقت اللي عدى من اليوم.
+    العدادات في ذاكرة السيرفر (تقريبية لو فيه أكتر من سيرفر، لكن من غير أي استعلام).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day = None
+        self._served = {}
+
+    def _reset_if_new_day(self, today):
+        if self._day != today:
+            self._day = today
+            self._served = {}
+
+    def allow(self, promo, now):
+        cap = promo.get('daily_impression_cap')
+        if not cap:
+            return True
+        local_now = timezone.localtime(now)
+        start_of_day = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+        elapsed = (local_now - start_of_day) / timedelta(days=1)
+        with self._lock:
+            self._reset_if_new_day(local_now.date())
+            return self._served.get(promo['id'], 0) < max(1, cap * elapsed)
+
+    def record(self, promos, now):
+        with self._lock:
+            self._reset_if_new_day(timezone.localtime(now).date())
+            for promo in promos:
+                self._served[promo['id']] = self._served.get(promo['id'], 0) + 1
+
+pacer = ImpressionPacer()
+
+def select_promotions(limit=None, rng=random):
+    """
+    اختيار عروض السلايدر بالتدوير الموزون (Weighted Rotation):
+    كل عرض بياخد مفتاح random ** (1 / weight) والأكبر بيظهر الأول.
+    """
+    now = timezone.now()
+    candidates = [p for p in get_active_promotions() if pacer.allow(p, now)]
+    keyed = ((rng.random() ** (1.0 / max(p.get('weight') or 1, 1)), index, p) for index, p in enumerate(candidates))
+    count = len(candidates) if limit is None else min(limit, len(candidates))
+    selected = [p for _, _, p in heapq.nlargest(count, keyed)]
+    pacer.record(selected, now)
+    return selected
@@ -0,0 +1,109 @@
+import os
+import string
+import threading
+from collections import deque
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+# ==========================================
+# أكواد المرجع (REF-XXXXXX) من غير تصادم
+# ==========================================
+# - الأرقام جاية من Sequence في الداتابيز، وكل عملية بتحجز دفعة (Block) مرة واحدة
+# - الرقم بيتحول لـ 5 حروف بتبديل ثابت (عشان الأكواد متبانش متسلسلة) + حرف تحقق (Luhn mod 36)
+# - نفس الأبجدية القديمة، والأكواد القديمة العشوائية اللي ممكن تتقابل معاها بنتخطاها (استعلام واحد لكل دفعة)
+
+ALPHABET = string.ascii_uppercase + string.digits
+BASE = len(ALPHABET)
+PAYLOAD_LENGTH = 5
+SPACE = BASE ** PAYLOAD_LENGTH  # حوالي 60 مليون كود
+PREFIX = 'REF-'
+
+# تبديل (Permutation): n * MULTIPLIER + OFFSET mod SPACE
+# المضروب فيه لازم ميقبلش القسمة على 2 ولا 3 (عوامل الـ 36) عشان التحويل يبقى واحد لواحد
+MULTIPLIER = 27_644_437
+OFFSET = 9_191_923
+
+SEQUENCE_NAME = 'aqar_reference_seq'
+COUNTER_NAME = 'reference'
+
+def check_char(payload):
+    """حرف التحقق بخوارزمية Luhn mod N"""
+    factor, total = 2, 0
+    for char in reversed(payload):
+        addend = factor * ALPHABET.index(char)
+        factor = 1 if factor == 2 else 2
+        total += addend // BASE + addend % BASE
+    return ALPHABET[(BASE - total % BASE) % BASE]
+
+def encode_reference(number):
+    if not 0 <= number < SPACE:
+        raise OverflowError("خلصت أكواد المرجع المتاحة")
+    value = (number * MULTIPLIER + OFFSET) % SPACE
+    chars = []
+    for _ in range(PAYLOAD_LENGTH):
+        value, remainder = divmod(value, BASE)
+        chars.append(ALPHABET[remainder])
+    payload = ''.join(reversed(chars))
+    return f'{PREFIX}{payload}{check_char(payload)}'
+
+def is_valid_reference(code):
+    if not code.startswith(PREFIX) or len(code) != len(PREFIX) + PAYLOAD_LENGTH + 1:
+        return False
+    payload, check = code[len(PREFIX):-1], code[-1]
+    return all(c in ALPHABET for c in payload) and check_char(payload) == check
+
+# --- حجز الأرقام ---
+def reserve_numbers(size):
+    """
+    حجز size رقم مرة واحدة (Postgres: Sequence / غير كده: عداد في جدول للتطوير)
+    الـ Sequence مبيرجعش لورا مع الـ rollback، فالرقم المحجوز عمره ما بيتكرر
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [SEQUENCE_NAME, size])
+            return [row[0] for row in cursor.fetchall()]
+
+    ReferenceCounter = apps.get_model('aqar', 'ReferenceCounter')
+    with transaction.atomic():
+        ReferenceCounter.objects.get_or_create(name=COUNTER_NAME)
+        ReferenceCounter.objects.filter(name=COUNTER_NAME).update(value=F('value') + size)
+        end = ReferenceCounter.objects.values_list('value', flat=True).get(name=COUNTER_NAME)
+    return list(range(end - size + 1, end + 1))
+
+def legacy_collisions(codes):
+    """الأكواد القديمة (العشوائية) اللي ممكن تتطابق مع الجديدة"""
+    Listing = apps.get_model('aqar', 'Listing')
+    return set(Listing.objects.filter(reference_code__in=codes).values_list('reference_code', flat=True))
+
+class ReferenceAllocator:
+    def __init__(self, reserve=reserve_numbers, collisions=legacy_collisions, block_size=None):
+        self.reserve = reserve
+        self.collisions = collisions
+        self.block_size = block_size
+        self._codes = deque()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _load_block(self):
+        size = self.block_size or getattr(settings, 'REFERENCE_BLOCK_SIZE', 20)
+        codes = [encode_reference(number) for number in self.reserve(size)]
+        taken = self.collisions(codes)
+        return [code for code in codes if code not in taken]
+
+    def allocate(self):
+        with self._lock:
+            # بعد fork (gunicorn --preload مثلاً) الدفعة المحجوزة بتتنسخ للعمليات التانية، فلازم نرميها
+            if self._pid != os.getpid():
+                self._codes.clear()
+                self._pid = os.getpid()
+            while not self._codes:
+                self._codes.extend(self._load_block())
+            return self._codes.popleft()
+
+allocator = ReferenceAllocator()
+
+def allocate_reference():
+    return allocator.allocate()
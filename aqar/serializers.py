@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Prefetch
 from .models import *
+from .images import ImageVariantField, ImageVariantsField, variant_url, build_variants
+from .bulk import build_listing_images, next_image_order, assign_thumbnail, attach_listing_images, upsert_listing_features
 import json
 
 User = get_user_model()
@@ -21,9 +24,31 @@ class ListingFeatureSerializer(serializers.ModelSerializer):
         fields = ['id', 'feature', 'feature_name', 'icon', 'input_type', 'value']
 
 class ListingImageSerializer(serializers.ModelSerializer):
+    # ✅ مقاس التفاصيل بدل الصورة الأصلية + باقي المقاسات والـ srcset
+    image = ImageVariantField('detail')
+    variants = ImageVariantsField(source='image')
+
     class Meta: 
         model = ListingImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'variants', 'width', 'height', 'placeholder', 'order', 'caption']
+
+class ExternalImageField(serializers.Field):
+    """
+    صورة مرفوعة من الفرونت: يا إما رابط مباشر، يا إما {"url": ..., "caption": ..., "order": ...}
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.strip().startswith('{'):
+            try: data = json.loads(data)  # الـ multipart بيبعت الـ object كنص
+            except ValueError: raise serializers.ValidationError("صيغة الصورة غير صحيحة")
+        if isinstance(data, str):
+            data = {'url': data}
+        if not isinstance(data, dict):
+            raise serializers.ValidationError("لازم تكون رابط أو {url, caption, order}")
+        return {
+            'url': serializers.URLField().run_validation(data.get('url')),
+            'caption': serializers.CharField(max_length=200, allow_blank=True, required=False).run_validation(data.get('caption') or ''),
+            'order': serializers.IntegerField(min_value=0, allow_null=True).run_validation(data.get('order')),
+        }
 
 class CategorySerializer(serializers.ModelSerializer):
     allowed_features = FeatureSerializer(many=True, read_only=True)
@@ -59,7 +84,7 @@ class ListingSerializer(serializers.ModelSerializer):
 
     # حقول الكتابة (استقبال البيانات من الفورم)
     features_data = serializers.CharField(write_only=True, required=False)
-    external_images = serializers.ListField(child=serializers.URLField(), write_only=True, required=False, allow_empty=True)
+    external_images = serializers.ListField(child=ExternalImageField(), write_only=True, required=False, allow_empty=True)
     external_video = serializers.URLField(write_only=True, required=False, allow_null=True, allow_blank=True)
     external_id_card = serializers.URLField(write_only=True, required=False, allow_null=True, allow_blank=True)
     external_contract = serializers.URLField(write_only=True, required=False, allow_null=True, allow_blank=True)
@@ -73,17 +98,69 @@ class ListingSerializer(serializers.ModelSerializer):
             'views_count', 'whatsapp_clicks', 'call_clicks' # التحليلات للقراءة فقط هنا
         ]
 
+    def validate_features_data(self, value):
+        # بييجي كـ JSON نص من الفورم: {"feature_id": value}
+        try:
+            data = json.loads(value) if isinstance(value, str) else value
+        except ValueError:
+            raise serializers.ValidationError("صيغة المميزات غير صحيحة (JSON)")
+        if not isinstance(data, dict):
+            raise serializers.ValidationError("المميزات لازم تكون {feature_id: value}")
+        cleaned = {}
+        for feature_id, raw in data.items():
+            try:
+                feature_id = int(feature_id)
+            except (TypeError, ValueError):
+                raise serializers.ValidationError(f"رقم ميزة غير صحيح: {feature_id}")
+            # القيمة الفاضية (أو false) معناها الميزة اتشالت من العقار
+            value = None if raw is None or raw is False or str(raw).strip() == '' else str(raw).strip()
+            if value is not None and len(value) > 255:
+                raise serializers.ValidationError(f"قيمة الميزة {feature_id} أطول من المسموح")
+            cleaned[feature_id] = value
+        return cleaned
+
+    def validate(self, attrs):
+        features = attrs.get('features_data')
+        if features:
+            category = attrs.get('category') or getattr(self.instance, 'category', None)
+            # ✅ كل المميزات المطلوبة في استعلام واحد
+            allowed = set(Feature.objects.filter(id__in=features.keys(), category=category).values_list('id', flat=True))
+            invalid = sorted(set(features) - allowed)
+            if invalid:
+                raise serializers.ValidationError({'features_data': f"مميزات غير موجودة أو مش تابعة لنوع العقار: {invalid}"})
+        return attrs
+
     def get_is_favorite(self, obj):
+        # ⚡ من الـ annotation (prefetch_listings) لو موجودة، غير كده مفضلة المستخدم كلها في استعلام واحد للرد كله
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            # تم تعديل related_name في الموديل لـ favorited_by لكن favorites ستعمل أيضاً لو لم يتم تغييرها
-            # الأفضل استخدام الاستعلام المباشر للأمان
-            return Favorite.objects.filter(user=request.user, listing=obj).exists()
+            if 'favorite_ids' not in self.context:
+                self.context['favorite_ids'] = set(Favorite.objects.filter(user=request.user).values_list('listing_id', flat=True))
+            return obj.pk in self.context['favorite_ids']
         return False
 
     def get_contact_info(self, obj):
         return obj.get_contact_info()
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # ✅ الكروت بتاخد صورة صغيرة بشكل افتراضي (الحقل نفسه لسه بيقبل الكتابة عادي)
+        data['thumbnail'] = variant_url(instance.thumbnail, 'card')
+        data['thumbnail_variants'] = build_variants(instance.thumbnail)
+        data['thumbnail_meta'] = self._thumbnail_meta(instance)
+        return data
+
+    def _thumbnail_meta(self, instance):
+        # الـ Thumbnail نسخة من واحدة من صور العقار، فبناخد بياناتها من الصور المحملة (prefetch) من غير استعلام زيادة
+        if not instance.thumbnail or 'images' not in getattr(instance, '_prefetched_objects_cache', {}):
+            return None
+        for img in instance.images.all():
+            if img.image.name == instance.thumbnail.name and img.placeholder:
+                return {'width': img.width, 'height': img.height, 'placeholder': img.placeholder}
+        return None
+
     def create(self, validated_data):
         features_json = validated_data.pop('features_data', None)
         external_images = validated_data.pop('external_images', [])
@@ -92,25 +169,18 @@ class ListingSerializer(serializers.ModelSerializer):
         external_contract = validated_data.pop('external_contract', None)
         validated_data.pop('deleted_image_ids', []) 
 
-        listing = Listing.objects.create(**validated_data)
-
-        # حفظ الصور
-        if external_images:
-            for url in external_images:
-                ListingImage.objects.create(listing=listing, image=url)
-            
-            # تعيين أول صورة كـ Thumbnail إذا لم توجد
-            if not listing.thumbnail and listing.images.exists():
-                listing.thumbnail = listing.images.first().image
-                listing.save()
-
+        listing = Listing(**validated_data)
         if external_video: listing.video = external_video
         if external_id_card: listing.id_card_image = external_id_card
         if external_contract: listing.contract_image = external_contract
-        
+
+        # ✅ الصور بتتجهز في الذاكرة والـ Thumbnail بيتحدد قبل الحفظ، فالعقار بيتحفظ مرة واحدة
+        images = build_listing_images(listing, external_images)
+        assign_thumbnail(listing, images)
         listing.save()
+        attach_listing_images(listing, images)
 
-        if features_json: self._save_features(listing, features_json)
+        if features_json: upsert_listing_features(listing, features_json)
         return listing
 
     def update(self, instance, validated_data):
@@ -131,46 +201,36 @@ class ListingSerializer(serializers.ModelSerializer):
         if external_id_card: instance.id_card_image = external_id_card
         if external_contract: instance.contract_image = external_contract
 
-        instance.save()
-
         # حذف الصور القديمة
         if deleted_image_ids:
             ListingImage.objects.filter(id__in=deleted_image_ids, listing=instance).delete()
 
-        # إضافة صور جديدة
+        # ✅ الصور الجديدة + التأكد من وجود Thumbnail، وبعدين حفظ واحد للعقار
+        images = []
         if external_images:
-             for url in external_images:
-                ListingImage.objects.create(listing=instance, image=url)
-        
-        # التأكد من وجود Thumbnail
-        if not instance.thumbnail and instance.images.exists():
-            instance.thumbnail = instance.images.first().image
-            instance.save()
+            start = next_image_order(instance) if any(e['order'] is None for e in external_images) else 0
+            images = build_listing_images(instance, external_images, start_order=start)
+        if not assign_thumbnail(instance, images) and not instance.thumbnail:
+            instance.thumbnail = instance.images.values_list('image', flat=True).first()
 
-        if features_input: self._save_features(instance, features_input)
+        instance.save()
+        attach_listing_images(instance, images)
+
+        if features_input: upsert_listing_features(instance, features_input)
             
         return instance
 
-    def _save_features(self, listing, features_input):
-        try:
-            if isinstance(features_input, str):
-                features_dict = json.loads(features_input)
-            else:
-                features_dict = features_input
-            
-            for feature_id, value in features_dict.items():
-                if value: 
-                    try:
-                        feature_obj = Feature.objects.get(id=int(feature_id))
-                        ListingFeature.objects.update_or_create(
-                            listing=listing, 
-                            feature=feature_obj, 
-                            defaults={'value': str(value)}
-                        )
-                    except (Feature.DoesNotExist, ValueError): 
-                        pass
-        except Exception as e:
-            print(f"Error saving features: {e}")
+def prefetch_listings(queryset, user=None):
+    """كل اللي ListingSerializer محتاجه بعدد ثابت من الاستعلامات مهما كان عدد العقارات"""
+    queryset = queryset.select_related(
+        'governorate', 'city', 'category', 'agent', 'major_zone', 'subdivision'
+    ).prefetch_related(
+        'images',
+        Prefetch('features_values', queryset=ListingFeature.objects.select_related('feature')),
+    )
+    if user is not None and user.is_authenticated:
+        queryset = queryset.annotate(is_favorited=Exists(Favorite.objects.filter(user=user, listing=OuterRef('pk'))))
+    return queryset
 
 # --- 4. التفضيلات والترويج ---
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -178,10 +238,16 @@ class FavoriteSerializer(serializers.ModelSerializer):
     class Meta: model = Favorite; fields = '__all__'
 
 class PromotionImageSerializer(serializers.ModelSerializer):
-    class Meta: model = PromotionImage; fields = ['id', 'image']
+    image = ImageVariantField('detail')
+    variants = ImageVariantsField(source='image')
+    class Meta: model = PromotionImage; fields = ['id', 'image', 'variants', 'width', 'height', 'placeholder']
 
 class TransformationSerializer(serializers.ModelSerializer):
-    class Meta: model = Transformation; fields = ['id', 'before_image', 'after_image', 'title']
+    before_image = ImageVariantField('detail')
+    after_image = ImageVariantField('detail')
+    before_variants = ImageVariantsField(source='before_image')
+    after_variants = ImageVariantsField(source='after_image')
+    class Meta: model = Transformation; fields = ['id', 'before_image', 'after_image', 'before_variants', 'after_variants', 'title']
 
 class PromotionUnitSerializer(serializers.ModelSerializer):
     listing_id = serializers.SerializerMethodField()
@@ -203,7 +269,7 @@ class PromotionUnitSerializer(serializers.ModelSerializer):
     
     def get_image(self, obj): 
         if obj.linked_listing and obj.linked_listing.thumbnail:
-            return obj.linked_listing.thumbnail.url
+            return variant_url(obj.linked_listing.thumbnail, 'card')
         return None
         
     def get_price(self, obj): 
@@ -233,6 +299,13 @@ class PromotionSerializer(serializers.ModelSerializer):
             return obj.target_listing.price
         return obj.price_start_from
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # الغلاف بيظهر في السلايدر بعرض الشاشة، فمقاس التفاصيل + srcset كفاية
+        data['cover_image'] = variant_url(instance.cover_image, 'detail')
+        data['cover_variants'] = build_variants(instance.cover_image)
+        return data
+
 # --- 5. ✅ Analytics Serializer (جديد) ---
 class AnalyticsLogSerializer(serializers.ModelSerializer):
     class Meta:
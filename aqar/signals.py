@@ -0,0 +1,82 @@
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from aqar_core.caching import bump_version_on_commit
+from aqar_core.cdn import enqueue_purge
+from aqar_core.models import ContactInfo, SiteSetting
+from .placeholders import queue_image_metadata
+from .models import (
+    Listing, ListingImage, ListingFeature, Governorate, City, MajorZone, Subdivision, Category, Feature,
+    Promotion, PromotionImage, Transformation, PromotionUnit,
+)
+
+# ✅ كل موديل وأرقام الإصدارات (namespaces) اللي لازم تتلغي لما يتعدل أو يتحذف
+# - listings: كاش البحث وصفحة العقار (أسماء الجغرافيا والتصنيفات والمميزات بتظهر جوه العقار)
+# - geo / categories / promotions: بصمات الـ ETag للقوائم الثابتة
+# - bootstrap: الرد المجمع لبداية التطبيق (aqar/bootstrap.py)
+CACHE_NAMESPACES = {
+    Listing: ('listings',),
+    ListingImage: ('listings',),
+    ListingFeature: ('listings',),
+    Governorate: ('listings', 'geo', 'bootstrap'),
+    City: ('listings', 'geo', 'bootstrap'),
+    MajorZone: ('listings', 'geo', 'bootstrap'),
+    Subdivision: ('listings', 'geo', 'bootstrap'),
+    Category: ('listings', 'categories', 'bootstrap'),
+    Feature: ('listings', 'categories', 'bootstrap'),
+    Promotion: ('promotions', 'bootstrap'),
+    PromotionImage: ('promotions', 'bootstrap'),
+    Transformation: ('promotions', 'bootstrap'),
+    PromotionUnit: ('promotions', 'bootstrap'),
+    ContactInfo: ('bootstrap',),
+    SiteSetting: ('bootstrap',),
+}
+
+def surrogate_keys_for(instance):
+    """
+    مفاتيح الـ CDN (Surrogate Keys) اللي لازم تتمسح لما العنصر ده يتغير
+    """
+    if isinstance(instance, Listing):
+        return ['listings', f'listing:{instance.pk}']
+    if isinstance(instance, (ListingImage, ListingFeature)):
+        return ['listings', f'listing:{instance.listing_id}']
+    if isinstance(instance, (Governorate, City, MajorZone, Subdivision)):
+        return ['geo', 'listings']
+    if isinstance(instance, (Category, Feature)):
+        return ['categories', 'listings']
+    if isinstance(instance, Promotion):
+        return ['promotions', f'promo:{instance.pk}']
+    if isinstance(instance, (PromotionImage, Transformation, PromotionUnit)):
+        return ['promotions', f'promo:{instance.promotion_id}']
+    return []
+
+def invalidate_caches(sender, instance, **kwargs):
+    bump_version_on_commit(*CACHE_NAMESPACES[sender])
+    enqueue_purge(*surrogate_keys_for(instance))
+
+for model in CACHE_NAMESPACES:
+    post_save.connect(invalidate_caches, sender=model, dispatch_uid=f'cache_ns_save_{model.__name__}')
+    post_delete.connect(invalidate_caches, sender=model, dispatch_uid=f'cache_ns_delete_{model.__name__}')
+
+# العروض بتعرض بيانات العقار المرتبط (السعر، الصورة، التصنيف)
+@receiver(post_save, sender=Listing)
+def invalidate_linked_promotions(sender, instance, created, **kwargs):
+    if created: return
+    promo_ids = set(
+        Promotion.objects.filter(Q(target_listing=instance) | Q(units__linked_listing=instance)).values_list('id', flat=True)
+    )
+    if promo_ids:
+        bump_version_on_commit('promotions', 'bootstrap')
+        enqueue_purge('promotions', *[f'promo:{pk}' for pk in promo_ids])
+
+@receiver(post_delete, sender=Listing)
+def invalidate_promotions_on_listing_delete(sender, instance, **kwargs):
+    bump_version_on_commit('promotions', 'bootstrap')
+    enqueue_purge('promotions')
+
+# ✅ الصور الجديدة (أو اللي اتغيرت) بتتحسبلها الأبعاد والـ Placeholder في الخلفية
+@receiver(post_save, sender=ListingImage)
+@receiver(post_save, sender=PromotionImage)
+def queue_new_image_metadata(sender, instance, **kwargs):
+    if instance.image and not instance.placeholder:
+        queue_image_metadata(sender, [instance.pk])
@@ -1,3 +1,429 @@
-from django.test import TestCase
+import itertools
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from aqar_core.jobs import start_job
+from aqar_core.models import BackgroundJob, Notification, User, SiteSetting
+from aqar_core.site_settings import invalidate_site_settings
+from .models import (
+    Governorate, City, MajorZone, Category, Feature, Listing, ListingImage, ListingFeature, Favorite,
+    Promotion, PromotionImage, PromotionUnit, Transformation, AnalyticsLog, generate_ref,
+)
+from .admin import ListingImportForm
+from .importers import import_listings
+from .moderation import moderate_listings
+from .placeholders import _download, compute_image_metadata, is_fetchable_url
+from .references import (
+    ReferenceAllocator, allocator, encode_reference, is_valid_reference, legacy_collisions, SPACE,
+)
+
+def _create_geo():
+    gov = Governorate.objects.create(name='القاهرة')
+    city = City.objects.create(name='التجمع', governorate=gov)
+    zone = MajorZone.objects.create(name='الحي الأول', city=city)
+    category = Category.objects.create(name='شقة', slug='flat')
+    return dict(governorate=gov, city=city, major_zone=zone, category=category)
+
+class ReferenceAllocatorTests(TestCase):
+    """أكواد المرجع: نفس الصيغة القديمة + حرف تحقق، ومن غير أي تكرار"""
+
+    def test_codes_are_unique_and_valid(self):
+        codes = [encode_reference(n) for n in range(20000)]
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertTrue(all(is_valid_reference(code) and len(code) == 10 for code in codes))
+        self.assertFalse(is_valid_reference(codes[0][:-1] + ('A' if codes[0][-1] != 'A' else 'B')))
+        with self.assertRaises(OverflowError):
+            encode_reference(SPACE)
+
+    def test_generate_ref_uses_allocator(self):
+        refs = [generate_ref() for _ in range(50)]
+        self.assertEqual(len(set(refs)), 50)
+        self.assertTrue(all(is_valid_reference(ref) for ref in refs))
+
+    def test_legacy_codes_are_skipped(self):
+        geo = _create_geo()
+        legacy = encode_reference(1)
+        Listing.objects.create(title='قديم', price=1, area_sqm=1, description='-', reference_code=legacy, **geo)
+        allocator = ReferenceAllocator(reserve=lambda size: list(range(size)), collisions=legacy_collisions, block_size=5)
+        with self.assertNumQueries(1):  # استعلام واحد للدفعة كلها
+            first = allocator.allocate()
+        rest = [allocator.allocate() for _ in range(3)]
+        self.assertNotIn(legacy, [first, *rest])
+
+    def test_parallel_allocation_in_process(self):
+        counter = itertools.count()
+        lock = threading.Lock()
+        def reserve(size):
+            with lock:
+                return [next(counter) for _ in range(size)]
+        allocator = ReferenceAllocator(reserve=reserve, collisions=lambda codes: set(), block_size=7)
+        results = []
+        def worker():
+            results.extend(allocator.allocate() for _ in range(500))
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(len(results), 8000)
+        self.assertEqual(len(set(results)), 8000)
+
+    def test_promotion_slug_uses_reference(self):
+        promo = Promotion.objects.create(title='عرض', cover_image='promotions/covers/x.jpg')
+        self.assertTrue(is_valid_reference(promo.slug[promo.slug.index('REF-'):]))
+
+@skipUnless(connection.vendor == 'postgresql', "الـ Sequence موجودة على Postgres بس")
+class ParallelListingCreateTests(TransactionTestCase):
+    """إنشاء عقارات بالتوازي من كذا Thread (كل واحد باتصال منفصل) من غير IntegrityError"""
+
+    def test_parallel_creates(self):
+        geo = _create_geo()
+        errors, created = [], []
+        def worker(index):
+            try:
+                for i in range(10):
+                    listing = Listing.objects.create(title=f'عقار {index}-{i}', price=1, area_sqm=1, description='-', **geo)
+                    created.append(listing.reference_code)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(created)), 80)
+        self.assertEqual(Listing.objects.count(), 80)
+
+@override_settings(ROOT_URLCONF='aqar.urls')
+class QueryCountTests(TestCase):
+    """
+    عدد الاستعلامات لكل Endpoint ثابت: نفس الرقم والرد فيه عنصر واحد أو 100 عنصر
+    (أي N+1 جديد في ListingSerializer / PromotionSerializer / FavoriteSerializer بيكسر الاختبارات دي)
+    """
+    SIZES = (1, 100)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.geo = _create_geo()
+        cls.features = Feature.objects.bulk_create([
+            Feature(category=cls.geo['category'], name=f'ميزة {i}', input_type='number') for i in range(3)
+        ])
+        cls.buyer = User.objects.create_user(username='buyer', password='x', phone_number='01011111111')
+        cls.agent = User.objects.create_user(username='agent', password='x', phone_number='01012345678')
+        cls.staff = User.objects.create_user(username='staff', password='x', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        # عداد التطوير (SQLite) بيرجع مع rollback الاختبار، فالدفعة المحجوزة في الذاكرة لازم تترمي
+        allocator._codes.clear()
+        self.client = APIClient()
+
+    def _seed(self, size):
+        """عقارات (بصور ومميزات) في مفضلة المشتري، وعروض (بصور ووحدات) لحد ما كل نوع يبقى size"""
+        start = Listing.objects.count()
+        listings = Listing.objects.bulk_create([
+            Listing(
+                title=f'شقة {i}', slug=f'listing-{i}', price=1000 + i, area_sqm=120, description='-',
+                status='Available', agent=self.agent, thumbnail=f'listings/{i}-0.jpg', **self.geo,
+            )
+            for i in range(start, size)
+        ])
+        ListingImage.objects.bulk_create([
+            ListingImage(listing=listing, image=f'listings/{i}-{n}.jpg', order=n)
+            for i, listing in enumerate(listings, start) for n in range(2)
+        ])
+        ListingFeature.objects.bulk_create([
+            ListingFeature(listing=listing, feature=feature, value='3') for listing in listings for feature in self.features
+        ])
+        Favorite.objects.bulk_create([Favorite(user=self.buyer, listing=listing) for listing in listings])
+        AnalyticsLog.objects.bulk_create([AnalyticsLog(event_type='VIEW_LISTING', listing=listing) for listing in listings])
+
+        promotions = Promotion.objects.bulk_create([
+            Promotion(title=f'عرض {i}', slug=f'promo-{i}', cover_image=f'promotions/covers/{i}.jpg', promo_type='LISTING', target_listing=listing)
+            for i, listing in enumerate(listings, start)
+        ])
+        PromotionImage.objects.bulk_create([PromotionImage(promotion=p, image=f'promotions/gallery/{p.pk}.jpg') for p in promotions])
+        Transformation.objects.bulk_create([
+            Transformation(promotion=p, before_image='promotions/before/x.jpg', after_image='promotions/after/x.jpg') for p in promotions
+        ])
+        PromotionUnit.objects.bulk_create([PromotionUnit(promotion=p, linked_listing=p.target_listing) for p in promotions])
+        Governorate.objects.bulk_create([Governorate(name=f'محافظة {i}') for i in range(start, size)])
+
+    def _assert_constant(self, expected, path, user=None, method='get', data=None):
+        for size in self.SIZES:
+            with self.subTest(size=size):
+                self._seed(size)
+                cache.clear()
+                invalidate_site_settings()  # نسخة الإعدادات اللي في ذاكرة العملية كمان
+                url = path() if callable(path) else path
+                payload = data() if callable(data) else data
+                self.client.force_authenticate(user)
+                with self.assertNumQueries(expected):
+                    response = getattr(self.client, method)(url, payload, format='json')
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertLess(response.status_code, 300)
+
+    def _first_listing(self):
+        return Listing.objects.order_by('pk').values_list('pk', flat=True).first()
+
+    def test_listings(self):
+        self._assert_constant(3, '/listings/')
+        self._assert_constant(6, '/listings/', user=self.buyer)
+        self._assert_constant(4, lambda: f'/listings/{self._first_listing()}/')
+        self._assert_constant(6, lambda: f'/listings/{self._first_listing()}/', user=self.buyer)
+        self._assert_constant(3, '/listings/my_listings/', user=self.agent)
+
+    def test_anonymous_cache_hit(self):
+        # الـ ETag بتاع الزائر من رقم الإصدار، فالرد اللي في الكاش مبيلمسش الداتابيز خالص
+        self._seed(1)
+        self.client.get('/listings/?ordering=price')
+        with self.assertNumQueries(0):
+            response = self.client.get('/listings/?ordering=price')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/listings/?ordering=price', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_bootstrap_settings_are_whitelisted(self):
+        SiteSetting.objects.create(key='maintenance_mode', value='true')
+        SiteSetting.objects.create(key='payment_api_secret', value='sk-123')
+        invalidate_site_settings()
+        settings = self.client.get('/bootstrap/').json()['data']['settings']
+        self.assertIs(settings['maintenance_mode'], True)
+        self.assertEqual(settings['min_app_version'], '')
+        self.assertNotIn('payment_api_secret', settings)
+        self.assertNotIn('slider_limit', settings)
+
+    def test_bootstrap_follows_promotion_schedule(self):
+        now = timezone.now()
+        promo = Promotion.objects.create(
+            title='عرض مجدول', slug='scheduled', cover_image='promotions/covers/s.jpg', promo_type='LISTING',
+            starts_at=now + timedelta(hours=1), ends_at=now + timedelta(hours=3),
+        )
+        ids = lambda response: [p['id'] for p in response.json()['data']['promotions']]
+        before = self.client.get('/bootstrap/')
+        self.assertNotIn(promo.pk, ids(before))
+        # من غير أي تعديل: العرض بيبدأ وبعدين بيخلص والـ Blob المتكيش لازم يتغير معاه
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(hours=2)):
+            during = self.client.get('/bootstrap/')
+        self.assertIn(promo.pk, ids(during))
+        self.assertNotEqual(before['ETag'], during['ETag'])
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(hours=4)):
+            self.assertNotIn(promo.pk, ids(self.client.get('/bootstrap/')))
+
+    def test_export_rejects_invalid_filters(self):
+        # الفلتر الغلط كان بيتشال من الاستعلام فيتصدر الجدول كله
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/exports/users/?joined_from=2024-13-45')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('joined_from', response.json()['fields'])
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'users', '--output', '-', '--filter', 'joined_from=2024-13-45')
+
+    def test_favorites(self):
+        self._assert_constant(4, '/favorites/', user=self.buyer)
+        # عقار مش في مفضلة الوكيل في كل مرة عشان الاتنين يبقوا إضافة
+        fresh = lambda: {'listing_id': Listing.objects.exclude(favorited_by__user=self.agent).values_list('pk', flat=True).first()}
+        self._assert_constant(5, '/favorites/toggle/', user=self.agent, method='post', data=fresh)
+
+    def test_promotions(self):
+        self._assert_constant(4, '/promotions/')
+        self._assert_constant(8, '/promotions/?format=json')
+        self._assert_constant(8, lambda: f'/promotions/{Promotion.objects.values_list("pk", flat=True).first()}/')
+        self._assert_constant(5, '/promotions/slider/')
+
+    def test_reference_data(self):
+        for path in ('/governorates/', '/cities/', '/major-zones/', '/subdivisions/'):
+            self._assert_constant(1, path)
+        self._assert_constant(2, '/categories/')
+        self._assert_constant(2, lambda: f'/categories/{self.geo["category"].pk}/features/')
+        self._assert_constant(12, '/bootstrap/')
+
+    def test_analytics_and_admin(self):
+        self._assert_constant(5, '/analytics/track/', method='post', data={'event_type': 'VIEW', 'target_type': 'listing', 'target_id': 1})
+        self._assert_constant(12, '/analytics/dashboard/', user=self.staff)
+        self._assert_constant(2, '/exports/listings/', user=self.staff)
+
+class ImportListingsTests(TestCase):
+    """استيراد CSV / NDJSON: السطور الصح بتتحفظ (بالصور والمميزات والأرقام الموحدة) والغلط بيترجع برقم سطره"""
+    HEADER = 'title,price,area_sqm,description,governorate,city,major_zone,category,owner_phone,agent,images,feature:حديقة,features\n'
+    ROWS = (
+        'شقة أولى,"1,500,000",120,-,القاهرة,التجمع,الحي الأول,flat,0020 101 111 2222,01012345678,a.jpg|b.jpg|c.jpg,50,\n'
+        'مدينة غلط,100,90,-,القاهرة,الشيخ زايد,الحي الأول,flat,,,,,\n'
+        'سعر غلط,كتير,90,-,القاهرة,التجمع,الحي الأول,شقة,,,,,\n'
+        'شقة تانية,900000,٨٥,-,القاهرة,التجمع,الحي الأول,شقة,٠١٠٩٩٩٩٨٨٨٨,,,,\n'
+        'ميزة غلط,100,90,-,القاهرة,التجمع,الحي الأول,flat,,,,,"{""مسبح"": 1}"\n'
+    )
+
+    def setUp(self):
+        allocator._codes.clear()
+        self.geo = _create_geo()
+        self.garden = Feature.objects.create(category=self.geo['category'], name='حديقة', input_type='number')
+        self.agent = User.objects.create_user(username='agent', password='x', phone_number='+201012345678', is_agent=True)
+
+    def _import(self, body, **kwargs):
+        return import_listings(BytesIO(body.encode()), queue_metadata=False, **kwargs)
+
+    def test_csv_good_and_bad_rows(self):
+        result = self._import(self.HEADER + self.ROWS, chunk_size=1)
+        self.assertEqual((result.total, result.created, result.failed), (5, 2, 3))
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 6])  # الهيدر سطر 1
+        self.assertIn('الشيخ زايد', result.errors[0][1])
+
+        first = Listing.objects.get(title='شقة أولى')
+        self.assertEqual((first.price, first.agent_id, first.thumbnail.name), (Decimal('1500000'), self.agent.pk, 'a.jpg'))
+        self.assertEqual(first.owner_phone_normalized, '+201011112222')
+        self.assertEqual(list(first.images.values_list('image', 'order')), [('a.jpg', 0), ('b.jpg', 1), ('c.jpg', 2)])
+        self.assertEqual(list(ListingFeature.objects.filter(listing=first).values_list('feature_id', 'value')), [(self.garden.pk, '50')])
+        second = Listing.objects.get(title='شقة تانية')
+        self.assertEqual((second.area_sqm, second.owner_phone_normalized), (85, '+201099998888'))
+        self.assertFalse(second.images.exists())
+
+    def test_ndjson_and_dry_run(self):
+        rows = [
+            {'title': 'شقة', 'price': 100, 'area_sqm': 90, 'description': '-', 'governorate': 'القاهرة', 'city': 'التجمع',
+             'major_zone': 'الحي الأول', 'category': 'flat', 'images': ['x.jpg'], 'features': {'حديقة': 20}},
+            'مش JSON',
+            ['مش', 'object'],
+        ]
+        body = '\n'.join(row if isinstance(row, str) else json.dumps(row, ensure_ascii=False) for row in rows)
+        result = self._import(body, fmt='ndjson', dry_run=True)
+        self.assertEqual((result.total, result.created, result.failed), (3, 1, 2))
+        self.assertEqual([line for line, _ in result.errors], [2, 3])
+        self.assertFalse(Listing.objects.exists())
+
+    @override_settings(ADMIN_IMPORT_MAX_ROWS=4)
+    def test_admin_upload_is_capped(self):
+        def form(body):
+            upload = SimpleUploadedFile('listings.csv', body.encode(), content_type='text/csv')
+            return ListingImportForm({'chunk_size': 500}, {'file': upload})
+        self.assertTrue(form(self.HEADER + ''.join(self.ROWS.splitlines(keepends=True)[:4])).is_valid())
+        capped = form(self.HEADER + self.ROWS)
+        self.assertFalse(capped.is_valid())
+        self.assertIn('import_listings', capped.errors['file'][0])
+
+class ModerationJobTests(TestCase):
+    """القبول بالجملة مبيعلقش لو الـ Thread مات: الصغير بيتنفذ في الطلب، والواقف بيتعاد (resume_jobs / Cron)"""
+
+    def setUp(self):
+        allocator._codes.clear()
+        geo = _create_geo()
+        self.agents = [User.objects.create_user(username=f'agent{i}', password='x') for i in range(2)]
+        self.listings = [
+            Listing.objects.create(title=f'شقة {i}', price=1, area_sqm=1, description='-', status='Pending', agent=agent, **geo)
+            for i, agent in enumerate([self.agents[0], self.agents[0], self.agents[1]])
+        ]
+        self.ids = [listing.pk for listing in self.listings]
+
+    def _run(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = start_job('نشر', moderate_listings, self.ids, 'Available', total=3, inline=True, **kwargs)
+        job.refresh_from_db()
+        return job
+
+    def _kill(self, job):
+        """كأن العملية ماتت والمهمة فضلت Running من غير تقدم"""
+        BackgroundJob.objects.filter(pk=job.pk).update(status='Running', updated_at=timezone.now() - timedelta(hours=1))
+
+    def _notified(self):
+        return sorted(Notification.objects.filter(notification_type='Listing').values_list('user__username', 'message'))
+
+    def test_inline_job_runs_in_request(self):
+        job = self._run()
+        self.assertEqual(job.status, 'Done')
+        self.assertEqual(job.result['updated'], 3)
+        self.assertEqual(job.task, 'aqar.moderation.moderate_listings')
+        self.assertFalse(Listing.objects.filter(pk__in=self.ids).exclude(status='Available').exists())
+        self.assertEqual([name for name, _ in self._notified()], ['agent0', 'agent1'])
+
+    def test_resume_after_chunks_notifies_every_agent(self):
+        # الدفعات اتنفذت والعملية ماتت قبل الإشعارات
+        with mock.patch.object(Notification.objects, 'bulk_create', side_effect=RuntimeError):
+            job = self._run()
+        self.assertFalse(Listing.objects.filter(pk__in=self.ids).exclude(status='Available').exists())
+        self._kill(job)
+
+        call_command('resume_jobs', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Done')
+        self.assertEqual(job.result['updated'], 3)  # من القائمة الأصلية مش من اللي فاضل
+        self.assertEqual(job.result['agents_notified'], 2)
+        self.assertEqual(self._notified(), [
+            ('agent0', 'تمت مراجعة ونشر 2 إعلان من إعلاناتك.'), ('agent1', 'تمت مراجعة ونشر 1 إعلان من إعلاناتك.'),
+        ])
+
+    def test_resume_after_notifications_does_not_repeat_them(self):
+        with mock.patch('aqar.moderation.send_push_batch', side_effect=RuntimeError):
+            job = self._run()
+        self._kill(job)
+        with mock.patch('aqar.moderation.send_push_batch', return_value=(2, 0)) as push:
+            call_command('resume_jobs', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Done')
+        self.assertEqual(job.result['push_sent'], 2)
+        push.assert_called_once()
+        self.assertEqual(len(self._notified()), 2)
+
+    def test_fresh_jobs_are_left_alone(self):
+        with mock.patch('aqar_core.jobs.run_after_commit'):
+            job = start_job('تعليق', moderate_listings, self.ids, 'Available', total=3)
+        call_command('resume_jobs', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Pending')
+
+    @override_settings(ROOT_URLCONF='backend.urls', CRON_SECRET='cron-secret')
+    def test_vercel_cron_resumes_stale_jobs(self):
+        with mock.patch('aqar_core.jobs.run_after_commit'):
+            job = start_job('نشر', moderate_listings, self.ids, 'Available', total=3)
+        self._kill(job)
+        self.assertEqual(self.client.get('/cron/resume-jobs/').status_code, 403)
+        self.assertEqual(self.client.get('/cron/resume-jobs/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get('/cron/resume-jobs/', HTTP_AUTHORIZATION='Bearer cron-secret')
+        self.assertEqual(response.json(), {'stale': 1, 'resumed': 1})
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Done')
+
+@override_settings(IMAGE_FETCH_HOSTS=('res.cloudinary.com',), CLOUDINARY_STORAGE={'CLOUD_NAME': 'rawasi', 'API_KEY': 'key', 'API_SECRET': 'secret'})
+class PlaceholderFetchTests(SimpleTestCase):
+    """الـ BlurHash بيحمل من Cloudinary بتاعنا بس (SSRF) وبحد أقصى للحجم"""
+
+    def test_fetchable_urls(self):
+        self.assertTrue(is_fetchable_url('https://res.cloudinary.com/rawasi/image/upload/v1/listings/a.jpg'))
+        for url in (
+            'http://169.254.169.254/latest/meta-data/',
+            'http://localhost:8000/media/a.jpg',
+            'https://res.cloudinary.com/other-cloud/image/upload/a.jpg',
+            'https://res.cloudinary.com:8443/rawasi/image/upload/a.jpg',
+            'https://user@res.cloudinary.com/rawasi/image/upload/a.jpg',
+            'https://res.cloudinary.com.evil.test/rawasi/image/upload/a.jpg',
+            'file:///etc/passwd',
+        ):
+            with self.subTest(url):
+                self.assertFalse(is_fetchable_url(url))
+
+    @mock.patch('aqar.placeholders.requests.get')
+    def test_external_images_are_not_fetched(self, get):
+        external = mock.Mock()
+        external.name = 'http://10.0.0.1/internal/a.jpg'  # رابط من external_images
+        self.assertIsNone(compute_image_metadata(external))
+        get.assert_not_called()
+
+    @mock.patch('aqar.placeholders.MAX_DOWNLOAD_BYTES', 1024)
+    @mock.patch('aqar.placeholders.requests.get')
+    def test_download_size_limit(self, get):
+        response = get.return_value.__enter__.return_value
+        response.status_code = 200
+        response.headers = {}
+        response.iter_content.return_value = iter([b'x' * 600, b'x' * 600])
+        with self.assertRaises(ValueError):
+            _download('https://res.cloudinary.com/rawasi/image/upload/a.jpg')
+        self.assertIs(get.call_args.kwargs['allow_redirects'], False)
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     ListingViewSet, GovernorateViewSet, CityViewSet, 
     MajorZoneViewSet, SubdivisionViewSet, CategoryViewSet, 
-    FavoriteViewSet, PromotionViewSet , track_analytics, get_dashboard_stats
+    FavoriteViewSet, PromotionViewSet , track_analytics, get_dashboard_stats, app_bootstrap, export_data
 )
 
 app_name = 'aqar' # ✅ إضافة مهمة عشان الـ Reverse URL
@@ -20,6 +20,8 @@ router.register(r'favorites', FavoriteViewSet, basename='favorite')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('bootstrap/', app_bootstrap, name='bootstrap'),
     path('analytics/track/', track_analytics, name='track-analytics'),
     path('analytics/dashboard/', get_dashboard_stats, name='dashboard-stats'),
+    path('exports/<str:dataset>/', export_data, name='export-data'),
 ]
\ No newline at end of file
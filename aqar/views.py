@@ -1,53 +1,88 @@
 from rest_framework import viewsets, permissions, filters, status
-from rest_framework.authentication import TokenAuthentication, SessionAuthentication
-from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser, BasePermission, SAFE_METHODS
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, F, Count, Sum
+from django.db.models import Q, F, Count, Sum, Max, Prefetch
 from django.db import transaction
+from django.utils import timezone
 from .models import *
 from .serializers import *
 from .filters import ListingFilter
+from .bootstrap import get_bootstrap_blob, build_bootstrap_diff
+from .promotions import get_active_promotions, select_promotions, active_promotions_queryset, prefetch_promotions
+from .exporters import EXPORTERS, FORMATS, streaming_export_response
+from django.http import HttpResponse, HttpResponseNotModified
+from aqar_core.caching import AnonymousResponseCacheMixin, ConditionalGetMixin, VersionedConditionalGetMixin, get_version
+from aqar_core.cdn import EdgeCacheMixin, response_object_ids
+from aqar_core.instrumentation import query_budget
+from aqar_core.site_settings import get_setting
 
 # --- ViewSets الجغرافية ---
-class GovernorateViewSet(viewsets.ReadOnlyModelViewSet):
+class GeoEdgeCacheMixin(EdgeCacheMixin):
+    # الجغرافيا نادراً ما تتغير، فنخليها ساعة على الـ CDN
+    edge_cache_s_maxage = 3600
+    edge_cache_stale_while_revalidate = 86400
+
+    def get_surrogate_keys(self, request, response):
+        return ['geo']
+
+class GovernorateViewSet(GeoEdgeCacheMixin, VersionedConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    conditional_namespace = 'geo'
+    query_budget = 3
     queryset = Governorate.objects.all()
     serializer_class = GovernorateSerializer
     pagination_class = None
 
-class CityViewSet(viewsets.ReadOnlyModelViewSet):
+class CityViewSet(GeoEdgeCacheMixin, VersionedConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    conditional_namespace = 'geo'
+    query_budget = 3
     queryset = City.objects.select_related('governorate').all()
     serializer_class = CitySerializer
     pagination_class = None
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['governorate']
 
-class MajorZoneViewSet(viewsets.ReadOnlyModelViewSet):
+class MajorZoneViewSet(GeoEdgeCacheMixin, VersionedConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    conditional_namespace = 'geo'
+    query_budget = 3
     queryset = MajorZone.objects.select_related('city').all()
     serializer_class = MajorZoneSerializer
     pagination_class = None
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['city']
 
-class SubdivisionViewSet(viewsets.ReadOnlyModelViewSet):
+class SubdivisionViewSet(GeoEdgeCacheMixin, VersionedConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    conditional_namespace = 'geo'
+    query_budget = 3
     queryset = Subdivision.objects.select_related('major_zone').all()
     serializer_class = SubdivisionSerializer
     pagination_class = None
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['major_zone']
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(EdgeCacheMixin, VersionedConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.prefetch_related('allowed_features').all()
     serializer_class = CategorySerializer
     pagination_class = None
+    conditional_namespace = 'categories'
+    conditional_actions = ('list', 'retrieve', 'features')
+    edge_cache_actions = ('list', 'retrieve', 'features')
+    query_budget = 4
+    edge_cache_s_maxage = 300
+    edge_cache_stale_while_revalidate = 3600
+
+    def get_surrogate_keys(self, request, response):
+        return ['categories']
     
     @action(detail=True, methods=['get'])
     def features(self, request, pk=None):
-        category = self.get_object()
-        serializer = FeatureSerializer(category.allowed_features.all(), many=True)
-        return Response(serializer.data)
+        def build(request, *args, **kwargs):
+            category = self.get_object()
+            serializer = FeatureSerializer(category.allowed_features.all(), many=True)
+            return Response(serializer.data)
+        return self._conditional_response(request, build)
 
 # --- الصلاحيات ---
 class IsOwnerOrReadOnly(BasePermission):
@@ -56,25 +91,26 @@ class IsOwnerOrReadOnly(BasePermission):
         return obj.agent == request.user or request.user.is_staff
 
 # --- Listing ViewSet (محسن للأداء) ---
-class ListingViewSet(viewsets.ModelViewSet):
+class ListingViewSet(EdgeCacheMixin, ConditionalGetMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet):
     serializer_class = ListingSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = ListingFilter
     search_fields = ['title', 'description', 'reference_code', 'project_name']
     ordering_fields = ['price', 'created_at', 'area_sqm', 'views_count']
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    # ⚡ كاش البحث للزوار (بيتلغي تلقائياً مع أي تعديل من aqar/signals.py)
+    response_cache_namespace = 'listings'
+    edge_cache_s_maxage = 60
+    edge_cache_stale_while_revalidate = 300
+    # 📊 أقصى عدد استعلامات (aqar_core/instrumentation.py): ثابت مهما كان حجم الصفحة
+    query_budget = {'list': 8, 'retrieve': 8, 'my_listings': 6}
 
     def get_queryset(self):
         user = self.request.user
         
         # 🚀 Eager Loading: جلب كل البيانات دفعة واحدة لمنع N+1 Problem
-        queryset = Listing.objects.select_related(
-            'governorate', 'city', 'category', 'agent', 'major_zone', 'subdivision'
-        ).prefetch_related(
-            'images',           
-            'features_values',  
-            'features_values__feature' 
-        )
+        # (من غير annotation المفضلة عشان متدخلش في aggregate بتاع الـ ETag، و is_favorite بياخد مفضلة المستخدم في استعلام واحد)
+        queryset = prefetch_listings(Listing.objects.all())
 
         # منطق الفلترة (مين يشوف إيه)
         if self.action in ['retrieve', 'update', 'partial_update', 'destroy']:
@@ -122,6 +158,48 @@ class ListingViewSet(viewsets.ModelViewSet):
         # ✅ distinct ضروري جداً هنا لمنع تكرار النتائج بعد الفلترة المعقدة
         return queryset.distinct().order_by('-created_at')
 
+    # --- Conditional GET: بصمة رخيصة قبل أي serialization ---
+    def get_etag_fingerprint(self, request):
+        if self.action == 'retrieve':
+            state = self._get_retrieve_state()
+            if state is None: return None
+            parts = (state,)
+        elif not request.user.is_authenticated:
+            # الزائر: رقم الإصدار كفاية (أي تعديل في العقارات بيزوده - aqar/signals.py)، والباراميترات جوه الـ ETag أصلاً
+            # كده الطلب اللي عليه كاش (AnonymousResponseCacheMixin) مبيعملش ولا استعلام
+            parts = ()
+        else:
+            queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by()
+            stats = queryset.aggregate(last=Max('updated_at'), total=Count('id'))
+            parts = (stats['last'], stats['total'])
+
+        # الصور والمميزات وأسماء الجغرافيا مش بتغير updated_at بتاع العقار، فبنضيف رقم الإصدار
+        parts += (get_version('listings'),)
+
+        # is_favorite بيختلف من مستخدم للتاني
+        if request.user.is_authenticated:
+            favs = Favorite.objects.filter(user=request.user).aggregate(last=Max('created_at'), total=Count('id'))
+            parts += (request.user.pk, favs['last'], favs['total'])
+        return parts
+
+    def get_surrogate_keys(self, request, response):
+        if self.action == 'retrieve':
+            return [f'listing:{self.kwargs.get("pk")}']
+        return ['listings']
+
+    def get_last_modified(self, request):
+        if self.action == 'retrieve':
+            return self._get_retrieve_state()
+        return None
+
+    def _get_retrieve_state(self):
+        if not hasattr(self, '_retrieve_state'):
+            pk = str(self.kwargs.get('pk', ''))
+            self._retrieve_state = None
+            if pk.isdigit():
+                self._retrieve_state = self.get_queryset().prefetch_related(None).filter(pk=pk).values_list('updated_at', flat=True).first()
+        return self._retrieve_state
+
     def perform_create(self, serializer):
         user = self.request.user
         # الأدمن ينشر فوراً، المستخدم العادي "قيد المراجعة"
@@ -149,9 +227,7 @@ class ListingViewSet(viewsets.ModelViewSet):
         if not request.user.is_authenticated:
             return Response({'detail': 'غير مصرح'}, status=401)
         
-        listings = Listing.objects.filter(agent=request.user).select_related(
-            'governorate', 'city', 'category'
-        ).prefetch_related('images').order_by('-created_at')
+        listings = prefetch_listings(Listing.objects.filter(agent=request.user), request.user).order_by('-created_at')
         
         page = self.paginate_queryset(listings)
         if page is not None:
@@ -165,11 +241,12 @@ class ListingViewSet(viewsets.ModelViewSet):
 class FavoriteViewSet(viewsets.GenericViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = FavoriteSerializer 
+    query_budget = {'list': 5, 'toggle': 6}
     
     def list(self, request):
-        favorites = Favorite.objects.filter(user=request.user).select_related(
-            'listing', 'listing__city', 'listing__governorate'
-        ).prefetch_related('listing__images')
+        favorites = Favorite.objects.filter(user=request.user).prefetch_related(
+            Prefetch('listing', queryset=prefetch_listings(Listing.objects.all(), request.user))
+        )
         
         # التعامل مع حالة أن العقار قد يكون محذوفاً ولكن في المفضلة
         valid_favorites = [f for f in favorites if f.listing] 
@@ -189,16 +266,92 @@ class FavoriteViewSet(viewsets.GenericViewSet):
         return Response({'status': 'added', 'is_favorite': True})
 
 # --- العروض الترويجية ---
-class PromotionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Promotion.objects.filter(is_active=True).order_by('display_order', '-created_at')
+class PromotionViewSet(EdgeCacheMixin, VersionedConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    # 🚀 كل العلاقات (الصور، التحولات، الوحدات والعقار المرتبط) بتتجاب مقدماً
+    queryset = active_promotions_queryset()
     serializer_class = PromotionSerializer
     permission_classes = [permissions.AllowAny]
+    conditional_namespace = 'promotions'
+    edge_cache_s_maxage = 60
+    edge_cache_stale_while_revalidate = 600
+    query_budget = {'list': 10, 'retrieve': 10, 'slider': 6}
+
+    FEED_FILTERS = {'slug', 'promo_type', 'is_active'}
+
+    def get_queryset(self):
+        # احترام نافذة الجدولة (starts_at / ends_at)
+        now = timezone.now()
+        return super().get_queryset().filter(
+            Q(starts_at__isnull=True) | Q(starts_at__lte=now),
+            Q(ends_at__isnull=True) | Q(ends_at__gt=now),
+        )
+
+    def get_surrogate_keys(self, request, response):
+        return ['promotions'] + [f'promo:{pk}' for pk in response_object_ids(response)]
+
+    def get_etag_fingerprint(self, request):
+        # العروض بتدخل وتخرج حسب الجدولة من غير أي تعديل، فبنضيف العروض النشطة حالياً للبصمة
+        return super().get_etag_fingerprint(request) + (tuple(p['id'] for p in get_active_promotions()),)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(request, self._list_from_feed, *args, **kwargs)
+
+    def _list_from_feed(self, request, *args, **kwargs):
+        # ⚡ السلايدر بيترجع من الفيد الجاهز في الكاش من غير ولا استعلام
+        params = request.query_params
+        if not set(params.keys()) <= self.FEED_FILTERS:
+            return super().list(request, *args, **kwargs)
+
+        feed = get_active_promotions()
+        if params.get('is_active', '').lower() in ('false', '0'):
+            feed = []
+        if params.get('slug'):
+            feed = [p for p in feed if p['slug'] == params['slug']]
+        if params.get('promo_type'):
+            feed = [p for p in feed if p['promo_type'] == params['promo_type']]
+        return Response(feed)
+
+    @action(detail=False, methods=['get'])
+    def slider(self, request):
+        """
+        عروض السلايدر بالتدوير الموزون مع احترام الحد اليومي للظهور (?limit=5)
+        """
+        limit = request.query_params.get('limit')
+        selected = select_promotions(int(limit) if limit and limit.isdigit() else get_setting('slider_limit'))
+        response = Response(selected)
+        response['Cache-Control'] = 'no-store'  # كل طلب ليه ترتيب مختلف
+        return response
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['slug', 'promo_type', 'is_active']
 
+# --- ✅ بيانات بداية التطبيق (Bootstrap) ---
+@query_budget(14)  # بناء الـ Blob من جديد (أول طلب بعد أي تعديل)، غير كده من الكاش
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def app_bootstrap(request):
+    """
+    كل الإعدادات الثابتة (التصنيفات، الجغرافيا، التواصل، العروض) في رد واحد.
+    العميل يبعت الـ hash اللي عنده (?hash= أو If-None-Match):
+    - لو زي الحالي: 304
+    - لو نسخة قديمة نعرفها: الأقسام اللي اتغيرت بس
+    - غير كده: الرد الكامل (محفوظ جاهز في الكاش)
+    """
+    blob = get_bootstrap_blob()
+    etag = f'"{blob["hash"]}"'
+    client_hash = request.query_params.get('hash') or request.META.get('HTTP_IF_NONE_MATCH', '').replace('W/', '').strip('" ')
+
+    if client_hash == blob['hash']:
+        response = HttpResponseNotModified()
+    elif client_hash and (diff := build_bootstrap_diff(blob, client_hash)) is not None:
+        response = Response(diff)
+    else:
+        response = HttpResponse(blob['body'], content_type='application/json')
+    response['ETag'] = etag
+    return response
+
 # --- ✅ نظام التحليلات المتطور (Atomic Updates) ---
+@query_budget(6)
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication, SessionAuthentication])
 @permission_classes([AllowAny])
 def track_analytics(request):
     """
@@ -251,18 +404,20 @@ def track_analytics(request):
     return Response({'status': 'tracked'})
 
 # --- لوحة تحكم الأدمن (Dashboard) ---
+@query_budget(14)
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def get_dashboard_stats(request):
     # 1. إحصائيات عامة
-    total_listings = Listing.objects.count()
+    listing_stats = Listing.objects.aggregate(total=Count('id'), views=Sum('views_count'))
+    total_listings = listing_stats['total']
     total_users = User.objects.count()
-    total_views = Listing.objects.aggregate(Sum('views_count'))['views_count__sum'] or 0
+    total_views = listing_stats['views'] or 0
     
     # 2. القوائم الأكثر تفاعلاً
-    top_viewed_listings = Listing.objects.order_by('-views_count')[:5]
-    top_contacted_listings = Listing.objects.order_by('-whatsapp_clicks')[:5]
-    top_promos = Promotion.objects.order_by('-clicks_count')[:5]
+    top_viewed_listings = prefetch_listings(Listing.objects.order_by('-views_count'))[:5]
+    top_contacted_listings = prefetch_listings(Listing.objects.order_by('-whatsapp_clicks'))[:5]
+    top_promos = prefetch_promotions(Promotion.objects.order_by('-clicks_count'))[:5]
     
     return Response({
         'stats': {
@@ -273,4 +428,24 @@ def get_dashboard_stats(request):
         'top_viewed_listings': ListingSerializer(top_viewed_listings, many=True).data,
         'top_contacted_listings': ListingSerializer(top_contacted_listings, many=True).data,
         'top_promos': PromotionSerializer(top_promos, many=True).data
-    })
\ No newline at end of file
+    })
+
+# --- تصدير البيانات (CSV / NDJSON) كـ Stream ---
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_data(request, dataset):
+    """
+    /exports/listings/?fmt=csv&gzip=1&status=Published
+    الفلاتر نفس فلاتر الـ API ولوحة التحكم (aqar/filters.py)
+    ⚠️ fmt مش format عشان DRF بيستخدم format لاختيار الـ Renderer
+    """
+    if dataset not in EXPORTERS:
+        return Response({'error': 'نوع التصدير غير معروف', 'available': list(EXPORTERS)}, status=status.HTTP_404_NOT_FOUND)
+    fmt = request.query_params.get('fmt', 'csv')
+    if fmt not in FORMATS:
+        return Response({'error': 'الصيغة لازم تكون csv أو ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+    exporter = EXPORTERS[dataset](request.query_params)
+    if exporter.errors:
+        return Response({'error': 'فلاتر غير صالحة', 'fields': exporter.errors}, status=status.HTTP_400_BAD_REQUEST)
+    compress = request.query_params.get('gzip') in ('1', 'true')
+    return streaming_export_response(exporter, fmt, compress)
@@ -4,7 +4,10 @@ from django.shortcuts import render, redirect
 from django import forms
 from django.contrib import messages
 from django.contrib.admin import helpers 
-from .models import User, Notification, SiteSetting, Announcement, ContactInfo
+from django.utils.html import format_html
+from .models import User, Notification, SiteSetting, Announcement, ContactInfo, BackgroundJob
+from .admin_tools import LargeTableAdminMixin, PhoneSearchMixin
+from .jobs import resumable_jobs, resume_job
 
 # محاولة استيراد FCM لتجنب توقف الأدمن إذا لم يكن الملف جاهزاً
 try:
@@ -19,10 +22,11 @@ class BroadcastForm(forms.Form):
     message = forms.CharField(widget=forms.Textarea(attrs={'rows': 4, 'class': 'vLargeTextField', 'placeholder': 'اكتب نص الرسالة هنا...'}), label="نص الرسالة")
 
 # 2. تخصيص لوحة المستخدمين
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(PhoneSearchMixin, UserAdmin):
     list_display = ('username', 'phone_number', 'client_type', 'is_agent', 'is_staff', 'date_joined')
     list_filter = ('client_type', 'is_staff', 'is_active', 'is_agent')
-    search_fields = ('username', 'phone_number', 'first_name', 'email')
+    search_fields = ('username', 'first_name', 'email')
+    phone_search_fields = ('phone_normalized',)
     ordering = ('-date_joined',)
     
     fieldsets = UserAdmin.fieldsets + (
@@ -90,11 +94,13 @@ class CustomUserAdmin(UserAdmin):
 
 # 3. لوحة الإشعارات
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(PhoneSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'user', 'notification_type', 'is_read', 'created_at')
-    list_filter = ('notification_type', 'is_read')
-    search_fields = ('title', 'user__username', 'user__phone_number')
-    date_hierarchy = 'created_at'
+    # created_at كفلتر مدى (بيستخدم الـ Index) بدل date_hierarchy اللي بيعمل DISTINCT على الجدول كله
+    list_filter = ('notification_type', 'is_read', 'created_at')
+    list_select_related = ('user',)
+    search_fields = ('title', 'user__username')
+    phone_search_fields = ('user__phone_normalized',)
 
 # 4. الإعلانات الإدارية (البرودكاست العام)
 @admin.register(Announcement)
@@ -157,4 +163,37 @@ class SiteSettingAdmin(admin.ModelAdmin):
         return obj.value[:50] + "..." if len(obj.value) > 50 else obj.value
     value_preview.short_description = "القيمة"
 
+# 5. المهام الخلفية (قبول/تعليق العقارات بالجملة وغيرها) - للمتابعة بس
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'progress_bar', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    list_select_related = ('created_by',)
+    readonly_fields = ('name', 'status', 'progress_bar', 'total', 'processed', 'result', 'error', 'created_by', 'created_at', 'started_at', 'finished_at')
+    fields = readonly_fields
+    actions = ['resume_jobs']
+
+    # 🔁 المهام اللي الـ Thread بتاعها مات (السيرفرليس) بتتعاد هنا جوه الطلب (أو بأمر resume_jobs)
+    def resume_jobs(self, request, queryset):
+        jobs = resumable_jobs(failed=True).filter(pk__in=queryset.values('pk'))
+        resumed = sum(resume_job(job) for job in jobs)
+        skipped = queryset.count() - resumed
+        self.message_user(request, f"🔁 اتعاد تشغيل {resumed} مهمة" + (f"، و{skipped} لسه شغالة أو خلصت" if skipped else ""))
+    resume_jobs.short_description = "🔁 إعادة تشغيل المهام الواقفة / الفاشلة"
+
+    def progress_bar(self, obj):
+        color = {'Failed': '#e53935', 'Done': '#43a047'}.get(obj.status, '#1e88e5')
+        return format_html(
+            '<div style="width:160px; background:#eee; border-radius:4px;"><div style="width:{}%; background:{}; color:#fff; padding:2px 4px; border-radius:4px; white-space:nowrap;">{}%</div></div>'
+            '<small>{} / {}</small>',
+            obj.progress, color, obj.progress, obj.processed, obj.total,
+        )
+    progress_bar.short_description = "التقدم"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 admin.site.register(User, CustomUserAdmin)
\ No newline at end of file
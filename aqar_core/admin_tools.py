@@ -0,0 +1,116 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+from .caching import get_or_build
+from .phones import looks_like_phone, normalize_phone
+
+# ==========================================
+# لوحة التحكم للجداول الكبيرة (ملايين الصفوف)
+# ==========================================
+# 1. عدد تقريبي من إحصائيات Postgres بدل COUNT(*) فوق حد معين
+# 2. البحث في الحقول المرتبطة (user__username) بـ Subquery على الجدول المرتبط (بالـ Trigram Index)
+#    وبعدين يفلتر بالـ FK، بدل OR على JOIN مبيستخدمش أي Index (ومن غير حد أقصى للنتايج)
+# 3. اختيارات فلتر "المرتبط فقط" بتتحسب مرة كل فترة بدل DISTINCT على الجدول كله في كل صفحة
+# 4. البحث برقم تليفون بيضيف مطابقة تامة على الأعمدة الموحدة (phone_search_fields) جنب البحث العادي
+
+def estimate_count(queryset):
+    """عدد تقريبي (Postgres بس): pg_class لو مفيش فلاتر، وإلا تقدير الـ Planner. None لو مش متاح"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # -1 = الجدول لسه ما اتعملوش ANALYZE
+            return row[0] if row and row[0] >= 0 else None
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+class EstimatedCountPaginator(Paginator):
+    """
+    فوق ADMIN_ESTIMATED_COUNT_THRESHOLD بنعرض العدد التقريبي (الصفحات الأخيرة ممكن تطلع فاضية وده مقبول)
+    وتحته بنعد بالظبط عشان الأرقام الصغيرة تبقى مظبوطة
+    """
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 100_000):
+                return estimate
+        return super().count
+
+class CachedRelatedOnlyFieldListFilter(admin.RelatedOnlyFieldListFilter):
+    """RelatedOnlyFieldListFilter بس الاختيارات متكيشة (المستخدمين الجداد بيظهروا بعد انتهاء الكاش)"""
+    def field_choices(self, field, request, model_admin):
+        key = f'admin_filter_choices_{model_admin.model._meta.label_lower}_{self.field_path}'
+        timeout = getattr(settings, 'ADMIN_FILTER_CHOICES_TIMEOUT', 600)
+        return get_or_build(key, lambda: list(super(CachedRelatedOnlyFieldListFilter, self).field_choices(field, request, model_admin)), timeout=timeout)
+
+class LargeTableAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # مفيش COUNT(*) تاني للجدول كله جنب نتيجة البحث
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        # البحث المتقدم (^ = @) أو العلاقات المتداخلة بيروح للطريقة الافتراضية
+        if not search_term or not search_fields or any(f[0] in '^=@' or f.count('__') > 1 for f in search_fields):
+            return super().get_search_results(request, queryset, search_term)
+
+        local, related = [], defaultdict(list)
+        for name in search_fields:
+            if '__' in name:
+                relation, _, field = name.partition('__')
+                related[relation].append(field)
+            else:
+                local.append(name)
+
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            condition = Q()
+            for name in local:
+                condition |= Q(**{f'{name}__icontains': bit})
+            for relation, fields in related.items():
+                model = self.model._meta.get_field(relation).related_model
+                related_condition = Q()
+                for field in fields:
+                    related_condition |= Q(**{f'{field}__icontains': bit})
+                # Semi-join في Postgres: الـ Subquery بيستخدم الـ Trigram Index والنتيجة كاملة مهما كان عددها
+                condition |= Q(**{f'{relation}__in': model._default_manager.filter(related_condition).values('pk')})
+            queryset = queryset.filter(condition) if condition else queryset.none()
+        return queryset, False
+
+class PhoneSearchMixin:
+    """
+    phone_search_fields: أعمدة الرقم الموحد (E.164) - محلية أو مرتبطة بخطوة واحدة (agent__phone_normalized)
+    لو كلمة البحث شكلها رقم تليفون بأي صيغة، المطابقة التامة عليها بتتضاف (OR) للبحث العادي
+    (عشان رقم في العنوان أو كود المرجع يفضل بيتلاقي)
+    """
+    phone_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not self.phone_search_fields or not looks_like_phone(search_term):
+            return results, may_have_duplicates
+        phone = normalize_phone(search_term)
+        condition = Q()
+        for name in self.phone_search_fields:
+            if '__' in name:
+                relation, _, field = name.partition('__')
+                model = self.model._meta.get_field(relation).related_model
+                condition |= Q(**{f'{relation}__in': model._default_manager.filter(**{field: phone}).values('pk')})
+            else:
+                condition |= Q(**{name: phone})
+        return results | queryset.filter(condition), may_have_duplicates
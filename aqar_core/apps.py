@@ -6,4 +6,5 @@ class AqarCoreConfig(AppConfig):
     name = 'aqar_core'
     def ready(self):
         # تفعيل الإشارات عند بدء التطبيق
-        import aqar_core.signals
\ No newline at end of file
+        import aqar_core.signals
+        import aqar_core.checks  # تسجيل الـ System Checks
\ No newline at end of file
@@ -0,0 +1,86 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+# ==========================================
+# التوثيق من غير استعلام داتابيز لكل طلب
+# ==========================================
+# 1. CachedTokenAuthentication: نفس توكن DRF، بس (التوكن + المستخدم) متكيشين لفترة قصيرة
+#    وبيتمسحوا عند الخروج (حذف التوكن) أو أي تعديل في المستخدم (كلمة السر، التفعيل، ...) - aqar_core/signals.py
+# 2. StatelessJWTAuthentication (اختياري - JWT_AUTH_ENABLED): المستخدم بيتبني من الـ Claims اللي في التوكن نفسه
+
+def _token_cache_key(key):
+    # مبنخزنش التوكن نفسه كمفتاح في الكاش
+    return 'auth_token_' + hashlib.sha256(key.encode()).hexdigest()[:40]
+
+def _user_cache_key(user_id):
+    # توكن DRF واحد لكل مستخدم: بنحفظ مفتاحه عشان نمسحه من غير استعلام
+    return f'auth_token_user_{user_id}'
+
+def invalidate_token_cache(*keys):
+    cache.delete_many([_token_cache_key(key) for key in keys if key])
+
+def invalidate_user_token_cache(user_id):
+    cache_key = cache.get(_user_cache_key(user_id))
+    if cache_key:
+        cache.delete_many([cache_key, _user_cache_key(user_id)])
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache_key = _token_cache_key(key)
+        entry = cache.get(cache_key)
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            timeout = getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 60)
+            cache.set_many({cache_key: (user, token), _user_cache_key(user.pk): cache_key}, timeout)
+            return user, token
+        user, token = entry
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return user, token
+
+# --- JWT (djoser: /auth/jwt/create/ و /auth/jwt/refresh/) ---
+# الحقول اللي بتتحط في التوكن وبيتبني منها المستخدم (باقي الحقول بتتحمل من الداتابيز لو اتطلبت بس)
+JWT_USER_CLAIMS = ('username', 'is_active', 'is_staff', 'is_superuser', 'is_agent')
+
+try:
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken
+    from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+    from rest_framework_simplejwt.settings import api_settings as jwt_settings
+except ImportError:
+    JWTAuthentication = TokenObtainPairSerializer = None
+
+if JWTAuthentication is not None:
+    class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+        @classmethod
+        def get_token(cls, user):
+            token = super().get_token(user)
+            for claim in JWT_USER_CLAIMS:
+                token[claim] = getattr(user, claim)
+            return token
+
+    class StatelessJWTAuthentication(JWTAuthentication):
+        """
+        بدل User.objects.get: المستخدم بيتبني بـ from_db من الـ Claims والباقي Deferred
+        (request.user.phone_number مثلاً بيعمل استعلام وقت ما يتطلب بس، و save() بيكتب الحقول المحملة بس)
+        """
+        def get_user(self, validated_token):
+            try:
+                claims = {'id': int(validated_token[jwt_settings.USER_ID_CLAIM])}
+                claims.update((claim, validated_token[claim]) for claim in JWT_USER_CLAIMS)
+            except (KeyError, ValueError):
+                raise InvalidToken(_('Token contained no recognizable user identification'))
+            User = get_user_model()
+            # from_db محتاج القيم بترتيب الحقول في الموديل
+            fields = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+            user = User.from_db(DEFAULT_DB_ALIAS, fields, [claims[name] for name in fields])
+            if not user.is_active:
+                raise exceptions.AuthenticationFailed(_('User is inactive'), code='user_inactive')
+            return user
@@ -0,0 +1,208 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from .instrumentation import record_cache
+
+# ==========================================
+# كاش على مستويين (Two-Level Cache) للسيرفرات الـ Serverless
+# ==========================================
+# L1: ذاكرة صغيرة داخل العملية نفسها (LRU) بعمر قصير جداً
+# L2: كاش مشترك بين كل السيرفرات (جدول في الداتابيز / ملفات / Redis)
+# القراءة من L1 الأول، ولو مش موجود نروح L2 ونحفظ النتيجة في L1.
+# الكتابة بتروح للاتنين (Write-Through)، فالسيرفر اللي كتب بيشوف التعديل فوراً،
+# والسيرفرات التانية بتشوفه بعد L1_TIMEOUT ثانية بالكتير.
+
+_MISSING = object()
+
+class LRUStore:
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires, payload = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout=None):
+        if self.max_entries <= 0:
+            return
+        ttl = self.timeout if timeout is None else min(self.timeout, timeout)
+        if ttl <= 0:
+            self.delete(key)
+            return
+        # بنخزن نسخة pickled عشان محدش يعدل على القيمة المخزنة بالغلط
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class TieredCache(BaseCache):
+    """
+    LOCATION = اسم الكاش المشترك (L2) في CACHES
+    OPTIONS:
+        L1_MAX_ENTRIES: عدد العناصر في ذاكرة العملية (0 = إيقاف L1)
+        L1_TIMEOUT: أقصى عمر بالثواني للعنصر في L1
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = location or 'shared'
+        self._l2_backend = None
+        self._l1 = LRUStore(int(options.get('L1_MAX_ENTRIES', 512)), float(options.get('L1_TIMEOUT', 5)))
+        self._stats_lock = threading.Lock()
+        self._stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'sets': 0}
+
+    @classmethod
+    def wrap(cls, l2_backend, **options):
+        """بناء كاش مجمع فوق backend جاهز (للاختبارات والـ benchmark)"""
+        tiered = cls(None, {'OPTIONS': options})
+        tiered._l2_backend = l2_backend
+        return tiered
+
+    @property
+    def l2(self):
+        return self._l2_backend or caches[self._l2_alias]
+
+    # --- Metrics ---
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+        if name == 'misses':
+            record_cache(misses=amount)
+        elif name != 'sets':
+            record_cache(hits=amount)
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['l1_hits'] + stats['l2_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['l1_hits'] + stats['l2_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for name in self._stats: self._stats[name] = 0
+
+    # --- Helpers ---
+    def _l1_key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def _l1_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else max(timeout - time.time(), 0)
+
+    # --- Single keys ---
+    def get(self, key, default=None, version=None):
+        l1_key = self._l1_key(key, version)
+        value = self._l1.get(l1_key)
+        if value is not _MISSING:
+            self._count('l1_hits')
+            return value
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('l2_hits')
+        self._l1.set(l1_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout=timeout, version=version)
+        self._l1.set(self._l1_key(key, version), value, self._l1_timeout(timeout))
+        self._count('sets')
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # add لازم تروح للمشترك عشان تشتغل كـ lock بين السيرفرات
+        added = self.l2.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._l1.set(self._l1_key(key, version), value, self._l1_timeout(timeout))
+            self._count('sets')
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1.delete(self._l1_key(key, version))
+        return self.l2.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._l1.delete(self._l1_key(key, version))
+        return self.l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self._l1.get(self._l1_key(key, version)) is not _MISSING:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version=version)
+        self._l1.set(self._l1_key(key, version), value)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    # --- Batches (رحلة واحدة للـ L2 لكل المفاتيح الناقصة) ---
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._l1.get(self._l1_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count('l1_hits', len(found))
+
+        if missing:
+            fetched = self.l2.get_many(missing, version=version)
+            for key, value in fetched.items():
+                self._l1.set(self._l1_key(key, version), value)
+            found.update(fetched)
+            self._count('l2_hits', len(fetched))
+            self._count('misses', len(missing) - len(fetched))
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout=timeout, version=version)
+        l1_timeout = self._l1_timeout(timeout)
+        for key, value in data.items():
+            if key not in failed:
+                self._l1.set(self._l1_key(key, version), value, l1_timeout)
+        self._count('sets', len(data) - len(failed))
+        return failed
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._l1.delete(self._l1_key(key, version))
+        self.l2.delete_many(keys, version=version)
+
+    def clear(self):
+        self._l1.clear()
+        self.l2.clear()
+
+    def clear_local(self):
+        self._l1.clear()
@@ -0,0 +1,210 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+# ==========================================
+# 1. أرقام الإصدارات (Versioned Namespaces)
+# ==========================================
+# بدل ما نمسح مفاتيح الكاش واحد واحد، كل مجموعة بيانات ليها "رقم إصدار"
+# وأي تعديل بيزود الرقم، فكل المفاتيح القديمة بتبقى ميتة لوحدها.
+
+def _version_key(namespace):
+    return f'ns_version_{namespace}'
+
+def _initial_version():
+    # نبدأ بقيمة زمنية بدل 1 عشان سيرفرين مختلفين ميطلعوش نفس الرقم لبيانات مختلفة
+    return int(time.time() * 1000)
+
+def get_version(namespace):
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key, _initial_version())
+    return version
+
+def bump_version(*namespaces):
+    """
+    زيادة رقم الإصدار (يعني إلغاء كل الكاش المرتبط بالمجموعة دي)
+    """
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+
+def bump_version_on_commit(*namespaces):
+    # ✅ نستنى الداتابيز تحفظ الأول، عشان محدش يبني كاش جديد من بيانات لسه متحفظتش
+    transaction.on_commit(lambda: bump_version(*namespaces))
+
+# ==========================================
+# 2. Single-Flight (منع إعادة البناء المتكرر)
+# ==========================================
+
+def get_or_build(key, builder, timeout=300, stale_timeout=60, lock_timeout=10, wait=2.0):
+    """
+    جلب قيمة من الكاش أو بناؤها مرة واحدة فقط حتى لو جالنا طلبات كتير في نفس اللحظة.
+    - لو القيمة انتهت: طلب واحد بيعيد البناء والباقي بياخد النسخة القديمة (stale).
+    - لو مفيش قيمة خالص: طلب واحد بيبني والباقي بيستنى شوية قبل ما يبني بنفسه.
+    """
+    lock_key = f'{key}_lock'
+    entry = cache.get(key)
+
+    if entry is not None:
+        if entry['expires'] > time.time():
+            return entry['value']
+        if not cache.add(lock_key, 1, timeout=lock_timeout):
+            return entry['value']
+        return _build(key, lock_key, builder, timeout, stale_timeout)
+
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        return _build(key, lock_key, builder, timeout, stale_timeout)
+
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+    return builder()
+
+def _build(key, lock_key, builder, timeout, stale_timeout):
+    try:
+        value = builder()
+        cache.set(key, {'value': value, 'expires': time.time() + timeout}, timeout=timeout + stale_timeout)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+# ==========================================
+# 3. كاش الردود للزوار (Anonymous GET)
+# ==========================================
+
+def normalize_query_params(query_params, ignore=()):
+    """
+    ترتيب باراميترات البحث بشكل ثابت عشان ?a=1&b=2 و ?b=2&a=1 يطلعوا نفس المفتاح
+    """
+    parts = []
+    for key in sorted(query_params.keys()):
+        if key in ignore: continue
+        values = sorted(v.strip() for v in query_params.getlist(key) if v and v.strip())
+        for value in values:
+            parts.append(f'{key}={value}')
+    return '&'.join(parts)
+
+class AnonymousResponseCacheMixin:
+    """
+    كاش للردود الخاصة بالزوار غير المسجلين فقط (list / retrieve).
+    المفتاح مبني على رقم إصدار الـ namespace + الباراميترات بعد الترتيب.
+    """
+    response_cache_namespace = None
+    response_cache_timeout = 120
+    response_cache_actions = ('list', 'retrieve')
+
+    def _is_response_cacheable(self, request):
+        return (
+            self.response_cache_namespace is not None
+            and request.method == 'GET'
+            and self.action in self.response_cache_actions
+            and not request.user.is_authenticated
+        )
+
+    def get_response_cache_key(self, request):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')
+        params = normalize_query_params(request.query_params)
+        digest = hashlib.md5(f'{self.action}|{lookup}|{params}'.encode('utf-8')).hexdigest()
+        version = get_version(self.response_cache_namespace)
+        return f'resp_{self.response_cache_namespace}_{version}_{digest}'
+
+    def _cached_response(self, request, handler, *args, **kwargs):
+        if not self._is_response_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        built = []
+
+        def builder():
+            response = handler(request, *args, **kwargs)
+            built.append(response)
+            return {'status': response.status_code, 'data': response.data}
+
+        payload = get_or_build(self.get_response_cache_key(request), builder, timeout=self.response_cache_timeout)
+        response = built[0] if built else Response(payload['data'], status=payload['status'])
+        response['X-Cache'] = 'MISS' if built else 'HIT'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, super().retrieve, *args, **kwargs)
+
+# ==========================================
+# 4. Conditional GET (ETag / Last-Modified)
+# ==========================================
+
+class ConditionalGetMixin:
+    """
+    رد 304 لو بيانات العميل لسه زي ما هي، من غير ما نبني أو نعمل serialize لأي حاجة.
+    كل ViewSet بيحدد "بصمة" رخيصة للبيانات عن طريق get_etag_fingerprint
+    (مثلاً أكبر updated_at + العدد، أو رقم إصدار من الكاش).
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_etag_fingerprint(self, request):
+        # ترجع tuple أو None (None = مفيش Conditional GET للطلب ده)
+        return None
+
+    def get_last_modified(self, request):
+        return None
+
+    def _conditional_etag(self, request, fingerprint):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')
+        params = normalize_query_params(request.query_params)
+        renderer = getattr(request, 'accepted_renderer', None)
+        fmt = getattr(renderer, 'format', '')
+        raw = f'{self.action}|{lookup}|{params}|{fmt}|{fingerprint!r}'
+        return '"%s"' % hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def _conditional_response(self, request, handler, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+
+        fingerprint = self.get_etag_fingerprint(request)
+        if fingerprint is None:
+            return handler(request, *args, **kwargs)
+
+        etag = self._conditional_etag(request, fingerprint)
+        last_modified = self.get_last_modified(request)
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified_ts: response['Last-Modified'] = http_date(last_modified_ts)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(request, super().retrieve, *args, **kwargs)
+
+class VersionedConditionalGetMixin(ConditionalGetMixin):
+    """
+    للجداول اللي مفيهاش updated_at (التصنيفات، الجغرافيا، العروض):
+    البصمة هي رقم إصدار الـ namespace اللي بيزيد مع أي تعديل.
+    """
+    conditional_namespace = None
+
+    def get_etag_fingerprint(self, request):
+        return (get_version(self.conditional_namespace),)
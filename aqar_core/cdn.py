@@ -0,0 +1,133 @@
+import logging
+import threading
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.module_loading import import_string
+from .instrumentation import track_external
+
+logger = logging.getLogger('django')
+
+# ==========================================
+# 1. Purge Backends (قابلة للتبديل من الإعدادات)
+# ==========================================
+
+class BasePurgeBackend:
+    def purge(self, keys):
+        raise NotImplementedError
+
+class NullPurgeBackend(BasePurgeBackend):
+    """الافتراضي: مفيش CDN بيدعم المسح بالمفاتيح، فمبنعملش حاجة"""
+    def purge(self, keys):
+        pass
+
+class RecordingPurgeBackend(BasePurgeBackend):
+    """للاختبارات والتطوير: بيسجل المفاتيح اللي اتطلب مسحها بس"""
+    purged = []
+
+    def purge(self, keys):
+        RecordingPurgeBackend.purged.append(sorted(keys))
+
+    @classmethod
+    def reset(cls):
+        cls.purged = []
+
+class WebhookPurgeBackend(BasePurgeBackend):
+    """بيبعت المفاتيح لـ URL خارجي (CDN_PURGE_URL) في طلب واحد"""
+    def purge(self, keys):
+        url = getattr(settings, 'CDN_PURGE_URL', None)
+        if not url: return
+        headers = {}
+        token = getattr(settings, 'CDN_PURGE_TOKEN', None)
+        if token: headers['Authorization'] = f'Bearer {token}'
+        try:
+            with track_external('cdn'):
+                requests.post(url, json={'keys': sorted(keys)}, headers=headers, timeout=5)
+        except requests.RequestException as e:
+            logger.error(f"❌ فشل مسح كاش الـ CDN: {e}")
+
+_backend = None
+
+def get_purge_backend():
+    global _backend
+    path = getattr(settings, 'CDN_PURGE_BACKEND', 'aqar_core.cdn.NullPurgeBackend')
+    if _backend is None or _backend[0] != path:
+        _backend = (path, import_string(path)())
+    return _backend[1]
+
+# ==========================================
+# 2. طابور المسح (Purge Queue)
+# ==========================================
+# بنجمع المفاتيح طول الـ transaction ونبعتها مرة واحدة بعد الـ commit
+# (لو حصل rollback المفاتيح بتتبعت مع أول commit بعده، ومسح زيادة مش مشكلة)
+
+_pending = threading.local()
+
+def enqueue_purge(*keys):
+    keys = {k for k in keys if k}
+    if not keys: return
+    pending = getattr(_pending, 'keys', None)
+    if pending is None:
+        pending = _pending.keys = set()
+    pending.update(keys)
+    transaction.on_commit(flush_purges)
+
+def flush_purges():
+    keys = getattr(_pending, 'keys', None)
+    if not keys: return
+    _pending.keys = set()
+    get_purge_backend().purge(keys)
+
+# ==========================================
+# 3. هيدرز الكاش على الـ CDN (Edge Caching)
+# ==========================================
+
+class EdgeCacheMixin:
+    """
+    سياسة كاش لكل View للزوار فقط:
+    Cache-Control: public, s-maxage=..., stale-while-revalidate=...
+    + هيدر بالـ Surrogate Keys عشان نقدر نمسح الصفحات دي بالاسم لما البيانات تتغير.
+    """
+    edge_cache_actions = ('list', 'retrieve')
+    edge_cache_s_maxage = 60
+    edge_cache_stale_while_revalidate = 300
+
+    def get_surrogate_keys(self, request, response):
+        return []
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD') or getattr(self, 'action', None) not in self.edge_cache_actions:
+            return response
+
+        # Accept: نفس الرابط ممكن يرجع JSON أو MessagePack (aqar_core/renderers.py)
+        patch_vary_headers(response, ['Authorization', 'Accept'])
+        if response.status_code not in (200, 304):
+            return response
+
+        if request.user.is_authenticated:
+            # بيانات المستخدم المسجل (زي is_favorite) ممنوع تتخزن على الـ CDN
+            patch_cache_control(response, private=True)
+            return response
+
+        patch_cache_control(
+            response, public=True, max_age=0,
+            s_maxage=self.edge_cache_s_maxage,
+            stale_while_revalidate=self.edge_cache_stale_while_revalidate,
+        )
+        keys = self.get_surrogate_keys(request, response)
+        if keys:
+            header = getattr(settings, 'CDN_SURROGATE_KEY_HEADER', 'Surrogate-Key')
+            response[header] = ' '.join(dict.fromkeys(keys))
+        return response
+
+def response_object_ids(response):
+    """استخراج الـ IDs من رد list (سواء فيه pagination أو لا)"""
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict):
+        data = data.get('results', [data])
+    if not isinstance(data, list):
+        return []
+    return [item['id'] for item in data if isinstance(item, dict) and 'id' in item]
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# ==========================================
+# System Checks (بتظهر في كل أمر manage.py: migrate / collectstatic / runserver ...)
+# ==========================================
+
+@register('caches')
+def shared_cache_check(app_configs, **kwargs):
+    """تنبيه (مش خطأ) لو الكاش المشترك في الإنتاج اتحدد تلقائياً db"""
+    if not getattr(settings, 'CACHE_SHARED_BACKEND_IMPLICIT', False):
+        return []
+    return [Warning(
+        "الكاش المشترك شغال على جدول في الداتابيز (db) لأن REDIS_URL و CACHE_SHARED_BACKEND مش متحددين",
+        hint="كل L1 miss على السيرفرليس بقى استعلام داتابيز. حدد REDIS_URL، "
+             "أو CACHE_SHARED_BACKEND=db صراحةً لو التكلفة دي مقبولة.",
+        id='aqar_core.W001',
+    )]
@@ -0,0 +1,210 @@
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from .instrumentation import record_compression
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ==========================================
+# ضغط الردود (brotli / gzip) للـ JSON والـ MessagePack
+# ==========================================
+# - brotli لو العميل بيقبله والمكتبة متسطبة، وإلا gzip (حسب Accept-Encoding و q)
+# - المستويات متظبطة للـ JSON العربي (benchmark_compression): gzip 5 و brotli 4
+#   أعلى من كده الوقت بيزيد أضعاف والحجم بيقل شوية صغيرة
+# - الردود الصغيرة (أقل من COMPRESSION_MIN_SIZE) والـ 304 والمضغوطة أصلاً (صور / .gz) مبتتلمسش
+# - الـ Streaming (التصدير) بيتضغط دفعة دفعة من غير ما يتجمع في الذاكرة
+# - 🔒 أنواع الـ API بس: صفحات HTML (لوحة التحكم / الـ Browsable API) فيها CSRF token
+#   وضغطها مع بيانات من المستخدم بيفتح هجوم BREACH، وأي رد بيعمل CSRF cookie مبيتضغطش برضه
+
+COMPRESSIBLE_TYPES = frozenset({'application/json', 'application/msgpack', 'application/x-ndjson', 'text/csv'})
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self._zobj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._zobj.compress(data)
+
+    def flush(self):
+        # Sync Flush: العميل يقدر يفك الدفعة اللي وصلت من غير ما يستنى الباقي
+        return self._zobj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._zobj.flush()
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+def parse_accept_encoding(header):
+    """{'br': 1.0, 'gzip': 0.8, '*': 0.1}"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+def choose_encoding(header):
+    """أحسن ترميز يقبله العميل (عند التساوي brotli الأول) أو None"""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def get_encoder(coding):
+    if coding == 'br':
+        return BrotliEncoder(getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+    return GzipEncoder(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 5))
+
+# --- Metrics (على مستوى العملية، زي get_stats بتاع TieredCache) ---
+_stats_lock = threading.Lock()
+_stats = {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0}
+
+def _count(coding, bytes_in, bytes_out, seconds):
+    with _stats_lock:
+        _stats['responses'] += 1
+        _stats['bytes_in'] += bytes_in
+        _stats['bytes_out'] += bytes_out
+        _stats['seconds'] += seconds
+        _stats[coding] = _stats.get(coding, 0) + 1
+    record_compression(coding, bytes_in, bytes_out, seconds)
+
+def get_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+    stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else 0.0
+    stats['seconds'] = round(stats['seconds'], 4)
+    return stats
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+        _stats.update({'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0})
+
+class CompressionMiddleware:
+    """
+    مكانه بعد RequestMetricsMiddleware على طول (عشان يضغط الرد النهائي ووقته يتحسب في الطلب).
+    الـ ETag بيبقى Weak (W/"...") لأن البايتات اتغيرت، والـ 304 بيفضل شغال (If-None-Match بيقارن Weak).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._compressible(response):
+            return response
+
+        min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+        encoder = get_encoder(coding)
+
+        if response.streaming:
+            if getattr(response, 'is_async', False):
+                response.streaming_content = self._compress_async(encoder, response.streaming_content)
+            else:
+                response.streaming_content = self._compress_stream(encoder, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            content = response.content
+            start = time.perf_counter()
+            compressed = encoder.compress(content) + encoder.finish()
+            seconds = time.perf_counter() - start
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+            _count(coding, len(content), len(compressed), seconds)
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
+
+    @staticmethod
+    def _compressible(response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.has_header('Content-Encoding'):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        if settings.CSRF_COOKIE_NAME in response.cookies:
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type in COMPRESSIBLE_TYPES
+
+    @staticmethod
+    def _compress_stream(encoder, chunks):
+        bytes_in = bytes_out = 0
+        seconds = 0.0
+        for chunk in chunks:
+            start = time.perf_counter()
+            data = encoder.compress(chunk) + encoder.flush()
+            seconds += time.perf_counter() - start
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+        data = encoder.finish()
+        _count(encoder.name, bytes_in, bytes_out + len(data), seconds)
+        yield data
+
+    @staticmethod
+    async def _compress_async(encoder, chunks):
+        bytes_in = bytes_out = 0
+        seconds = 0.0
+        async for chunk in chunks:
+            start = time.perf_counter()
+            data = encoder.compress(chunk) + encoder.flush()
+            seconds += time.perf_counter() - start
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+        data = encoder.finish()
+        _count(encoder.name, bytes_in, bytes_out + len(data), seconds)
+        yield data
@@ -3,6 +3,7 @@ from firebase_admin import credentials, messaging
 from django.conf import settings
 import os
 import logging
+from .instrumentation import track_external
 
 # إعداد الـ Logger لتسجيل الأخطاء بشكل احترافي
 logger = logging.getLogger('django')
@@ -26,6 +27,50 @@ def ensure_firebase_initialized():
             return False
     return True
 
+# حد Firebase لعدد الرسايل في الطلب الواحد (send_each)
+FCM_BATCH_SIZE = 500
+
+def build_message(token, title, body, link=None, icon_url=None):
+    # استخدام الرابط الافتراضي لو لم يتم تمرير رابط
+    final_link = link if link else '/'
+
+    # إعداد خيارات الويب (WebPush)
+    # ملاحظة: WebpushFCMOptions يتطلب HTTPS، لو الرابط HTTP لا نضعه في الخيارات لتجنب الخطأ
+    fcm_options = None
+    if final_link.startswith('https'):
+        fcm_options = messaging.WebpushFCMOptions(link=final_link)
+
+    # بناء الرسالة
+    return messaging.Message(
+        notification=messaging.Notification(
+            title=title,
+            body=body,
+            image=icon_url 
+        ),
+        data={
+            'url': final_link,         # للويب والتعامل اليدوي
+            'click_action': 'FLUTTER_NOTIFICATION_CLICK', # للتطبيقات (Flutter)
+            'sound': 'default'
+        },
+        android=messaging.AndroidConfig(
+            priority='high',
+            notification=messaging.AndroidNotification(
+                icon='ic_stat_r', # تأكد أن الأيقونة دي موجودة في تطبيق الأندرويد
+                color='#0f172a',
+                click_action='FLUTTER_NOTIFICATION_CLICK'
+            ),
+        ),
+        webpush=messaging.WebpushConfig(
+            headers={"Urgency": "high"},
+            notification=messaging.WebpushNotification(
+                icon='/icons/icon-192x192.png',
+                badge='/icons/badge-72x72.png',
+            ),
+            fcm_options=fcm_options
+        ),
+        token=token,
+    )
+
 def send_push_notification(user, title, body, link=None, icon_url=None):
     """
     إرسال إشعار للمستخدم (يدعم الويب والموبايل)
@@ -37,51 +82,36 @@ def send_push_notification(user, title, body, link=None, icon_url=None):
         logger.warning(f"🔕 المستخدم {user.username} ليس لديه FCM Token.")
         return
 
-    # استخدام الرابط الافتراضي لو لم يتم تمرير رابط
-    final_link = link if link else '/'
-
     try:
-        # إعداد خيارات الويب (WebPush)
-        # ملاحظة: WebpushFCMOptions يتطلب HTTPS، لو الرابط HTTP لا نضعه في الخيارات لتجنب الخطأ
-        fcm_options = None
-        if final_link.startswith('https'):
-            fcm_options = messaging.WebpushFCMOptions(link=final_link)
-
-        # بناء الرسالة
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=title,
-                body=body,
-                image=icon_url 
-            ),
-            data={
-                'url': final_link,         # للويب والتعامل اليدوي
-                'click_action': 'FLUTTER_NOTIFICATION_CLICK', # للتطبيقات (Flutter)
-                'sound': 'default'
-            },
-            android=messaging.AndroidConfig(
-                priority='high',
-                notification=messaging.AndroidNotification(
-                    icon='ic_stat_r', # تأكد أن الأيقونة دي موجودة في تطبيق الأندرويد
-                    color='#0f172a',
-                    click_action='FLUTTER_NOTIFICATION_CLICK'
-                ),
-            ),
-            webpush=messaging.WebpushConfig(
-                headers={"Urgency": "high"},
-                notification=messaging.WebpushNotification(
-                    icon='/icons/icon-192x192.png',
-                    badge='/icons/badge-72x72.png',
-                ),
-                fcm_options=fcm_options
-            ),
-            token=user.fcm_token,
-        )
-
-        response = messaging.send(message)
+        with track_external('fcm'):
+            response = messaging.send(build_message(user.fcm_token, title, body, link, icon_url))
         logger.info(f"🚀 تم إرسال الإشعار للمستخدم {user.username}: {response}")
         return response
 
     except Exception as e:
         logger.error(f"❌ خطأ أثناء إرسال الإشعار للمستخدم {user.username}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def send_push_batch(items):
+    """
+    إرسال إشعارات كتير مرة واحدة (send_each: طلب واحد لكل 500 رسالة بدل طلب لكل مستخدم)
+    items: [(fcm_token, title, body, link), ...]
+    بترجع (عدد الناجح، عدد الفاشل)
+    """
+    items = [item for item in items if item[0]]
+    if not items or not ensure_firebase_initialized():
+        return 0, 0
+
+    sent = failed = 0
+    for start in range(0, len(items), FCM_BATCH_SIZE):
+        chunk = items[start:start + FCM_BATCH_SIZE]
+        try:
+            with track_external('fcm'):
+                response = messaging.send_each([build_message(token, title, body, link) for token, title, body, link in chunk])
+            sent += response.success_count
+            failed += response.failure_count
+        except Exception as e:
+            logger.error(f"❌ خطأ أثناء إرسال دفعة إشعارات ({len(chunk)}): {e}")
+            failed += len(chunk)
+    logger.info(f"🚀 إشعارات بالجملة: {sent} تم / {failed} فشل")
+    return sent, failed
@@ -0,0 +1,176 @@
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('aqar.requests')
+
+# ==========================================
+# قياسات كل طلب (استعلامات / وقت الداتابيز / الكاش / الخدمات الخارجية)
+# ==========================================
+# 1. الميدلوير بيفتح RequestMetrics لكل طلب (ContextVar) ويلف كل اتصالات الداتابيز بـ execute_wrapper
+# 2. الكاش (TieredCache) والخدمات الخارجية (Firebase / Cloudinary / CDN) والضغط (compression.py) بيسجلوا فيه لو فيه طلب شغال
+# 3. في الآخر: هيدر Server-Timing للأدمن + سطر JSON في اللوج + تحذير لو الـ View عدى ميزانية الاستعلامات
+#
+# الميزانية بتتحدد على الـ View نفسه:
+#     query_budget = 6                          (لكل الـ actions)
+#     query_budget = {'list': 6, 'retrieve': 5} (لكل action، واللي مش موجود مالوش حد)
+#     @query_budget(3) فوق @api_view            (للـ Function Views)
+
+_current = ContextVar('request_metrics', default=None)
+
+class RequestMetrics:
+    __slots__ = ('started', 'queries', 'db_time', 'cache_hits', 'cache_misses', 'external', 'compression')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.external = {}  # {'fcm': [عدد، ثواني]}
+        self.compression = None  # (الترميز، البايتات قبل، بعد، ثواني)
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: بيتنادي حوالين كل استعلام
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+def current_metrics():
+    return _current.get()
+
+def record_cache(hits=0, misses=0):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+def record_compression(coding, bytes_in, bytes_out, seconds):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.compression = (coding, bytes_in, bytes_out, seconds)
+
+@contextmanager
+def track_external(name):
+    """وقت نداء خدمة خارجية (with track_external('fcm'): ... أو كـ decorator)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            entry = metrics.external.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+
+def query_budget(budget):
+    """ميزانية الاستعلامات للـ Function Views (لازم تبقى فوق @api_view)"""
+    def decorator(view_func):
+        view_func.query_budget = budget
+        return view_func
+    return decorator
+
+def get_query_budget(view_func, request):
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'cls', None), 'query_budget', None)
+    if isinstance(budget, dict):
+        # ViewSet: الـ action من الـ method (as_view بيحفظ الخريطة في view_func.actions)
+        actions = getattr(view_func, 'actions', None) or {}
+        budget = budget.get(actions.get(request.method.lower()))
+    return budget
+
+def _view_name(view_func, request):
+    cls = getattr(view_func, 'cls', None)
+    name = cls.__name__ if cls is not None else getattr(view_func, '__name__', 'view')
+    action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+    return f'{name}.{action}' if action else name
+
+class RequestMetricsMiddleware:
+    """
+    لازم يبقى في أول MIDDLEWARE عشان يحسب استعلامات التوثيق والـ Sessions كمان.
+    الردود الـ Streaming (التصدير) بتتقاس لحد ما الرد يبدأ بس.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        view_name, budget = getattr(request, '_metrics_view', (None, None))
+        over_budget = budget is not None and metrics.queries > budget
+        if self._show_timing(request):
+            response['Server-Timing'] = self.server_timing(metrics)
+        self.log(request, response, metrics, view_name, budget, over_budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = (_view_name(view_func, request), get_query_budget(view_func, request))
+
+    def _show_timing(self, request):
+        if getattr(settings, 'SERVER_TIMING_PUBLIC', False):
+            return True
+        # DRF بيحط المستخدم اللي اتوثق بالتوكن على الـ request الأصلي كمان
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_staff)
+
+    @staticmethod
+    def server_timing(metrics):
+        parts = [
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f'cache;desc="hit={metrics.cache_hits} miss={metrics.cache_misses}"',
+        ]
+        for name, (calls, seconds) in metrics.external.items():
+            parts.append(f'{name};dur={seconds * 1000:.1f};desc="{calls} calls"')
+        if metrics.compression:
+            coding, bytes_in, bytes_out, seconds = metrics.compression
+            parts.append(f'compress;dur={seconds * 1000:.1f};desc="{coding} {bytes_in}->{bytes_out} bytes"')
+        parts.append(f'total;dur={metrics.total_time * 1000:.1f}')
+        return ', '.join(parts)
+
+    def log(self, request, response, metrics, view_name, budget, over_budget):
+        level = logging.WARNING if over_budget else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'query_budget': budget,
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            'external_ms': {name: round(seconds * 1000, 1) for name, (calls, seconds) in metrics.external.items()},
+            'total_ms': round(metrics.total_time * 1000, 1),
+        }
+        if metrics.compression:
+            coding, bytes_in, bytes_out, seconds = metrics.compression
+            record['compression'] = {
+                'encoding': coding, 'bytes_in': bytes_in, 'bytes_saved': bytes_in - bytes_out,
+                'ms': round(seconds * 1000, 2),
+            }
+        if over_budget:
+            record['over_budget'] = True
+        logger.log(level, json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,71 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import BackgroundJob
+from .tasks import run_after_commit
+
+logger = logging.getLogger('django')
+
+# ==========================================
+# مهام طويلة بتتسجل في الداتابيز (BackgroundJob)
+# ==========================================
+# الطلب بيسجل المهمة ويرجع على طول، والتنفيذ بيحصل في الخلفية (aqar_core/tasks.py)
+# الدالة بتاخد الـ job أول argument وبتحدث التقدم بـ job_progress بعد كل دفعة،
+# واللي بترجعه (dict) بيتحفظ في result.
+# ⚠️ على السيرفرليس (Vercel) الـ Thread ممكن يموت بعد الرد، والمهمة تفضل Pending / Running:
+# - inline=True بيشغلها جوه الطلب نفسه (للمهام الصغيرة)
+# - resume_jobs (أمر أو أكشن في لوحة التحكم) بيعيد المهام اللي وقفت، فالدالة لازم تكون آمنة لو اتكررت
+#   ومدخلاتها لازم تكون JSON
+
+def start_job(name, func, *args, total=0, user=None, inline=False, **kwargs):
+    job = BackgroundJob.objects.create(
+        name=name, total=total, created_by=user,
+        task=f'{func.__module__}.{func.__qualname__}', params={'args': list(args), 'kwargs': kwargs},
+    )
+    if inline:
+        transaction.on_commit(lambda: execute_job(job.pk, func, *args, **kwargs))
+    else:
+        run_after_commit(execute_job, job.pk, func, *args, **kwargs)
+    return job
+
+def job_progress(job, count):
+    # updated_at هنا هو نبض المهمة: لو وقف أكتر من JOB_STALE_AFTER المهمة بتعتبر ميتة
+    BackgroundJob.objects.filter(pk=job.pk).update(processed=F('processed') + count, updated_at=timezone.now())
+
+def execute_job(job_id, func, *args, **kwargs):
+    job = BackgroundJob.objects.get(pk=job_id)
+    job.status, job.started_at = 'Running', timezone.now()
+    job.save()
+    try:
+        result = func(job, *args, **kwargs)
+    except Exception as e:
+        logger.exception(f"❌ فشلت المهمة {job.name} (#{job_id})")
+        BackgroundJob.objects.filter(pk=job_id).update(status='Failed', error=str(e), finished_at=timezone.now())
+        return
+    BackgroundJob.objects.filter(pk=job_id).update(status='Done', result=result or {}, finished_at=timezone.now())
+
+def resumable_jobs(stale_after=None, failed=False):
+    """المهام اللي مخلصتش ومفيش تقدم فيها من stale_after (والفاشلة لو failed=True)"""
+    if stale_after is None:
+        stale_after = timedelta(seconds=getattr(settings, 'JOB_STALE_AFTER', 900))
+    condition = Q(status__in=('Pending', 'Running'), updated_at__lt=timezone.now() - stale_after)
+    if failed:
+        condition |= Q(status='Failed')
+    return BackgroundJob.objects.filter(condition).exclude(task='')
+
+def resume_job(job):
+    """إعادة تشغيل مهمة في نفس العملية، وبترجع False لو حد تاني سبقنا عليها"""
+    # الـ update المشروط بيحجز المهمة (لو أمرين اشتغلوا مع بعض واحد بس ياخدها)
+    claimed = BackgroundJob.objects.filter(pk=job.pk, status=job.status, updated_at=job.updated_at).update(
+        status='Pending', processed=0, error='', finished_at=None, updated_at=timezone.now(),
+    )
+    if not claimed:
+        return False
+    logger.warning(f"🔁 إعادة تشغيل المهمة {job.name} (#{job.pk})")
+    execute_job(job.pk, import_string(job.task), *job.params.get('args', []), **job.params.get('kwargs', {}))
+    return True
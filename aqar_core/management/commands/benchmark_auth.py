@@ -0,0 +1,72 @@
+import json
+import statistics
+import time
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.core.management.base import BaseCommand
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from aqar_core.authentication import CachedTokenAuthentication, invalidate_token_cache
+from aqar_core.models import User
+
+class Command(BaseCommand):
+    help = "مقارنة تكلفة التوثيق لكل طلب: توكن DRF العادي / التوكن المتكيش / JWT من غير داتابيز"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--json', action='store_true', help="طباعة النتيجة كـ JSON")
+
+    def handle(self, *args, **options):
+        # كل حاجة جوه transaction بتترجع في الآخر (مفيش مستخدمين تجريبيين بيفضلوا في الداتابيز)
+        with transaction.atomic():
+            user = User.objects.create_user(username='auth-benchmark', password='x', phone_number=None)
+            token = Token.objects.create(user=user)
+            results = self._run(user, token, options['iterations'])
+            invalidate_token_cache(token.key)
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'mode':<16}{'p50':>10}{'p99':>10}{'mean':>10}{'queries':>10}  (µs)")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<16}{r['p50']:>10}{r['p99']:>10}{r['mean']:>10}{r['queries']:>10}")
+
+    def _run(self, user, token, iterations):
+        factory = APIRequestFactory()
+        modes = {
+            'drf_token': (TokenAuthentication(), f'Token {token.key}'),
+            'cached_token': (CachedTokenAuthentication(), f'Token {token.key}'),
+        }
+        try:
+            from aqar_core.authentication import ClaimsTokenObtainPairSerializer, StatelessJWTAuthentication
+            access = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+            modes['stateless_jwt'] = (StatelessJWTAuthentication(), f'Bearer {access}')
+        except ImportError:
+            self.stderr.write("⚠️ djangorestframework-simplejwt مش متسطب، هنتخطى JWT")
+
+        results = {}
+        for name, (authenticator, header) in modes.items():
+            request = Request(factory.get('/', HTTP_AUTHORIZATION=header))
+            authenticate = lambda: authenticator.authenticate(request)
+            authenticate()  # تسخين (بيملى الكاش في وضع التوكن المتكيش)
+            with CaptureQueriesContext(connection) as ctx:
+                authenticate()
+            results[name] = {**self._measure(authenticate, iterations), 'queries': len(ctx)}
+        return results
+
+    def _measure(self, fn, iterations):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1_000_000)
+        samples.sort()
+        return {
+            'p50': round(statistics.median(samples), 1),
+            'p99': round(samples[int(len(samples) * 0.99) - 1], 1),
+            'mean': round(statistics.fmean(samples), 1),
+        }
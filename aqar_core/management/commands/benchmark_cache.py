@@ -0,0 +1,71 @@
+import json
+import statistics
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from aqar_core.cache_backends import TieredCache
+
+class Command(BaseCommand):
+    help = "مقارنة زمن القراءة (Hit Latency) بين مستويات الكاش: L1 / الملفات / الداتابيز / الكاش المجمع"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--batch', type=int, default=20, help="عدد المفاتيح في get_many")
+        parser.add_argument('--payload-kb', type=int, default=4)
+        parser.add_argument('--json', action='store_true', help="طباعة النتيجة كـ JSON")
+
+    def handle(self, *args, **options):
+        payload = {'data': 'ع' * (options['payload_kb'] * 512)}
+        tiers = self._build_tiers()
+        results = {}
+
+        for name, backend in tiers.items():
+            keys = [f'bench_{i}' for i in range(options['batch'])]
+            backend.set_many({k: payload for k in keys}, timeout=600)
+            backend.get(keys[0])  # تسخين (يملى L1 في الكاش المجمع)
+
+            single = self._measure(lambda: backend.get(keys[0]), options['iterations'])
+            batch = self._measure(lambda: backend.get_many(keys), max(options['iterations'] // 10, 1))
+            results[name] = {'get_us': single, 'get_many_us': batch}
+            if hasattr(backend, 'get_stats'):
+                results[name]['stats'] = backend.get_stats()
+            backend.delete_many(keys)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'tier':<16}{'get p50':>10}{'get p99':>10}{'get_many p50':>14}{'get_many p99':>14}  (µs)")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<16}{r['get_us']['p50']:>10}{r['get_us']['p99']:>10}"
+                f"{r['get_many_us']['p50']:>14}{r['get_many_us']['p99']:>14}"
+            )
+
+    def _build_tiers(self):
+        tmpdir = tempfile.mkdtemp(prefix='cache_bench_')
+        tiers = {
+            'l1_locmem': LocMemCache('bench_l1', {}),
+            'file': FileBasedCache(tmpdir, {}),
+            'configured_l2': caches['shared'],
+        }
+        # الكاش المجمع فوق الملفات (زي ما هيشتغل على سيرفر من غير خدمات خارجية)
+        tiers['tiered_file'] = TieredCache.wrap(tiers['file'])
+        tiers['configured_default'] = caches['default']
+        return tiers
+
+    def _measure(self, fn, iterations):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1_000_000)
+        samples.sort()
+        return {
+            'p50': round(statistics.median(samples), 1),
+            'p99': round(samples[int(len(samples) * 0.99) - 1], 1),
+            'mean': round(statistics.fmean(samples), 1),
+        }
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from aqar_core.jobs import resumable_jobs, resume_job
+
+class Command(BaseCommand):
+    help = "إعادة تشغيل المهام الخلفية اللي وقفت (Pending / Running من غير تقدم) - للسيرفرليس شغله بـ Cron"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-minutes', type=int, default=None, help="الافتراضي: JOB_STALE_AFTER")
+        parser.add_argument('--failed', action='store_true', help="إعادة المهام الفاشلة كمان")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_minutes']) if options['stale_minutes'] is not None else None
+        jobs = list(resumable_jobs(stale_after, failed=options['failed']).order_by('created_at'))
+        if not jobs:
+            self.stdout.write("✅ مفيش مهام واقفة")
+            return
+
+        resumed = 0
+        for job in jobs:
+            if options['dry_run']:
+                self.stdout.write(f"#{job.pk} {job.name} ({job.status}, آخر تقدم {job.updated_at:%Y-%m-%d %H:%M})")
+                continue
+            if resume_job(job):
+                resumed += 1
+                job.refresh_from_db(fields=['status'])
+                self.stdout.write(f"#{job.pk} {job.name}: {job.get_status_display()}")
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"✅ اتعاد تشغيل {resumed} من {len(jobs)} مهمة"))
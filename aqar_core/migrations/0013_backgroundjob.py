@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+import aqar_core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aqar_core', '0012_user_is_owner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخر تحديث')),
+                ('name', models.CharField(max_length=100, verbose_name='المهمة')),
+                ('status', models.CharField(choices=[('Pending', 'في الانتظار'), ('Running', 'جاري التنفيذ'), ('Done', 'تمت'), ('Failed', 'فشلت')], db_index=True, default='Pending', max_length=10, verbose_name='الحالة')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='الإجمالي')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='تم تنفيذه')),
+                ('result', models.JSONField(blank=True, default=dict, verbose_name='النتيجة')),
+                ('error', models.TextField(blank=True, default='', verbose_name='الخطأ')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='بدأت في')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='انتهت في')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='بواسطة')),
+            ],
+            options={
+                'verbose_name': 'مهمة خلفية',
+                'verbose_name_plural': '⏳ المهام الخلفية',
+                'ordering': ['-created_at'],
+            },
+            bases=(aqar_core.models.DirtyFieldsMixin, models.Model),
+        ),
+    ]
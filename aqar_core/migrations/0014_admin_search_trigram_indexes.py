@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations
+
+# Trigram (pg_trgm) لحقول البحث في لوحة التحكم - نفس فكرة aqar/migrations/0028
+TRIGRAM_INDEXES = [
+    ('aqar_core_user_username_trgm', 'aqar_core_user', 'UPPER("username"::text)'),
+    ('aqar_core_user_first_name_trgm', 'aqar_core_user', 'UPPER("first_name"::text)'),
+    ('aqar_core_user_phone_number_trgm', 'aqar_core_user', 'UPPER("phone_number"::text)'),
+    ('aqar_core_notification_title_trgm', 'aqar_core_notification', 'UPPER("title"::text)'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, expression in TRIGRAM_INDEXES:
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" USING gin ({expression} gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('aqar_core', '0013_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
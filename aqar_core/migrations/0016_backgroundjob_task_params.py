@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aqar_core', '0015_user_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='task',
+            field=models.CharField(blank=True, default='', max_length=200, verbose_name='الدالة'),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='params',
+            field=models.JSONField(blank=True, default=dict, verbose_name='المدخلات'),
+        ),
+    ]
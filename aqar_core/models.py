@@ -1,12 +1,77 @@
+import copy
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.cache import cache
+from django.db import transaction
 from django.core.validators import RegexValidator
+from .site_settings import get_setting, invalidate_site_settings
+from .phones import NormalizedPhoneMixin, whatsapp_url
+
+# 0. تتبع الحقول المتغيرة (Dirty Fields)
+class DirtyFieldsMixin:
+    """
+    بيحفظ نسخة من قيم الحقول وقت التحميل من الداتابيز، وبيقارن بيها عند الحفظ:
+    - save() بيكتب الأعمدة اللي اتغيرت بس (update_fields)، ولو مفيش تغيير مبيكتبش خالص (ولا signals)
+    - الـ signals تقدر تعرف اتغير إيه من update_fields
+    """
+
+    def _tracked_values(self):
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:
+                continue  # حقل مؤجل (deferred)
+            value = self.__dict__[field.attname]
+            if isinstance(field, models.FileField):
+                value = getattr(value, 'name', value)
+            elif isinstance(value, (dict, list)):
+                value = copy.deepcopy(value)
+            values[field.name] = value
+        return values
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._tracked_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is not None:
+            current = self._tracked_values()
+            if fields is not None:
+                # تحميل حقل مؤجل (deferred) مثلاً: منلمسش باقي الحقول اللي ممكن تكون اتغيرت
+                names = {f.name for f in self._meta.concrete_fields if f.attname in fields or f.name in fields}
+                current = {name: value for name, value in current.items() if name in names}
+            loaded.update(current)
+
+    def get_dirty_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        current = self._tracked_values()
+        if loaded is None:
+            return set(current)  # عنصر جديد: كل الحقول
+        missing = object()
+        return {name for name, value in current.items() if loaded.get(name, missing) != value}
+
+    def is_dirty(self, *fields):
+        dirty = self.get_dirty_fields()
+        return bool(dirty & set(fields)) if fields else bool(dirty)
+
+    def save(self, *args, **kwargs):
+        if (not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert')
+                and not self._state.adding and getattr(self, '_loaded_values', None) is not None):
+            dirty = self.get_dirty_fields()
+            if dirty:
+                # حقول auto_now (زي updated_at) لازم تتكتب مع أي تعديل
+                dirty |= {f.name for f in self._meta.concrete_fields if getattr(f, 'auto_now', False)}
+            kwargs['update_fields'] = dirty
+        super().save(*args, **kwargs)
+        self._loaded_values = self._tracked_values()
 
 # 1. BaseModel (الأب الروحي لكل الموديلات)
-class BaseModel(models.Model):
+class BaseModel(DirtyFieldsMixin, models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء", db_index=True)
     updated_at = models.DateTimeField(auto_now=True, verbose_name="آخر تحديث")
     created_by = models.ForeignKey(
@@ -19,9 +84,11 @@ class BaseModel(models.Model):
     class Meta: abstract = True
 
 # 2. User (المستخدم الموحد)
-class User(AbstractUser):
+class User(NormalizedPhoneMixin, DirtyFieldsMixin, AbstractUser):
     phone_regex = RegexValidator(regex=r'^\+?1?\d{9,15}$', message="رقم الهاتف يجب أن يكون بالصيغة الصحيحة: '+999999999'.")
     phone_number = models.CharField(validators=[phone_regex], max_length=20, unique=True, null=True, blank=True, verbose_name="رقم الهاتف")
+    # الرقم بصيغة E.164 (+2010...) للبحث بالمطابقة ومنع التكرار بصيغ مختلفة - aqar_core/phones.py
+    phone_normalized = models.CharField(max_length=16, blank=True, default='', db_index=True, editable=False, verbose_name="الرقم الموحد")
     whatsapp_link = models.CharField(max_length=255, blank=True, verbose_name="رابط الواتساب")
     
     is_agent = models.BooleanField(default=False, verbose_name="هل هو موظف (مسوق)؟")
@@ -41,11 +108,13 @@ class User(AbstractUser):
         help_text="⛔ تحذير: هذا المستخدم محمي ولا يمكن حذفه نهائياً."
     )
 
+    PHONE_FIELDS = {'phone_number': 'phone_normalized'}
+
     def save(self, *args, **kwargs):
-        # توليد رابط واتساب تلقائي لو مش موجود
-        if self.phone_number and not self.whatsapp_link:
-            clean_number = self.phone_number.replace('+', '').replace(' ', '')
-            self.whatsapp_link = f"https://wa.me/{clean_number}"
+        # توليد رابط واتساب تلقائي لو مش موجود (بالرقم الموحد عشان 010... تبقى wa.me/2010...)
+        # (المستخدم الجاي من JWT حقوله مؤجلة: منحملش الرقم عشان الحفظ بس)
+        if not self.get_deferred_fields() & {'phone_number', 'whatsapp_link'} and self.phone_number and not self.whatsapp_link:
+            self.whatsapp_link = whatsapp_url(self.phone_number) or f"https://wa.me/{self.phone_number.replace('+', '').replace(' ', '')}"
         super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
@@ -75,6 +144,34 @@ class Notification(BaseModel):
     def __str__(self):
         return f"{self.title} - {self.user.username}"
 
+# 3.1 المهام الخلفية الطويلة (aqar_core/jobs.py) - التقدم بيظهر في لوحة التحكم
+class BackgroundJob(BaseModel):
+    STATUS_CHOICES = [('Pending', 'في الانتظار'), ('Running', 'جاري التنفيذ'), ('Done', 'تمت'), ('Failed', 'فشلت')]
+    name = models.CharField(max_length=100, verbose_name="المهمة")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending', verbose_name="الحالة", db_index=True)
+    total = models.PositiveIntegerField(default=0, verbose_name="الإجمالي")
+    processed = models.PositiveIntegerField(default=0, verbose_name="تم تنفيذه")
+    result = models.JSONField(default=dict, blank=True, verbose_name="النتيجة")
+    error = models.TextField(blank=True, default='', verbose_name="الخطأ")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="بدأت في")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="انتهت في")
+    # الدالة والمدخلات بتتحفظ عشان المهمة تتعاد لو العملية ماتت في النص (resume_jobs)
+    task = models.CharField(max_length=200, blank=True, default='', verbose_name="الدالة")
+    params = models.JSONField(default=dict, blank=True, verbose_name="المدخلات")
+
+    class Meta:
+        verbose_name = "مهمة خلفية"
+        verbose_name_plural = "⏳ المهام الخلفية"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        if self.status == 'Done': return 100
+        return min(100, int(self.processed * 100 / self.total)) if self.total else 0
+
 # 4. إعدادات الموقع العامة (Key-Value Store)
 class SiteSetting(models.Model):
     key = models.CharField(max_length=100, unique=True, verbose_name="المفتاح (Code)") 
@@ -89,21 +186,18 @@ class SiteSetting(models.Model):
         return f"{self.key} : {self.value[:50]}"
 
     def save(self, *args, **kwargs):
-        cache.delete(f'site_setting_{self.key}') # مسح الكاش عند التعديل
         super().save(*args, **kwargs)
+        # مسح الكاش عند التعديل (رقم إصدار جديد لكل الإعدادات)
+        transaction.on_commit(invalidate_site_settings)
+
+    def delete(self, *args, **kwargs):
+        super().delete(*args, **kwargs)
+        transaction.on_commit(invalidate_site_settings)
 
     @staticmethod
     def get_value(key, default=None):
-        # دالة مساعدة لجلب الإعدادات من الكاش لعدم تحميل الداتابيز
-        cached_value = cache.get(f'site_setting_{key}')
-        if cached_value: return cached_value
-        
-        try:
-            val = SiteSetting.objects.get(key=key).value
-            cache.set(f'site_setting_{key}', val, timeout=86400) # كاش لمدة يوم
-            return val
-        except SiteSetting.DoesNotExist:
-            return default
+        # دالة مساعدة لجلب الإعدادات من الـ Snapshot في الذاكرة لعدم تحميل الداتابيز
+        return get_setting(key, default)
 
 # 5. الإعلانات العامة (Push Notifications Helper)
 class Announcement(models.Model):
@@ -148,4 +242,23 @@ class ContactInfo(models.Model):
         return super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
-        raise ValidationError("لا يمكن حذف بيانات التواصل الأساسية، يمكنك تعديلها فقط.")
\ No newline at end of file
+        raise ValidationError("لا يمكن حذف بيانات التواصل الأساسية، يمكنك تعديلها فقط.")
+
+    @classmethod
+    def get_payload(cls):
+        # نأخذ آخر تحديث لبيانات التواصل
+        info = cls.objects.last()
+        if info:
+            return {
+                'support_phone': info.support_phone,
+                'whatsapp_number': info.whatsapp_number,
+                'facebook_url': info.facebook_url,
+                'instagram_url': info.instagram_url,
+            }
+        # قيم افتراضية لمنع الكراش
+        return {
+            'support_phone': '01000000000',
+            'whatsapp_number': '201000000000',
+            'facebook_url': '',
+            'instagram_url': '',
+        }
\ No newline at end of file
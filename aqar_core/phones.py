@@ -0,0 +1,64 @@
+import re
+
+from django.conf import settings
+
+# ==========================================
+# توحيد أرقام الموبايل (E.164)
+# ==========================================
+# 010..., +2010..., 2010..., 002010..., "010 1234 5678", ٠١٠... كلهم بيبقوا +201012345678
+# النسخة الموحدة بتتحفظ في عمود جنب الأصلي (عليه Index) والبحث بيبقى مطابقة تامة عليه
+
+ARABIC_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹', '01234567890123456789')
+PHONE_LIKE = re.compile(r'^\+?[\d\s\-()]{7,}$')
+MAX_LENGTH = 16  # + و 15 رقم (أقصى طول في E.164)
+
+def normalize_phone(value, country_code=None):
+    """بترجع الرقم بصيغة E.164 (+20...) أو '' لو مش رقم صالح"""
+    if not value:
+        return ''
+    value = str(value).translate(ARABIC_DIGITS).strip()
+    if not PHONE_LIKE.match(value):
+        return ''
+    country_code = country_code or getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '20')
+    digits = re.sub(r'\D', '', value)
+
+    if value.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif digits.startswith('0'):
+        digits = country_code + digits[1:]  # رقم محلي (010... / 02...)
+    elif not digits.startswith(country_code) and len(digits) <= 10:
+        digits = country_code + digits  # من غير الصفر (10...)
+
+    if not 8 <= len(digits) <= 15:
+        return ''
+    return f'+{digits}'
+
+def looks_like_phone(value):
+    """كلمة بحث شكلها رقم تليفون (عشان نضيف المطابقة التامة على الأعمدة الموحدة)"""
+    return bool(normalize_phone(value))
+
+def whatsapp_url(phone):
+    normalized = normalize_phone(phone)
+    return f"https://wa.me/{normalized[1:]}" if normalized else ''
+
+class NormalizedPhoneMixin:
+    """
+    PHONE_FIELDS = {'الحقل الأصلي': 'عمود الرقم الموحد'}
+    العمود الموحد بيتحسب مع كل save (ولو فيه update_fields بيتضاف معاها)
+    """
+    PHONE_FIELDS = {}
+
+    def normalize_phone_fields(self):
+        for source, target in self.PHONE_FIELDS.items():
+            if source in self.__dict__:  # الحقل المؤجل (deferred) مبنحملوش عشان نحسبه
+                setattr(self, target, normalize_phone(self.__dict__[source]))
+
+    def save(self, *args, **kwargs):
+        self.normalize_phone_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra = {target for source, target in self.PHONE_FIELDS.items() if source in update_fields}
+            kwargs['update_fields'] = set(update_fields) | extra
+        super().save(*args, **kwargs)
@@ -0,0 +1,62 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ==========================================
+# Renderers أسرع من JSONRenderer بتاع DRF
+# ==========================================
+# 1. FastJSONRenderer: نفس الـ JSON بالظبط (نفس الـ media type والشكل) بس بـ orjson
+#    العربي بيطلع UTF-8 من غير \uXXXX، والأنواع اللي orjson مبيعرفهاش (Decimal / datetime / lazy strings ...)
+#    بتعدي على JSONEncoder بتاع DRF عشان النتيجة متتغيرش عن الـ Renderer القديم
+# 2. MessagePackRenderer / MessagePackParser: للموبايل (Accept / Content-Type: application/msgpack أو ?format=msgpack)
+#    أصغر وأسرع في الـ parse، ونفس القيم اللي في الـ JSON
+
+_encoder = JSONEncoder()
+
+def _default(obj):
+    return _encoder.default(obj)
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        options = _ORJSON_OPTIONS
+        # ?indent / الـ Browsable API: orjson بيدعم مسافتين بس
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=_default, option=options)
+        # زي DRF: الحرفين دول بيكسروا JavaScript لو الـ JSON اتحط في <script>
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc or type(exc).__name__}')
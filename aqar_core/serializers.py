@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer, UserSerializer as BaseUserSerializer
 from .models import Notification, SiteSetting
+from .phones import normalize_phone
 
 User = get_user_model()
 
@@ -20,6 +21,13 @@ class CustomUserCreateSerializer(BaseUserCreateSerializer):
             'last_name': {'required': True},
         }
 
+    def validate_phone_number(self, value):
+        # ✅ نفس الرقم بصيغة تانية (+2010... / 010...) يعتبر مكرر (مطابقة على العمود الموحد)
+        normalized = normalize_phone(value)
+        if normalized and User.objects.filter(phone_normalized=normalized).exists():
+            raise serializers.ValidationError("رقم الهاتف مسجل بالفعل.")
+        return value
+
     def validate(self, attrs):
         # جعل اسم المستخدم هو نفسه رقم الهاتف تلقائياً
         if 'phone_number' in attrs:
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction
-from .models import Notification
+from rest_framework.authtoken.models import Token
+from .models import Notification, User
+from .authentication import invalidate_token_cache, invalidate_user_token_cache
 from .fcm_manager import send_push_notification
 import logging
 
@@ -31,4 +33,15 @@ def _send_fcm_safe(instance):
             link=target_link
         )
     except Exception as e:
-        logger.error(f"❌ فشل إرسال الإشعار (Background Task): {e}")
\ No newline at end of file
+        logger.error(f"❌ فشل إرسال الإشعار (Background Task): {e}")
+
+# ✅ كاش التوثيق (aqar_core/authentication.py): الخروج أو تعديل المستخدم بيمسح الكاش بتاعه
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_token_cache(instance.key))
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    transaction.on_commit(lambda: invalidate_user_token_cache(instance.pk))
@@ -0,0 +1,129 @@
+import json
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+from .caching import get_version, bump_version
+
+logger = logging.getLogger('django')
+
+# ==========================================
+# سجل إعدادات الموقع (Typed SiteSetting Registry)
+# ==========================================
+# - كل الإعدادات بتتحمل في استعلام واحد وتتحفظ كـ Snapshot ثابت (immutable)
+# - المفاتيح الناقصة بترجع القيمة الافتراضية من غير ما نلمس الداتابيز (Negative Caching)
+# - SiteSetting.save بيزود رقم الإصدار، وكل سيرفر بيلاحظ التغيير في خلال ثواني
+# - اللي بيوصل للتطبيق (Bootstrap) هو الإعدادات المسجلة بـ public=True بس، مش الجدول كله
+
+SITE_SETTINGS_NAMESPACE = 'site_settings'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+def _parse_bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on', 'نعم')
+
+PARSERS = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': _parse_bool,
+    'json': json.loads,
+}
+
+class SettingSpec:
+    def __init__(self, key, type='str', default=None, description='', public=False):
+        if type not in PARSERS:
+            raise ValueError(f"نوع غير معروف للإعداد {key}: {type}")
+        self.key = key
+        self.type = type
+        self.default = default
+        self.description = description
+        self.public = public
+
+    def parse(self, raw):
+        try:
+            return PARSERS[self.type](raw)
+        except (TypeError, ValueError) as e:
+            logger.error(f"⚠️ قيمة غير صالحة للإعداد {self.key} ({self.type}): {e}")
+            return self.default
+
+_registry = {}
+
+def register_setting(key, type='str', default=None, description='', public=False):
+    """
+    تعريف إعداد بنوعه وقيمته الافتراضية (مثال: register_setting('max_images', 'int', 20))
+    public=True: بيتبعت لأي حد في /bootstrap/ (ممنوع لأي حاجة سرية)
+    """
+    _registry[key] = SettingSpec(key, type, default, description, public)
+    return _registry[key]
+
+class SettingsSnapshot:
+    def __init__(self, raw, version):
+        self.version = version
+        values = {}
+        for key, value in raw.items():
+            spec = _registry.get(key)
+            values[key] = spec.parse(value) if spec else value
+        self._values = MappingProxyType(values)
+
+    def get(self, key, default=None):
+        if key in self._values:
+            return self._values[key]
+        if default is None and key in _registry:
+            return _registry[key].default
+        return default
+
+    def as_dict(self):
+        return dict(self._values)
+
+_state = {'snapshot': None, 'checked_at': 0.0}
+_lock = threading.Lock()
+
+def _load_raw(version):
+    from .models import SiteSetting
+    key = f'site_settings_snapshot_{version}'
+    raw = cache.get(key)
+    if raw is None:
+        raw = dict(SiteSetting.objects.values_list('key', 'value'))
+        cache.set(key, raw, timeout=SNAPSHOT_TIMEOUT)
+    return raw
+
+def get_snapshot():
+    recheck = getattr(settings, 'SITE_SETTINGS_RECHECK_SECONDS', 5)
+    snapshot = _state['snapshot']
+    if snapshot is not None and time.monotonic() - _state['checked_at'] < recheck:
+        return snapshot
+
+    with _lock:
+        version = get_version(SITE_SETTINGS_NAMESPACE)
+        snapshot = _state['snapshot']
+        if snapshot is None or snapshot.version != version:
+            snapshot = SettingsSnapshot(_load_raw(version), version)
+            _state['snapshot'] = snapshot
+        _state['checked_at'] = time.monotonic()
+    return snapshot
+
+def get_setting(key, default=None):
+    return get_snapshot().get(key, default)
+
+def get_public_settings():
+    snapshot = get_snapshot()
+    return {key: snapshot.get(key) for key, spec in _registry.items() if spec.public}
+
+def invalidate_site_settings():
+    bump_version(SITE_SETTINGS_NAMESPACE)
+    # السيرفر اللي عمل التعديل يشوفه فوراً من غير ما يستنى مدة الـ recheck
+    _state['checked_at'] = 0.0
+
+# ==========================================
+# الإعدادات اللي الكود بيقراها (المفتاح في لوحة التحكم: نفس الاسم)
+# ==========================================
+register_setting('slider_limit', 'int', None, "عدد عروض السلايدر لو الطلب من غير ?limit (فاضي = كل العروض النشطة)")
+
+# --- للتطبيق (public) ---
+register_setting('min_app_version', 'str', '', "أقل إصدار مسموح للتطبيق (الأقدم لازم يحدث)", public=True)
+register_setting('latest_app_version', 'str', '', "آخر إصدار للتطبيق (تنبيه تحديث اختياري)", public=True)
+register_setting('maintenance_mode', 'bool', False, "وضع الصيانة", public=True)
+register_setting('maintenance_message', 'str', '', "رسالة الصيانة اللي بتظهر في التطبيق", public=True)
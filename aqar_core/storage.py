@@ -0,0 +1,26 @@
+from cloudinary_storage import storage
+
+from .instrumentation import track_external
+
+class MediaCloudinaryStorage(storage.MediaCloudinaryStorage):
+    """تخزين Cloudinary العادي، بس كل نداء للشبكة بيتحسب في قياسات الطلب (Server-Timing: cloudinary)"""
+
+    @track_external('cloudinary')
+    def _open(self, name, mode='rb'):
+        return super()._open(name, mode)
+
+    @track_external('cloudinary')
+    def _upload(self, name, content):
+        return super()._upload(name, content)
+
+    @track_external('cloudinary')
+    def delete(self, name):
+        return super().delete(name)
+
+    @track_external('cloudinary')
+    def exists(self, name):
+        return super().exists(name)
+
+    @track_external('cloudinary')
+    def size(self, name):
+        return super().size(name)
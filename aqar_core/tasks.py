@@ -0,0 +1,46 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger('django')
+
+# ==========================================
+# تشغيل المهام في الخلفية (خارج مسار الطلب)
+# ==========================================
+# مفيش Celery هنا، فبنستخدم ThreadPool صغير جوه العملية.
+# المهام لازم تكون آمنة لو اتكررت أو ضاعت (السيرفرليس ممكن يوقف العملية)،
+# وعشان كده كل مهمة ليها أمر Backfill بيكمل اللي فات.
+
+_executor = None
+_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+                thread_name_prefix='aqar-task',
+            )
+    return _executor
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"❌ فشل تنفيذ المهمة الخلفية {func.__name__}")
+    finally:
+        # كل Thread ليه اتصالات داتابيز خاصة بيه، لازم تتقفل
+        connections.close_all()
+
+def run_in_background(func, *args, **kwargs):
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        return func(*args, **kwargs)
+    _get_executor().submit(_run, func, args, kwargs)
+
+def run_after_commit(func, *args, **kwargs):
+    """تشغيل المهمة بعد نجاح الـ transaction (عشان الـ Thread يشوف البيانات الجديدة)"""
+    transaction.on_commit(lambda: run_in_background(func, *args, **kwargs))
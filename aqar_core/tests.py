@@ -1,3 +1,438 @@
-from django.test import TestCase
+import gzip
+import itertools
+import json
+import os
+import runpy
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import msgpack
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Group
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils.crypto import get_random_string
+from djoser.utils import encode_uid
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from aqar.models import Governorate, City, MajorZone, Category, Listing
+from .checks import shared_cache_check
+from .compression import CompressionMiddleware, brotli, choose_encoding
+from .models import User, Notification, ContactInfo, SiteSetting
+from .phones import looks_like_phone, normalize_phone, whatsapp_url
+from .renderers import FastJSONRenderer, MessagePackRenderer, MessagePackParser
+from .site_settings import get_setting
+
+# مسارات JWT بتتضاف لـ aqar_core/urls.py مع JWT_AUTH_ENABLED بس، فاختبارها بيستخدم المسارات دي
+urlpatterns = [
+    path('auth/', include('djoser.urls.jwt')),
+    path('', include('aqar_core.urls')),
+]
+
+def _writes(ctx, table):
+    return [q['sql'] for q in ctx.captured_queries if table in q['sql'] and not q['sql'].startswith('SELECT')]
+
+class DirtyFieldsTests(TestCase):
+    """تتبع الحقول المتغيرة: الحفظ بيكتب اللي اتغير بس، والعقارات مبتتلمسش إلا لو بيانات المالك اتغيرت"""
+
+    @classmethod
+    def setUpTestData(cls):
+        gov = Governorate.objects.create(name='القاهرة')
+        city = City.objects.create(name='التجمع', governorate=gov)
+        zone = MajorZone.objects.create(name='الحي الأول', city=city)
+        category = Category.objects.create(name='شقة', slug='flat')
+        cls.agent = User.objects.create_user(username='agent', password='x', phone_number='01012345678')
+        cls.listing = Listing.objects.create(
+            title='شقة', price=1000, area_sqm=100, description='-',
+            governorate=gov, city=city, major_zone=zone, category=category, agent=cls.agent,
+        )
+
+    def test_unchanged_save_skips_write(self):
+        user = User.objects.get(pk=self.agent.pk)
+        with self.assertNumQueries(0):
+            user.save()
+
+    def test_fcm_token_save_writes_only_token(self):
+        user = User.objects.get(pk=self.agent.pk)
+        user.fcm_token = 'token-1'
+        with CaptureQueriesContext(connection) as ctx:
+            user.save()
+        self.assertEqual(len(ctx), 1)
+        self.assertIn('fcm_token', ctx.captured_queries[0]['sql'])
+        self.assertNotIn('phone_number', ctx.captured_queries[0]['sql'])
+        self.assertEqual(_writes(ctx, 'aqar_listing'), [])
+
+    @override_settings(ROOT_URLCONF='aqar_core.urls')
+    def test_update_fcm_view_does_not_touch_listings(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.agent.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post('/update-fcm/', {'fcm_token': 'token-2'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(_writes(ctx, 'aqar_listing'), [])
+
+    def test_last_login_does_not_touch_listings(self):
+        from django.contrib.auth.models import update_last_login
+        with CaptureQueriesContext(connection) as ctx:
+            update_last_login(None, User.objects.get(pk=self.agent.pk))
+        self.assertEqual(_writes(ctx, 'aqar_listing'), [])
+
+    def test_phone_change_syncs_listings(self):
+        user = User.objects.get(pk=self.agent.pk)
+        user.phone_number = '01099999999'
+        with CaptureQueriesContext(connection) as ctx:
+            user.save()
+        self.assertEqual(len(_writes(ctx, 'aqar_listing')), 1)
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.owner_phone, '01099999999')
+
+    def test_listing_save_writes_changed_columns(self):
+        listing = Listing.objects.get(pk=self.listing.pk)
+        self.assertFalse(listing.is_dirty())
+        listing.price = 2000
+        self.assertEqual(listing.get_dirty_fields(), {'price'})
+        with CaptureQueriesContext(connection) as ctx:
+            listing.save()
+        update = _writes(ctx, 'UPDATE "aqar_listing"')[0]
+        self.assertIn('"price"', update)
+        self.assertIn('"updated_at"', update)
+        self.assertNotIn('"description"', update)
+        self.assertFalse(listing.is_dirty())
+
+@override_settings(ROOT_URLCONF='aqar_core.urls')
+class QueryCountTests(TestCase):
+    """عدد الاستعلامات ثابت مع إشعار واحد (ومستخدم واحد) أو 100"""
+    SIZES = (1, 100)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='buyer', password='x', phone_number='01012345678', email='buyer@example.com')
+        cls.staff = User.objects.create_user(username='staff', password='x', is_staff=True)
+        Group.objects.bulk_create([Group(name='مبيعات'), Group(name='خدمة عملاء')])
+        ContactInfo.objects.create()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def _seed(self, size):
+        start = Notification.objects.count()
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title=f'إشعار {i}', message='-') for i in range(start, size)
+        ])
+        start = User.objects.filter(username__startswith='member').count()
+        User.objects.bulk_create([
+            User(username=f'member{i}', phone_number=f'0101000{i:04d}', interests='شقق') for i in range(start, size)
+        ])
+
+    def _assert_constant(self, expected, path, method='get', data=None, user=True):
+        """user=True: المشتري، None: زائر"""
+        for size in self.SIZES:
+            with self.subTest(size=size):
+                self._seed(size)
+                cache.clear()
+                url = path() if callable(path) else path
+                payload = data() if callable(data) else data
+                self.client.force_authenticate(self.user if user is True else user)
+                with self.assertNumQueries(expected):
+                    response = getattr(self.client, method)(url, payload, format='json')
+                self.assertLess(response.status_code, 300)
+
+    def test_notifications(self):
+        self._assert_constant(2, '/notifications/')
+        self._assert_constant(2, lambda: f'/notifications/{Notification.objects.values_list("pk", flat=True).first()}/')
+        self._assert_constant(1, '/notifications/mark_all_read/', method='post')
+
+    def test_profile_and_settings(self):
+        tokens = itertools.count()  # توكن جديد كل مرة (نفس التوكن مبيتكتبش أصلاً)
+        self._assert_constant(1, '/update-fcm/', method='post', data=lambda: {'fcm_token': f'token-{next(tokens)}'})
+        self._assert_constant(1, '/contact-info/')
+        self._assert_constant(0, '/auth/users/me/')
+        self._assert_constant(1, '/auth/users/me/', method='patch', data=lambda: {'email': f'{get_random_string(8)}@example.com'})
+
+    def test_staff_users(self):
+        self._assert_constant(1, '/users/', user=self.staff)
+        self._assert_constant(1, lambda: f'/users/{self.user.pk}/', user=self.staff)
+        self._assert_constant(1, '/users/roles/', user=self.staff)
+
+    def test_djoser_users(self):
+        self._assert_constant(1, '/auth/users/')
+        self._assert_constant(1, lambda: f'/auth/users/{self.user.pk}/')
+        usernames = itertools.count()
+        self._assert_constant(4, '/auth/users/', method='post', user=None, data=lambda: {
+            'username': f'new{next(usernames)}', 'password': 'Strong-pass-123', 'phone_number': '01099999999',
+        })
+        self._assert_constant(2, '/auth/users/activation/', method='post', user=None, data=lambda: self._uid_token(self._inactive_user()))
+
+    def test_djoser_credentials(self):
+        passwords = ['x']
+        def set_password():
+            passwords.append(f'Strong-pass-{len(passwords)}')
+            return {'current_password': passwords[-2], 'new_password': passwords[-1]}
+        self._assert_constant(1, '/auth/users/set_password/', method='post', data=set_password)
+        self._assert_constant(3, '/auth/users/set_username/', method='post', data=lambda: {
+            'current_password': passwords[-1], 'new_username': f'buyer-{get_random_string(6)}',
+        })
+        self._assert_constant(2, '/auth/users/reset_password_confirm/', method='post', user=None, data=lambda: {
+            **self._uid_token(self.user), 'new_password': f'Strong-pass-{get_random_string(8)}',
+        })
+        self._assert_constant(4, '/auth/users/reset_username_confirm/', method='post', user=None, data=lambda: {
+            **self._uid_token(self.user), 'new_username': f'buyer-{get_random_string(6)}',
+        })
+
+    # روابط الإيميلات مش متظبطة في الإعدادات، فبنديها قيم هنا عشان الإرسال نفسه يتعد
+    @override_settings(DJOSER={
+        'SEND_ACTIVATION_EMAIL': True, 'ACTIVATION_URL': 'activate/{uid}/{token}',
+        'PASSWORD_RESET_CONFIRM_URL': 'password/reset/{uid}/{token}', 'USERNAME_RESET_CONFIRM_URL': 'username/reset/{uid}/{token}',
+    })
+    def test_djoser_emails(self):
+        self._assert_constant(1, '/auth/users/reset_password/', method='post', user=None, data={'email': self.user.email})
+        self._assert_constant(1, '/auth/users/reset_username/', method='post', user=None, data={'email': self.user.email})
+        self._assert_constant(1, '/auth/users/resend_activation/', method='post', user=None, data=lambda: {
+            'email': self._inactive_user().email,
+        })
+
+    def test_djoser_tokens(self):
+        self._assert_constant(6, '/auth/token/login/', method='post', user=None, data=self._login_payload)
+        self._assert_constant(2, '/auth/token/logout/', method='post', user=self.staff, data=lambda: {
+            'token': Token.objects.get_or_create(user=self.staff)[0].key,
+        })
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_djoser_jwt(self):
+        self._assert_constant(1, '/auth/jwt/create/', method='post', user=None, data={'username': 'staff', 'password': 'x'})
+        refresh = str(RefreshToken.for_user(self.staff))
+        self._assert_constant(1, '/auth/jwt/refresh/', method='post', user=None, data={'refresh': refresh})
+        self._assert_constant(0, '/auth/jwt/verify/', method='post', user=None, data={'token': refresh})
+
+    # --- مدخلات بتتحسب قبل العد (الاستعلامات بتاعتها مش محسوبة على الـ Endpoint) ---
+    def _inactive_user(self):
+        n = User.objects.count()
+        return User.objects.create_user(username=f'inactive{n}', password='x', email=f'inactive{n}@example.com', is_active=False)
+
+    def _uid_token(self, user):
+        user.refresh_from_db()
+        return {'uid': encode_uid(user.pk), 'token': default_token_generator.make_token(user)}
+
+    def _login_payload(self):
+        Token.objects.filter(user=self.staff).delete()  # تسجيل دخول جديد كل مرة (مش توكن موجود)
+        return {'username': 'staff', 'password': 'x'}
+
+class RendererTests(SimpleTestCase):
+    """FastJSONRenderer بيطلع نفس بايتات JSONRenderer، و MessagePack نفس القيم"""
+    DATA = {
+        'price': Decimal('1500000.50'), 'latitude': Decimal('30.04441960'), 'area': 120,
+        'created_at': datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc),
+        'title': 'شقة للبيع\u2028في التجمع', 'features': [{'id': 1, 'value': None}], 7: 'مفتاح رقم',
+    }
+
+    def test_fast_json_matches_drf(self):
+        self.assertEqual(FastJSONRenderer().render(self.DATA), JSONRenderer().render(self.DATA))
+        self.assertIn('شقة'.encode(), FastJSONRenderer().render(self.DATA))
+        self.assertEqual(
+            FastJSONRenderer().render(self.DATA, 'application/json; indent=2'),
+            JSONRenderer().render(self.DATA, 'application/json; indent=2'),
+        )
+
+    def test_msgpack_round_trip(self):
+        expected = JSONRenderer().render(self.DATA)
+        decoded = msgpack.unpackb(MessagePackRenderer().render(self.DATA), raw=False, strict_map_key=False)
+        self.assertEqual(JSONRenderer().render(decoded), expected)
+
+    def test_msgpack_parser_rejects_garbage(self):
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(BytesIO(b'\xc1'))
+
+@override_settings(ROOT_URLCONF='aqar_core.urls')
+class ContentNegotiationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='buyer', password='x', phone_number='01012345678')
+        ContactInfo.objects.create()
+
+    def test_msgpack_response(self):
+        response = APIClient().get('/contact-info/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        json_response = APIClient().get('/contact-info/')
+        self.assertEqual(msgpack.unpackb(response.content, raw=False), json_response.json())
+
+    def test_msgpack_request(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            '/update-fcm/', msgpack.packb({'fcm_token': 'token-msgpack'}),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(msgpack.unpackb(response.content, raw=False)['status'], 'updated')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.fcm_token, 'token-msgpack')
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionTests(SimpleTestCase):
+    BODY = json.dumps([{'title': 'شقة للبيع في التجمع', 'price': '1500000.00'}] * 200, ensure_ascii=False).encode()
+
+    def _get(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def _json(self, body=None, **headers):
+        response = HttpResponse(body if body is not None else self.BODY, content_type='application/json')
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0'), None)
+        self.assertEqual(choose_encoding(''), None)
+        self.assertEqual(choose_encoding('*'), 'br' if brotli else 'gzip')
+
+    def test_gzip_json(self):
+        response = self._get(self._json(ETag='"abc"'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), self.BODY)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    @skipUnless(brotli, "brotli مش متسطب")
+    def test_brotli_preferred(self):
+        response = self._get(self._json(), 'gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.BODY)
+
+    def test_skipped_responses(self):
+        cases = {
+            'small': self._json(b'{"ok":true}'),
+            'not_modified': HttpResponseNotModified(),
+            'encoded': self._json(**{'Content-Encoding': 'gzip'}),
+            'binary': HttpResponse(self.BODY, content_type='application/gzip'),
+            'no_transform': self._json(**{'Cache-Control': 'no-transform'}),
+            # BREACH: صفحات HTML وأي رد فيه CSRF cookie
+            'html': HttpResponse(self.BODY, content_type='text/html; charset=utf-8'),
+            'csrf_cookie': self._json(),
+        }
+        cases['csrf_cookie'].set_cookie(settings.CSRF_COOKIE_NAME, 'token')
+        for name, response in cases.items():
+            with self.subTest(name):
+                original = response.content
+                self.assertEqual(self._get(response).content, original)
+        self.assertFalse(self._get(self._json(), 'identity').has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        chunks = [self.BODY[i:i + 4096] for i in range(0, len(self.BODY), 4096)]
+        response = self._get(StreamingHttpResponse(iter(chunks), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.BODY)
+
+class SiteSettingTests(TestCase):
+    """الإعدادات المسجلة بترجع بنوعها، والناقصة أو الغلط بترجع القيمة الافتراضية"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _set(self, key, value):
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSetting.objects.update_or_create(key=key, defaults={'value': value})
+
+    def test_typed_values(self):
+        self.assertIsNone(get_setting('slider_limit'))
+        self._set('slider_limit', '3')
+        self.assertEqual(get_setting('slider_limit'), 3)
+        self._set('slider_limit', 'كتير')
+        self.assertIsNone(get_setting('slider_limit'))
+
+class SharedCacheSettingsTests(SimpleTestCase):
+    """على Vercel من غير Redis الإعدادات بتشتغل بـ db (الـ build مبيقعش) مع تنبيه aqar_core.W001"""
+
+    def _load_settings(self, **env):
+        environ = {k: v for k, v in os.environ.items() if k not in ('VERCEL', 'REDIS_URL', 'CACHE_SHARED_BACKEND')}
+        with mock.patch.dict(os.environ, {**environ, **env}, clear=True):
+            return runpy.run_path(os.path.join(settings.BASE_DIR, 'backend', 'settings.py'))
+
+    def test_backend_selection(self):
+        vercel = self._load_settings(VERCEL='1')
+        self.assertEqual(vercel['CACHE_SHARED_BACKEND'], 'db')
+        self.assertTrue(vercel['CACHE_SHARED_BACKEND_IMPLICIT'])
+        redis = self._load_settings(VERCEL='1', REDIS_URL='redis://cache:6379')
+        self.assertEqual((redis['CACHE_SHARED_BACKEND'], redis['CACHES']['shared']['LOCATION']), ('redis', 'redis://cache:6379'))
+        explicit = self._load_settings(VERCEL='1', CACHE_SHARED_BACKEND='db')
+        self.assertFalse(explicit['CACHE_SHARED_BACKEND_IMPLICIT'])
+        self.assertEqual(self._load_settings()['CACHE_SHARED_BACKEND'], 'locmem')
+
+    def test_implicit_db_warning(self):
+        with override_settings(CACHE_SHARED_BACKEND_IMPLICIT=True):
+            self.assertEqual([w.id for w in shared_cache_check(None)], ['aqar_core.W001'])
+        with override_settings(CACHE_SHARED_BACKEND_IMPLICIT=False):
+            self.assertEqual(shared_cache_check(None), [])
+
+class PhoneTests(SimpleTestCase):
+    """كل صيغ الرقم المصري بتتوحد لـ E.164، وأي حاجة مش رقم تليفون بترجع ''"""
+
+    def test_normalize_phone(self):
+        for value in (
+            '01012345678', '+201012345678', '201012345678', '00201012345678', '1012345678',
+            '010 1234 5678', '(010) 1234-5678', '٠١٠١٢٣٤٥٦٧٨', '۰۱۰۱۲۳۴۵۶۷۸', ' +20 101 234 5678 ',
+        ):
+            with self.subTest(value):
+                self.assertEqual(normalize_phone(value), '+201012345678')
+        self.assertEqual(normalize_phone('0223456789'), '+20223456789')  # أرضي القاهرة
+        self.assertEqual(normalize_phone('0501234567', country_code='966'), '+966501234567')
+        for value in (None, '', 'ahmed', '12345', '010-12', '+1234567890123456', '0020123456789012345', 'شقة 0101234567'):
+            with self.subTest(value):
+                self.assertEqual(normalize_phone(value), '')
+
+    def test_looks_like_phone_and_whatsapp(self):
+        self.assertTrue(looks_like_phone('0101 234 5678'))
+        self.assertFalse(looks_like_phone('2024'))
+        self.assertFalse(looks_like_phone('شقة 120'))
+        self.assertEqual(whatsapp_url('٠١٠١٢٣٤٥٦٧٨'), 'https://wa.me/201012345678')
+        self.assertEqual(whatsapp_url('مش رقم'), '')
+
+class AdminSearchTests(TestCase):
+    """البحث في لوحة التحكم: الحقول المرتبطة نتيجتها كاملة (مفيش حد أقصى) ومتجمعة مع الحقول المحلية"""
+
+    def test_related_search_is_not_truncated(self):
+        users = User.objects.bulk_create([User(username=f'ahmed{i}', phone_number=f'0102{i:07d}') for i in range(1100)])
+        Notification.objects.bulk_create([Notification(user=user, title='تنبيه', message='-') for user in users])
+        Notification.objects.create(user=User.objects.create(username='mona', phone_number='01030000000'), title='رسالة لـ ahmed', message='-')
+        model_admin = admin.site._registry[Notification]
+        request = RequestFactory().get('/')
+        queryset, may_have_duplicates = model_admin.get_search_results(request, Notification.objects.all(), 'ahmed')
+        self.assertFalse(may_have_duplicates)
+        self.assertEqual(queryset.count(), 1101)
+
+    def test_phone_search_keeps_text_matches(self):
+        owner = User.objects.create(username='owner', phone_number='01012345678')
+        other = User.objects.create(username='other', phone_number='01030000000')
+        by_phone = Notification.objects.create(user=owner, title='تنبيه', message='-')
+        by_title = Notification.objects.create(user=other, title='اتصل على 01012345678', message='-')
+        Notification.objects.create(user=other, title='تنبيه', message='-')
+        model_admin = admin.site._registry[Notification]
+        queryset, _ = model_admin.get_search_results(RequestFactory().get('/'), Notification.objects.all(), '01012345678')
+        self.assertEqual(set(queryset), {by_phone, by_title})
+
+    @override_settings(ROOT_URLCONF='aqar_core.urls')
+    def test_api_phone_search_keeps_text_matches(self):
+        owner = User.objects.create(username='owner', phone_number='01012345678')
+        named = User.objects.create(username='user_01012345678', phone_number='01030000000')
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='staff', is_staff=True))
+        response = client.get('/users/', {'search': '+20 101 234 5678'})
+        self.assertEqual({row['id'] for row in response.json()}, {owner.pk})
+        response = client.get('/users/', {'search': '01012345678'})
+        self.assertEqual({row['id'] for row in response.json()}, {owner.pk, named.pk})
@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    NotificationViewSet, UpdateFCMTokenView, 
+    NotificationViewSet, UpdateFCMTokenView, UserViewSet,
     contact_info, # تأكد أن هذه الدالة موجودة في views.py
     # RegisterView, CustomAuthToken # ❌ تم حذفهم لأننا سنستخدم Djoser
 )
@@ -10,12 +11,15 @@ app_name = 'aqar_core'
 
 router = DefaultRouter()
 router.register(r'notifications', NotificationViewSet, basename='notification')
+router.register(r'users', UserViewSet, basename='user')  # ⛔ إدارة المستخدمين والأدوار (للأدمن بس)
 
 urlpatterns = [
     # ✅ مسارات المصادقة الجاهزة من Djoser (تسجيل، دخول، تفعيل، تغيير كلمة سر)
     # تأكد أنك ضفت 'djoser' في INSTALLED_APPS في settings.py
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')), 
+    # 🔑 JWT (اختياري): JWT_AUTH_ENABLED=1 - aqar_core/authentication.py
+    *([path('auth/', include('djoser.urls.jwt'))] if settings.JWT_AUTH_ENABLED else []),
     
     # ✅ مساراتك الخاصة
     path('update-fcm/', UpdateFCMTokenView.as_view(), name='update-fcm'),
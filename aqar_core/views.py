@@ -1,13 +1,22 @@
 from rest_framework import viewsets, permissions, status, filters
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+import hmac
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.shortcuts import get_object_or_404
+from django.db.models import Count, Max, Q
+from django.utils import timezone
 
 from .models import Notification, ContactInfo
+from .caching import ConditionalGetMixin
+from .instrumentation import query_budget
+from .jobs import resumable_jobs, resume_job
+from .phones import looks_like_phone, normalize_phone
 # استيراد السيريالايزر النظيف الذي اعتمدناه سابقاً
 from .serializers import (
     NotificationSerializer, 
@@ -18,45 +27,45 @@ from .serializers import (
 User = get_user_model()
 
 # 1. معلومات التواصل (للفوتر والاتصال)
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def contact_info(request):
-    # نأخذ آخر تحديث لبيانات التواصل
-    info = ContactInfo.objects.last()
-    
-    if info:
-        return Response({
-            'support_phone': info.support_phone,
-            'whatsapp_number': info.whatsapp_number,
-            'facebook_url': info.facebook_url,
-            'instagram_url': info.instagram_url,
-        })
-    else:
-        # قيم افتراضية لمنع الكراش
-        return Response({
-            'support_phone': '01000000000',
-            'whatsapp_number': '201000000000',
-            'facebook_url': '',
-            'instagram_url': '',
-        })
+    return Response(ContactInfo.get_payload())
 
 # 2. إدارة الإشعارات
-class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 4, 'retrieve': 4, 'mark_all_read': 3}
 
     def get_queryset(self):
         # المستخدم يرى إشعاراته فقط
         return Notification.objects.filter(user=self.request.user).order_by('-created_at')
 
+    def get_etag_fingerprint(self, request):
+        queryset = self.get_queryset().order_by()
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs.get('pk')) if str(self.kwargs.get('pk', '')).isdigit() else queryset.none()
+        stats = queryset.aggregate(
+            last=Max('updated_at'), total=Count('id'), unread=Count('id', filter=Q(is_read=False))
+        )
+        if not stats['total'] and self.action == 'retrieve': return None
+        self._last_modified = stats['last']
+        return (request.user.pk, stats['last'], stats['total'], stats['unread'])
+
+    def get_last_modified(self, request):
+        return getattr(self, '_last_modified', None)
+
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
-        request.user.notifications.filter(is_read=False).update(is_read=True)
+        request.user.notifications.filter(is_read=False).update(is_read=True, updated_at=timezone.now())
         return Response({'status': 'success', 'message': 'تم قراءة جميع الإشعارات'})
 
 # 3. تحديث توكن الفايربيس (للموبايل والويب)
 class UpdateFCMTokenView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
     def post(self, request):
         fcm_token = request.data.get('fcm_token')
@@ -67,14 +76,26 @@ class UpdateFCMTokenView(APIView):
         return Response({'error': 'Token is required'}, status=400)
 
 # 4. إدارة المستخدمين (خاص بلوحة تحكم الأدمن Dashboard)
+class PhoneSearchFilter(filters.SearchFilter):
+    """?search= برقم تليفون (بأي صيغة) بيضيف مطابقة تامة على phone_search_field جنب البحث العادي (icontains)"""
+    def filter_queryset(self, request, queryset, view):
+        results = super().filter_queryset(request, queryset, view)
+        term = request.query_params.get(self.search_param, '').strip()
+        if looks_like_phone(term):
+            # pk__in عشان البحث العادي ممكن يكون عليه distinct (مينفعش يتجمع بـ | مع query عادي)
+            return queryset.filter(Q(pk__in=results.values('pk')) | Q(**{view.phone_search_field: normalize_phone(term)}))
+        return results
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     هذا الـ ViewSet مخصص للمشرفين فقط لإدارة المستخدمين والموظفين
     """
     queryset = User.objects.all()
     permission_classes = [IsAdminUser] # ⛔ للأدمن فقط
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['phone_number', 'username', 'first_name', 'email']
+    filter_backends = [PhoneSearchFilter]
+    search_fields = ['username', 'first_name', 'email']
+    phone_search_field = 'phone_normalized'
+    query_budget = {'list': 4, 'retrieve': 4, 'roles': 3}
 
     def get_serializer_class(self):
         # عند الإنشاء نستخدم سيريالايزر يتعامل مع الباسورد
@@ -130,4 +151,17 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def roles(self, request):
         groups = Group.objects.values('id', 'name')
-        return Response(groups)
\ No newline at end of file
+        return Response(groups)
+# 5. Cron بتاع Vercel (vercel.json): إعادة تشغيل المهام الخلفية اللي الـ Thread بتاعها مات بعد الرد
+# Vercel بيبعت Authorization: Bearer <CRON_SECRET>، ومن غير CRON_SECRET المسار مقفول
+# المهام بتتنفذ هنا بالترتيب، ولو الوقت خلص المهمة بتفضل واقفة وتتكمل في المرة الجاية (كلها بتتعاد بأمان)
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def resume_jobs_cron(request):
+    secret = getattr(settings, 'CRON_SECRET', None)
+    if not secret or not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {secret}'):
+        return Response(status=status.HTTP_403_FORBIDDEN)
+    jobs = list(resumable_jobs().order_by('created_at'))
+    resumed = sum(resume_job(job) for job in jobs)
+    return Response({'stale': len(jobs), 'resumed': resumed})
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 import dj_database_url
 
@@ -28,6 +29,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'aqar_core.instrumentation.RequestMetricsMiddleware',  # 📊 الاستعلامات/الكاش/Server-Timing لكل طلب (لازم الأول)
+    'aqar_core.compression.CompressionMiddleware',  # 🗜️ brotli / gzip للردود الكبيرة (بعد القياسات على طول)
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     # 'whitenoise.middleware.WhiteNoiseMiddleware', # ❌ 2. عطل هذا السطر (مهم جداً لهذه الطريقة)
@@ -69,7 +72,7 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 # ✅ التخزين: الصور كلاوديناري، والاستاتيك محلي (Local) ليراه Vercel
 STORAGES = {
-    "default": {"BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage"},
+    "default": {"BACKEND": "aqar_core.storage.MediaCloudinaryStorage"},  # Cloudinary + قياس وقت الرفع
     "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
 }
 
@@ -78,6 +81,8 @@ CLOUDINARY_STORAGE = {
     'API_KEY': os.environ.get('CLOUDINARY_API_KEY'),
     'API_SECRET': os.environ.get('CLOUDINARY_API_SECRET'),
 }
+# 🔒 الهوستات اللي مسموح السيرفر يحمل منها صور (BlurHash - aqar/placeholders.py)، أي رابط تاني بيتساب
+IMAGE_FETCH_HOSTS = tuple(host.strip() for host in os.environ.get('IMAGE_FETCH_HOSTS', 'res.cloudinary.com').split(',') if host.strip())
 
 # باقي الإعدادات
 CORS_ALLOW_ALL_ORIGINS = True
@@ -86,4 +91,124 @@ LANGUAGE_CODE = 'ar-eg'
 TIME_ZONE = 'Africa/Cairo'
 USE_I18N = True
 USE_TZ = True
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# ✅ التوثيق: توكن DRF متكيش (من غير استعلام لكل طلب) - aqar_core/authentication.py
+# JWT_AUTH_ENABLED=1 بيفعّل JWT من غير أي استعلام خالص (djoser: /auth/jwt/create/)، والتوكن القديم بيفضل شغال
+JWT_AUTH_ENABLED = os.environ.get('JWT_AUTH_ENABLED', '').lower() in ('1', 'true', 'yes')
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        ['aqar_core.authentication.StatelessJWTAuthentication'] if JWT_AUTH_ENABLED else []
+    ) + [
+        'aqar_core.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    # ⚡ orjson بدل json + MessagePack للموبايل (Accept: application/msgpack) - aqar_core/renderers.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'aqar_core.renderers.FastJSONRenderer',
+        'aqar_core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'aqar_core.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('JWT_ACCESS_MINUTES', 5))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.environ.get('JWT_REFRESH_DAYS', 7))),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'aqar_core.authentication.ClaimsTokenObtainPairSerializer',
+}
+
+# 📊 قياسات الطلبات (aqar_core/instrumentation.py): هيدر Server-Timing للأدمن بس إلا لو SERVER_TIMING_PUBLIC
+# وسطر JSON لكل طلب في aqar.requests (REQUEST_LOG_LEVEL=WARNING = الطلبات اللي عدت ميزانية الاستعلامات بس)
+SERVER_TIMING_PUBLIC = os.environ.get('SERVER_TIMING_PUBLIC', '').lower() in ('1', 'true', 'yes')
+
+# 🗜️ ضغط الردود (aqar_core/compression.py): المستويات دي أحسن توازن للـ JSON العربي (benchmark_compression)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 5))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'loggers': {
+        'aqar.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'WARNING' if DEBUG else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# ✅ الكاش على مستويين: ذاكرة صغيرة داخل كل سيرفر (L1) + كاش مشترك بين كل السيرفرات (L2)
+# CACHE_SHARED_BACKEND: redis / db (جدول في الداتابيز - يحتاج createcachetable) / file / locmem
+# ⚠️ في الإنتاج (Vercel) من غير REDIS_URL ولا CACHE_SHARED_BACKEND بيشتغل db (من غير أي خدمة خارجية)،
+#    بس الـ Serverless instances بتبدأ فاضية كتير، فكل L1 miss بقى استعلام داتابيز
+#    (وتوكن المصادقة المتكيش بيبدل الـ Join باستعلام على جدول الكاش، يعني مفيش مكسب)
+#    والـ System Check (aqar_core.W001) بينبه على ده في كل أمر manage.py لحد ما يتحدد صراحةً
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHE_SHARED_BACKEND_IMPLICIT = not os.environ.get('CACHE_SHARED_BACKEND') and not REDIS_URL and 'VERCEL' in os.environ
+CACHE_SHARED_BACKEND = os.environ.get('CACHE_SHARED_BACKEND') or (
+    'redis' if REDIS_URL else ('db' if 'VERCEL' in os.environ else 'locmem')
+)
+SHARED_CACHE_BACKENDS = {
+    'db': ('django.core.cache.backends.db.DatabaseCache', os.environ.get('CACHE_LOCATION', 'django_cache')),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.environ.get('CACHE_LOCATION', '/tmp/django_cache')),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', os.environ.get('CACHE_LOCATION', 'shared')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', os.environ.get('CACHE_LOCATION') or REDIS_URL or 'redis://127.0.0.1:6379'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'aqar_core.cache_backends.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': int(os.environ.get('CACHE_L1_MAX_ENTRIES', 512)),
+            'L1_TIMEOUT': float(os.environ.get('CACHE_L1_TIMEOUT', 5)),
+        },
+    },
+    'shared': {
+        'BACKEND': SHARED_CACHE_BACKENDS[CACHE_SHARED_BACKEND][0],
+        'LOCATION': SHARED_CACHE_BACKENDS[CACHE_SHARED_BACKEND][1],
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+    },
+}
+
+# ✅ كاش الـ CDN (Vercel Edge): مسح الصفحات بالـ Surrogate Keys عند تعديل البيانات
+CDN_PURGE_BACKEND = os.environ.get('CDN_PURGE_BACKEND', 'aqar_core.cdn.NullPurgeBackend')
+CDN_PURGE_URL = os.environ.get('CDN_PURGE_URL')
+CDN_PURGE_TOKEN = os.environ.get('CDN_PURGE_TOKEN')
+CDN_SURROGATE_KEY_HEADER = os.environ.get('CDN_SURROGATE_KEY_HEADER', 'Surrogate-Key')
+
+# ✅ المهام الخلفية (aqar_core/tasks.py): بتشتغل في Threads بعد الـ commit
+# BACKGROUND_TASKS_EAGER=1 بيشغلها فوراً في نفس الطلب (للاختبارات والتطوير)
+BACKGROUND_TASKS_EAGER = os.environ.get('BACKGROUND_TASKS_EAGER', '').lower() in ('1', 'true', 'yes')
+BACKGROUND_TASK_WORKERS = int(os.environ.get('BACKGROUND_TASK_WORKERS', 2))
+# المهام اللي مفيهاش تقدم من المدة دي بتعتبر واقفة (الـ Thread مات) وبتتعاد بالـ Cron أو python manage.py resume_jobs
+JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 900))
+# القبول / التعليق من لوحة التحكم لحد العدد ده بيتنفذ في نفس الطلب بدل الخلفية
+MODERATION_INLINE_LIMIT = int(os.environ.get('MODERATION_INLINE_LIMIT', 200))
+MODERATION_MAX_SELECTION = int(os.environ.get('MODERATION_MAX_SELECTION', 5000))
+# Vercel Cron بيبعته في Authorization لـ /cron/resume-jobs/ (من غيره المسار بيرجع 403)
+CRON_SECRET = os.environ.get('CRON_SECRET')
+
+# ✅ استيراد العقارات من لوحة التحكم بيتنفذ جوه الطلب، فبحد أقصى للسطور (الأكبر بأمر import_listings)
+ADMIN_IMPORT_MAX_ROWS = int(os.environ.get('ADMIN_IMPORT_MAX_ROWS', 2000))
+
+# ✅ أكواد المرجع: كل عملية بتحجز الدفعة دي من الـ Sequence مرة واحدة (aqar/references.py)
+REFERENCE_BLOCK_SIZE = int(os.environ.get('REFERENCE_BLOCK_SIZE', 20))
+
+# ✅ لوحة التحكم للجداول الكبيرة (aqar_core/admin_tools.py)
+# فوق العدد ده بيظهر عدد تقريبي من إحصائيات Postgres بدل COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100_000))
+ADMIN_FILTER_CHOICES_TIMEOUT = int(os.environ.get('ADMIN_FILTER_CHOICES_TIMEOUT', 600))
+
+# ✅ كود الدولة لتوحيد الأرقام المحلية (010... -> +2010...) - aqar_core/phones.py
+PHONE_DEFAULT_COUNTRY_CODE = os.environ.get('PHONE_DEFAULT_COUNTRY_CODE', '20')
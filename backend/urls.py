@@ -16,7 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
+from aqar_core.views import resume_jobs_cron
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # ⏰ Vercel Cron (vercel.json) - المهام الخلفية اللي وقفت
+    path('cron/resume-jobs/', resume_jobs_cron, name='cron-resume-jobs'),
 ]